@@ -34,7 +34,10 @@ class TrainingApp(QWidget):
         layout.addWidget(self.stacked_widget)
         self.setLayout(layout)
 
-        self.show_page("LoginPage")
+        if self.pages["LoginPage"].try_resume():
+            self.show_page("MainPage")
+        else:
+            self.show_page("LoginPage")
 
     def show_page(self, name):
         page = self.pages.get(name)
@@ -44,8 +47,15 @@ class TrainingApp(QWidget):
                 page.on_show()
             self.stacked_widget.setCurrentWidget(page)
 
+    def on_training_saved(self, info):
+        """训练记录保存后通知各页面（如果有对应钩子）增量更新"""
+        for page in self.pages.values():
+            if hasattr(page, "on_training_saved"):
+                page.on_training_saved(info)
+
     def logout(self):
         self.database_manager.logout()
+        self.pages["LoginPage"].forget()
         self.show_page("LoginPage")
 
 
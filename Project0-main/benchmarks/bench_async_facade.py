@@ -0,0 +1,132 @@
+"""AsyncLiteDataManager 在事件循环中的吞吐量、背压与取消
+
+每个用户一个协程交替保存和读取训练记录，同时用一个心跳协程测量事件循环的最大停顿
+（数据库调用不应阻塞事件循环）；随后演示 queue_timeout=0 时的 QueueFullError，
+登录洪峰同样受认证通道上限约束，以及取消排队中的写操作后该写入不会发生。
+结果不一致时以非零状态退出。
+
+用法: python benchmarks/bench_async_facade.py --users 32 --saves 100
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_interface import (  # noqa
+    AsyncLiteDataManager, LiteDataManager, QueueFullError, TrainingInfo
+)
+
+
+async def client(db, index, saves):
+    session = await db.login(f'user{index}', 'password')
+    for i in range(saves):
+        day = str(20240101 + i % 28)
+        await db.save_training_record(
+            TrainingInfo(day, ['深蹲'], [1]), session=session)
+        await db.get_daily_totals(day, day, session=session)
+    return session
+
+
+async def heartbeat(stop, interval=0.005):
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(db_path, args):
+    failures = []
+    db = AsyncLiteDataManager.open(
+        db_path, pool_size=args.pool_size, wal=True, password_rounds=1000)
+    async with db:
+        for index in range(args.users):
+            await db.register(f'user{index}', 'password')
+
+        stop = asyncio.Event()
+        beat = asyncio.create_task(heartbeat(stop))
+        start = time.perf_counter()
+        sessions = await asyncio.gather(
+            *(client(db, index, args.saves) for index in range(args.users)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        worst = await beat
+        ops = args.users * args.saves * 2
+        print(f"{ops} ops in {elapsed:.2f}s ({ops / elapsed:.0f} ops/s), "
+              f"worst loop stall {worst * 1e3:.1f} ms")
+
+        for index, session in enumerate(sessions):
+            totals = await db.get_exercise_totals(session=session)
+            if totals.get('深蹲') != args.saves:
+                failures.append(f'user{index}: {totals}')
+
+    # 背压：写队列只有 4 个名额且不等待时，超出的调用立即失败
+    db = AsyncLiteDataManager(
+        LiteDataManager(db_path), max_pending_writes=4, max_pending_auth=2,
+        queue_timeout=0, owns_manager=True)
+    async with db:
+        session = await db.login('user0', 'password')
+        results = await asyncio.gather(
+            *(db.save_training_record(
+                TrainingInfo('20250101', ['卧推'], [1]), session=session)
+              for _ in range(32)),
+            return_exceptions=True)
+        rejected = sum(isinstance(r, QueueFullError) for r in results)
+        accepted = len(results) - rejected
+        totals = await db.get_exercise_totals(session=session)
+        print(f"backpressure: {accepted} accepted, {rejected} rejected")
+        if totals.get('卧推') != accepted:
+            failures.append(f'backpressure totals {totals}')
+
+        # 认证通道：同时登录超过上限时，超出的登录立即失败，其余正常完成
+        logins = await asyncio.gather(
+            *(db.login('user0', 'password') for _ in range(16)),
+            return_exceptions=True)
+        rejected = sum(isinstance(r, QueueFullError) for r in logins)
+        print(f"login backpressure: {len(logins) - rejected} accepted, "
+              f"{rejected} rejected")
+        if rejected != len(logins) - 2 or any(
+                isinstance(r, Exception) and not isinstance(r, QueueFullError)
+                for r in logins):
+            failures.append(f'login backpressure {logins}')
+
+        # 取消：写线程被一个慢操作占住时，排队中的写操作被取消后不会执行
+        blocker = asyncio.create_task(db._submit(
+            db._lanes['write'], time.sleep, 0.2))
+        queued = asyncio.create_task(db.save_training_record(
+            TrainingInfo('20250102', ['硬拉'], [1]), session=session))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        await blocker
+        # 写操作按顺序执行，后提交的写入完成时被取消的写入必然已被跳过
+        await db.save_training_record(
+            TrainingInfo('20250103', ['卧推'], [1]), session=session)
+        totals = await db.get_exercise_totals(session=session)
+        print(f"cancelled write applied: {'硬拉' in totals}")
+        if '硬拉' in totals:
+            failures.append('cancelled write was applied')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=32)
+    parser.add_argument('--saves', type=int, default=100)
+    parser.add_argument('--pool-size', type=int, default=8)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        failures = asyncio.run(run(os.path.join(tmp, 'async.db'), args))
+    for failure in failures:
+        print('FAIL', failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""批量写入与逐条写入的吞吐量对比
+
+逐条写入只跑 --single 条样本并按比例推算，批量写入跑完整的 --records 条。
+批量写入后检查各个身体数据读取接口都返回了体脂率和基础代谢，不一致时以非零状态退出。
+
+用法: python benchmarks/bench_bulk_ingest.py --records 100000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_interface import LiteDataManager, TrainingInfo, BodyStats  # noqa
+
+EXERCISES = ['深蹲', '硬拉', '卧推', '引体向上', '卷腹']
+
+
+def day_str(i):
+    # 约每 3 条记录落在同一天，覆盖合并路径
+    return (date(1950, 1, 1) + timedelta(days=i // 3)).strftime('%Y%m%d')
+
+
+def training_records(n):
+    for i in range(n):
+        yield TrainingInfo(
+            day_str(i), EXERCISES[i % 3:i % 3 + 3], [i % 4 + 1, 2, 3])
+
+
+def body_stats(n):
+    for i in range(n):
+        yield BodyStats(day_str(i), 175.0, 60.0 + i % 20,
+                        body_fat=15.0 + i % 10, bmr=1500.0 + i % 50)
+
+
+def check_body_readers(manager, n):
+    """同一天以最后一条为准；返回读到的体脂率/基础代谢与写入不符的接口名"""
+    expected = {}
+    for stats in body_stats(n):
+        expected[stats.timestamp] = (stats.body_fat, stats.bmr)
+    first, last = min(expected), max(expected)
+    page, _ = manager.get_body_stats_page(page_size=50)
+    readers = {
+        'get_body_stats_history': manager.get_body_stats_history(limit=50),
+        'get_body_stats_between': manager.get_body_stats_between(first, last),
+        'get_body_stats_page': page,
+        'iter_body_stats': list(manager.iter_body_stats(batch_size=500)),
+        'get_latest_body_stats': [manager.get_latest_body_stats()],
+    }
+    return [
+        name for name, rows in readers.items()
+        if not rows or any(
+            (row.body_fat, row.bmr) != expected[row.timestamp] for row in rows)
+    ]
+
+
+def new_manager(path):
+    manager = LiteDataManager(path)
+    manager.register('bench', 'password')
+    manager.login('bench', 'password')
+    return manager
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--single', type=int, default=2000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = new_manager(os.path.join(tmp, 'single.db'))
+        t_train, _ = timed(lambda: [
+            manager.save_training_record(r)
+            for r in training_records(args.single)])
+        t_body, _ = timed(lambda: [
+            manager.save_body_stats(s) for s in body_stats(args.single)])
+        manager.close()
+
+        manager = new_manager(os.path.join(tmp, 'bulk.db'))
+        bt_train, train_report = timed(
+            lambda: manager.save_training_records_many(
+                training_records(args.records), chunk_size=args.chunk_size))
+        bt_body, body_report = timed(
+            lambda: manager.save_body_stats_many(
+                body_stats(args.records), chunk_size=args.chunk_size))
+        bad_readers = check_body_readers(manager, args.records)
+        manager.close()
+
+    print(f"{args.records} records, chunk size {args.chunk_size}")
+    print(f"{'table':<14}{'single rec/s':>14}{'bulk rec/s':>14}"
+          f"{'speedup':>9}{'inserted':>10}{'merged':>9}")
+    for name, single, bulk, report in (
+        ('training', args.single / t_train, args.records / bt_train,
+         train_report),
+        ('body_stats', args.single / t_body, args.records / bt_body,
+         body_report),
+    ):
+        print(f"{name:<14}{single:>14.0f}{bulk:>14.0f}{bulk / single:>8.1f}x"
+              f"{report.inserted:>10}{report.merged:>9}")
+    if bad_readers:
+        print(f"FAIL: body_fat/bmr missing or wrong in {bad_readers}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
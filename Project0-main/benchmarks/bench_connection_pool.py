@@ -0,0 +1,84 @@
+"""对比每次新建连接与连接池两种方式下单次操作的延迟
+
+用法: python benchmarks/bench_connection_pool.py [--ops 2000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from contextlib import contextmanager
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_interface import LiteDataManager, TrainingInfo  # noqa
+
+
+class PerCallConnectionManager(LiteDataManager):
+    """旧实现：每次操作都新建连接"""
+
+    @contextmanager
+    def _get_cursor(self, write=False):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA foreign_keys = ON')
+        try:
+            cursor = conn.cursor()
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+def lookup_user(manager, username):
+    with manager._get_cursor() as cur:
+        cur.execute(
+            'SELECT id, password_hash FROM users WHERE username=?',
+            (username,)
+        )
+        return cur.fetchone()
+
+
+def run(manager_cls, db_path, ops):
+    # 关闭查询缓存，只比较连接开销
+    manager = manager_cls(db_path, cache_bytes=0)
+    manager.register('bench', 'password')
+    manager.login('bench', 'password')
+
+    cases = {
+        'user lookup': lambda i: lookup_user(manager, 'bench'),
+        'save record': lambda i: manager.save_training_record(
+            TrainingInfo(str(20200101 + i % 28), ['push_up'], [1])),
+        'fetch history': lambda i: manager.get_training_records(),
+    }
+    results = {}
+    for name, op in cases.items():
+        start = time.perf_counter()
+        for i in range(ops):
+            op(i)
+        results[name] = (time.perf_counter() - start) / ops * 1e6
+    manager.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ops', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before = run(
+            PerCallConnectionManager, os.path.join(tmp, 'before.db'), args.ops)
+        after = run(LiteDataManager, os.path.join(tmp, 'after.db'), args.ops)
+
+    print(f"{'operation':<16}{'per-call (us)':>16}{'pooled (us)':>14}{'speedup':>10}")
+    for name in before:
+        print(f"{name:<16}{before[name]:>16.1f}{after[name]:>14.1f}"
+              f"{before[name] / after[name]:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""组提交写队列的吞吐量：每次保存一个事务 vs 多个保存合并为一个事务
+
+多个线程同时调用 save_training_record（模拟整点时大量客户端同时保存），
+分别在关闭和开启组提交时测量每秒写入数；另测单线程用 save_training_record_async
+连续提交的情况。数据库放在磁盘上的临时目录中，默认日志模式下每个事务都要同步磁盘。
+每个用例结束后检查总组数，不一致时以非零状态退出。
+
+用法: python benchmarks/bench_group_commit.py --threads 16 --saves 200 --window-ms 2
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_interface import LiteDataManager, TrainingInfo  # noqa
+
+
+def record(i):
+    return TrainingInfo(str(20240101 + i % 28), ['深蹲'], [1])
+
+
+def run_threads(manager, session, threads, saves):
+    def worker():
+        for i in range(saves):
+            manager.save_training_record(record(i), session=session)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return threads * saves
+
+
+def run_async(manager, session, threads, saves):
+    futures = [
+        manager.save_training_record_async(record(i), session=session)
+        for i in range(threads * saves)
+    ]
+    for future in futures:
+        future.result()
+    return len(futures)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--saves', type=int, default=200)
+    parser.add_argument('--window-ms', type=float, default=2)
+    parser.add_argument('--max-items', type=int, default=256)
+    parser.add_argument('--wal', action='store_true')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    failed = False
+    print(f"{'case':<34}{'writes/s':>10}{'batches':>9}")
+    for name, run in (('threads', run_threads), ('async submit', run_async)):
+        for window in (0, args.window_ms / 1000):
+            with tempfile.TemporaryDirectory(dir='.') as tmp:
+                manager = LiteDataManager(
+                    os.path.join(tmp, 'group.db'),
+                    pool_size=args.threads + 1, wal=args.wal,
+                    cache_bytes=0, write_retries=50,
+                    password_rounds=1000,
+                    group_commit_window=window,
+                    group_commit_max_items=args.max_items)
+                manager.register('bench', 'password')
+                session = manager.login('bench', 'password', bind=False)
+
+                start = time.perf_counter()
+                writes = run(manager, session, args.threads, args.saves)
+                elapsed = time.perf_counter() - start
+
+                batches = manager._write_queue.batches \
+                    if manager._write_queue is not None else writes
+                total = manager.get_exercise_totals(session=session)
+                manager.logout(session)
+                manager.close()
+            label = f"{name}, " + (
+                f"group commit {args.window_ms:g} ms" if window else
+                "one commit per save")
+            print(f"{label:<34}{writes / elapsed:>10.0f}{batches:>9}")
+            if total.get('深蹲') != writes:
+                print(f"  FAIL: expected {writes} sets, got {total}")
+                failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
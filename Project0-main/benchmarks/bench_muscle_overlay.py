@@ -0,0 +1,105 @@
+"""肌群高亮图每次重绘的耗时：每次从磁盘读图并全尺寸合成 vs 预缩放遮罩 + 结果缓存
+
+模拟在日历上来回点击：若干个不同的肌群组合循环出现。旧方式照搬原先
+MuscleOverlayWidget.highlight_muscles 的做法（逐个打开 PNG、PIL 全尺寸合成、再缩放）。
+另测热力模式在不同高亮肌群数下的合成耗时（不经过缓存），应与肌群数基本无关。
+无界面环境下以 offscreen 平台运行。
+
+用法: python benchmarks/bench_muscle_overlay.py --clicks 200
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+from PIL import Image  # noqa
+from PyQt5.QtGui import QImage, QPixmap  # noqa
+from PyQt5.QtWidgets import QApplication  # noqa
+from ui.muscle_overlay import MuscleCompositor  # noqa
+from ui.view_page import muscle_map  # noqa
+
+IMAGE_DIR = os.path.join(ROOT, "assets")
+MASK_DIR = os.path.join(IMAGE_DIR, "masks")
+
+
+def legacy_render(muscles):
+    pixmaps = []
+    for view in ("front", "back"):
+        img = Image.open(
+            os.path.join(IMAGE_DIR, f"base_{view}.png")).convert("RGBA")
+        for muscle in muscles:
+            path = os.path.join(MASK_DIR, f"{muscle}_{view}.png")
+            if os.path.exists(path) and os.path.getsize(path):
+                overlay = Image.open(path).convert("RGBA")
+                img = Image.alpha_composite(img, overlay)
+        data = img.tobytes("raw", "RGBA")
+        qimage = QImage(data, img.width, img.height, QImage.Format_RGBA8888)
+        pixmaps.append(QPixmap.fromImage(qimage).scaledToHeight(500))
+    return pixmaps
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clicks', type=int, default=200)
+    parser.add_argument('--days', type=int, default=12,
+                        help='循环出现的不同训练日（肌群组合）数')
+    args = parser.parse_args()
+    app = QApplication(sys.argv)  # noqa: F841
+
+    exercises = sorted(muscle_map)
+    days = [
+        set(muscle_map[exercises[i % len(exercises)]]) |
+        set(muscle_map[exercises[(i * 7 + 3) % len(exercises)]])
+        for i in range(args.days)
+    ]
+    clicks = [days[i % len(days)] for i in range(args.clicks)]
+
+    start = time.perf_counter()
+    for muscles in clicks[:20]:
+        legacy_render(muscles)
+    legacy = (time.perf_counter() - start) / 20
+
+    compositor = MuscleCompositor(IMAGE_DIR, MASK_DIR)
+    start = time.perf_counter()
+    compositor.render(())
+    load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for muscles in days:
+        layers = {muscle: (1.0, None) for muscle in muscles}
+        compositor._compose("front", layers)
+        compositor._compose("back", layers)
+    miss = (time.perf_counter() - start) / len(days)
+
+    names = sorted(compositor.muscles("front") | compositor.muscles("back"))
+    heat = []
+    for count in (1, len(names) // 2, len(names)):
+        layers = {
+            name: compositor._heat_layer((i + 1) / count)
+            for i, name in enumerate(names[:count])
+        }
+        start = time.perf_counter()
+        for _ in range(20):
+            compositor._compose("front", layers)
+            compositor._compose("back", layers)
+        heat.append((count, (time.perf_counter() - start) / 20))
+
+    start = time.perf_counter()
+    for muscles in clicks:
+        compositor.render(muscles)
+    per_click = (time.perf_counter() - start) / len(clicks)
+
+    print(f"legacy redraw          {legacy * 1e3:>9.2f} ms")
+    print(f"compositor first load  {load * 1e3:>9.2f} ms (once)")
+    print(f"compositor cache miss  {miss * 1e3:>9.3f} ms")
+    print(f"compositor per click   {per_click * 1e3:>9.3f} ms "
+          f"({legacy / per_click:.0f}x faster)")
+    for count, elapsed in heat:
+        print(f"heat map, {count:>2} muscles   {elapsed * 1e3:>9.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""并发登录吞吐量：逐个同步登录 vs login_async（线程池）vs 进程池计算哈希
+
+用法: python benchmarks/bench_parallel_login.py --logins 64 --rounds 29000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor, wait
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_interface import LiteDataManager  # noqa
+
+USERS = 8
+
+
+def run_sync(manager, logins):
+    for i in range(logins):
+        manager.login(f'user{i % USERS}', 'password', bind=False)
+
+
+def run_async(manager, logins):
+    futures = [
+        manager.login_async(f'user{i % USERS}', 'password', bind=False)
+        for i in range(logins)
+    ]
+    done, _ = wait(futures)
+    for future in done:
+        future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=64)
+    parser.add_argument('--rounds', type=int, default=29000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"cpus: {os.cpu_count()}, rounds: {args.rounds}")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'login.db')
+        setup = LiteDataManager(db_path, password_rounds=args.rounds)
+        for i in range(USERS):
+            setup.register(f'user{i}', 'password')
+        setup.close()
+
+        with ProcessPoolExecutor() as processes:
+            cases = [
+                ('sync', {}, run_sync),
+                ('async threads', {}, run_async),
+                ('async + process pool', {'hash_executor': processes},
+                 run_async),
+            ]
+            for name, options, run in cases:
+                manager = LiteDataManager(
+                    db_path, password_rounds=args.rounds, **options)
+                start = time.perf_counter()
+                run(manager, args.logins)
+                elapsed = time.perf_counter() - start
+                manager.close()
+                print(f"{name:<22}{args.logins / elapsed:>10.1f} logins/s")
+
+
+if __name__ == '__main__':
+    main()
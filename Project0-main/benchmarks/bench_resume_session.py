@@ -0,0 +1,65 @@
+"""启动时恢复登录的耗时：密码登录（PBKDF2）vs “记住我”令牌 resume_session
+
+用法: python benchmarks/bench_resume_session.py --resumes 10000
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_interface import LiteDataManager  # noqa
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--resumes', type=int, default=10000)
+    parser.add_argument('--tokens', type=int, default=1000,
+                        help='sessions 表中的令牌数')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'resume.db')
+        manager = LiteDataManager(db_path)
+        manager.register('alice', 'password')
+
+        start = time.perf_counter()
+        for _ in range(args.logins):
+            session = manager.login('alice', 'password', bind=False)
+        login = (time.perf_counter() - start) / args.logins
+
+        tokens = [manager.issue_remember_token(session)
+                  for _ in range(args.tokens)]
+        start = time.perf_counter()
+        for i in range(args.resumes):
+            resumed = manager.resume_session(
+                tokens[i % len(tokens)], bind=False)
+            manager._sessions.pop(resumed.token)
+        resume = (time.perf_counter() - start) / args.resumes
+
+        try:
+            manager.resume_session(tokens[0][:-1] + '?')
+        except PermissionError:
+            pass
+        else:
+            raise AssertionError('tampered token accepted')
+
+        manager.logout(session)
+        manager.close()
+        with sqlite3.connect(db_path) as conn:
+            remaining = conn.execute(
+                'SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    print(f"password login   {login * 1e3:>10.2f} ms")
+    print(f"resume_session   {resume * 1e6:>10.1f} us "
+          f"({login / resume:.0f}x faster)")
+    print(f"tokens left after logout: {remaining}")
+
+
+if __name__ == '__main__':
+    main()
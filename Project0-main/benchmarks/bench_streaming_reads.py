@@ -0,0 +1,84 @@
+"""全量读取训练历史时的峰值内存：一次性列表 vs 流式迭代
+
+用法: python benchmarks/bench_streaming_reads.py --sizes 1000 10000 50000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_interface import LiteDataManager, TrainingInfo  # noqa
+
+EXERCISES = ['深蹲', '硬拉', '卧推', '引体向上']
+
+
+def populate(manager, days):
+    first = date(1900, 1, 1)
+    manager.save_training_records_many(
+        TrainingInfo(
+            (first + timedelta(days=i)).strftime('%Y%m%d'),
+            EXERCISES, [3, 3, 4, 2])
+        for i in range(days)
+    )
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, elapsed, peak / 1024
+
+
+def export_list(manager):
+    # 模拟导出：逐条处理，但先拿到完整列表
+    total = 0
+    for record in manager.get_training_records_between():
+        total += sum(record.n_group)
+    return total
+
+
+def export_stream(manager):
+    total = 0
+    for record in manager.iter_training_records():
+        total += sum(record.n_group)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 50000])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{'days':>8}{'list peak KiB':>16}{'stream peak KiB':>18}"
+          f"{'list s':>9}{'stream s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for days in args.sizes:
+            manager = LiteDataManager(
+                os.path.join(tmp, f'{days}.db'), cache_bytes=0)
+            manager.register('bench', 'password')
+            manager.login('bench', 'password')
+            populate(manager, days)
+
+            list_total, list_s, list_peak = measure(
+                lambda: export_list(manager))
+            stream_total, stream_s, stream_peak = measure(
+                lambda: export_stream(manager))
+            assert list_total == stream_total
+            manager.close()
+            print(f"{days:>8}{list_peak:>16.0f}{stream_peak:>18.0f}"
+                  f"{list_s:>9.2f}{stream_s:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
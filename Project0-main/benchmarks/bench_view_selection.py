@@ -0,0 +1,117 @@
+"""历史页选中日期的耗时随训练天数的变化，以及增量更新与重新加载结果是否一致
+
+对不同训练天数的用户，用 TrainingHistory 在已加载的月份中反复选中日期，测量平均耗时
+（应与天数无关）。随后模拟保存新记录（包括同一天重复保存同一动作），把增量合并的结果
+与重新从数据库加载的结果逐日比较；最后逐月浏览全部历史，检查已加载的月份数不超过上限、
+被淘汰的月份再次访问时内容不变。任一检查失败时以非零状态退出。
+
+用法: python benchmarks/bench_view_selection.py --sizes 100 1000 5000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+from datetime import date, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_interface import LiteDataManager, TrainingInfo  # noqa
+from ui.history_model import TrainingHistory  # noqa
+from ui.view_page import muscle_map  # noqa
+
+EXERCISES = ['深蹲', '硬拉', '杠铃卧推', '引体向上']
+
+
+def day_str(i):
+    return (date(2000, 1, 1) + timedelta(days=i)).strftime('%Y%m%d')
+
+
+def open_manager(days):
+    manager = LiteDataManager(password_rounds=1000)
+    manager.register('bench', 'password')
+    manager.login('bench', 'password')
+    manager.save_training_records_many(
+        TrainingInfo(day_str(i), EXERCISES, [3, 3, 4, 2]) for i in range(days))
+    return manager
+
+
+def check_incremental(manager, days):
+    """保存新记录后增量合并，与重新加载逐日比较，返回不一致的日期"""
+    history = TrainingHistory(manager, muscle_map)
+    touched = [day_str(days - 1), day_str(days - 1), day_str(days + 3)]
+    saves = [
+        TrainingInfo(touched[0], ['深蹲'], [2]),
+        TrainingInfo(touched[1], ['深蹲', '卷腹', '深蹲'], [1, 4, 5]),
+        TrainingInfo(touched[2], ['卷腹'], [3]),
+    ]
+    for info in saves:
+        history.day(info.timestamp)  # 先加载所在月份，之后的保存走增量合并
+    for info in saves:
+        manager.save_training_record(info)
+        history.add_record(info)
+
+    fresh = TrainingHistory(manager, muscle_map)
+    mismatched = []
+    for date_str in touched:
+        got, want = history.day(date_str), fresh.day(date_str)
+        if (got and (got.text, got.muscles)) != (want and (want.text, want.muscles)):
+            mismatched.append(date_str)
+    return mismatched
+
+
+def check_eviction(manager, days, max_months=6):
+    """逐月浏览全部历史，返回发现的问题列表"""
+    history = TrainingHistory(manager, muscle_map, max_months)
+    first = history.day(day_str(0))
+    first_text = first and first.text
+    problems = []
+    for i in range(0, days, 28):
+        history.day(day_str(i))
+        if len(history._months) > max_months:
+            problems.append(f"{len(history._months)} months loaded")
+            break
+    if history.day(day_str(days - 1)) is None:
+        problems.append("visible month missing")
+    again = history.day(day_str(0))
+    if (again and again.text) != first_text:
+        problems.append("evicted month reloaded differently")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--clicks', type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    failed = False
+    print(f"{'days':>8}{'select (us)':>14}")
+    for days in args.sizes:
+        manager = open_manager(days)
+        history = TrainingHistory(manager, muscle_map)
+        recent = [day_str(days - 1 - i % 28) for i in range(args.clicks)]
+        for date_str in recent:
+            history.day(date_str)  # 预先加载涉及的月份
+        start = time.perf_counter()
+        for date_str in recent:
+            history.day(date_str)
+        per_click = (time.perf_counter() - start) / len(recent)
+        print(f"{days:>8}{per_click * 1e6:>14.2f}")
+
+        mismatched = check_incremental(manager, days)
+        if mismatched:
+            print(f"  FAIL: incremental update differs from reload on {mismatched}")
+            failed = True
+        problems = check_eviction(manager, days)
+        if problems:
+            print(f"  FAIL: month eviction: {problems}")
+            failed = True
+        manager.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""年度热力图的生成耗时：逐月翻日历逐格绘制 vs 多年数据一次栅格化为 QImage
+
+内存数据库中写入若干年每隔一天的训练记录，分别测量：
+- 旧方式：TrainingCalendar 逐月翻页并重绘（看完这些年需要的总耗时）
+- 新方式：一次查询这些年的每日总组数、转为按日数组、栅格化
+无界面环境下以 offscreen 平台运行。
+
+用法: python benchmarks/bench_year_heatmap.py --years 10
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from PyQt5.QtCore import QDate  # noqa
+from PyQt5.QtWidgets import QApplication  # noqa
+from data_interface import LiteDataManager, TrainingInfo  # noqa
+from ui.view_page import TrainingCalendar  # noqa
+from ui.year_heatmap import YearHeatMap, daily_array  # noqa
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    app = QApplication(sys.argv)
+
+    manager = LiteDataManager(password_rounds=1000)
+    manager.register('bench', 'password')
+    manager.login('bench', 'password')
+    last_year = QDate.currentDate().year()
+    first_year = last_year - args.years + 1
+    day = QDate(first_year, 1, 1)
+    while day <= QDate.currentDate():
+        manager.save_training_record(
+            TrainingInfo(day.toString("yyyyMMdd"), ['深蹲'], [day.day() % 5 + 1]))
+        day = day.addDays(2)
+
+    calendar = TrainingCalendar()
+    calendar.show()
+    start = time.perf_counter()
+    for year in range(first_year, last_year + 1):
+        for month in range(1, 13):
+            first = QDate(year, month, 1)
+            calendar.set_month_totals(year, month, manager.get_daily_totals(
+                first.toString("yyyyMMdd"),
+                first.addDays(first.daysInMonth() - 1).toString("yyyyMMdd")))
+            calendar.setCurrentPage(year, month)
+            calendar.repaint()
+    app.processEvents()
+    paging = time.perf_counter() - start
+
+    heat_map = YearHeatMap()
+    start = time.perf_counter()
+    for i in range(args.repeat):
+        totals = daily_array(first_year, args.years, manager.get_daily_totals(
+            f"{first_year}0101", f"{last_year}1231"))
+        # 每轮数据略有不同，避免 set_totals 因数据未变而跳过
+        totals[0] = i
+        heat_map.set_totals(first_year, args.years, totals)
+    heat = (time.perf_counter() - start) / args.repeat
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        heat_map.repaint()
+    blit = (time.perf_counter() - start) / args.repeat
+
+    months = args.years * 12
+    print(f"calendar, {months} month pages  {paging * 1e3:>9.2f} ms")
+    print(f"heat map query + rasterize  {heat * 1e3:>9.2f} ms")
+    print(f"heat map repaint (blit)     {blit * 1e3:>9.3f} ms")
+    manager.close()
+
+
+if __name__ == '__main__':
+    main()
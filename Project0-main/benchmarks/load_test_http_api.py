@@ -0,0 +1,199 @@
+"""HTTP 接口负载测试
+
+默认在子进程中对临时数据库启动 ``python -m data_interface.http_api``，也可用 --url
+指向已经运行的服务。每个客户端线程使用一个 keep-alive 连接，注册并登录一个用户后
+按比例混合发送保存训练、翻页读取历史和读取日历汇总的请求；读请求带上次的 ETag，
+统计吞吐量、延迟分位数、304 比例与 gzip 节省的字节数。每个客户端还会提交两个日历上
+不存在的日期（2 月 30 日、13 月），应得到 400；最后发送一个超长请求头，应得到 431。
+出现 5xx、数据不一致、无效日期或超长请求头未被拒绝时以非零状态退出。
+
+用法: python benchmarks/load_test_http_api.py --clients 16 --requests 500
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from collections import Counter
+from urllib.parse import urlsplit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+class Client:
+    def __init__(self, host, port):
+        self.conn = http.client.HTTPConnection(host, port, timeout=30)
+        self.token = None
+        self.etags = {}
+
+    def request(self, method, path, payload=None, conditional=False):
+        headers = {'Accept-Encoding': 'gzip'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if conditional and path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            headers['Content-Type'] = 'application/json'
+        start = time.perf_counter()
+        self.conn.request(method, path, body, headers)
+        response = self.conn.getresponse()
+        raw = response.read()
+        latency = time.perf_counter() - start
+        data = raw
+        if response.getheader('Content-Encoding') == 'gzip':
+            data = gzip.decompress(raw)
+        if response.getheader('ETag'):
+            self.etags[path] = response.getheader('ETag')
+        return response.status, data, len(raw), len(data), latency
+
+
+def run_client(host, port, index, requests, stats, lock):
+    client = Client(host, port)
+    username = f'load{index}'
+    local = Counter()
+    latencies = []
+    client.request('POST', '/api/register',
+                   {'username': username, 'password': 'password'})
+    status, data, *_ = client.request(
+        'POST', '/api/login', {'username': username, 'password': 'password'})
+    if status != 200:
+        raise RuntimeError(f'{username}: login failed {status} {data!r}')
+    client.token = json.loads(data)['token']
+    # 日历上不存在的日期应被拒绝 (400)，不能写入数据库
+    for day in ('20250230', '20261399'):
+        status, *_ = client.request('POST', '/api/training', {
+            'timestamp': day, 'exercises': ['深蹲'], 'n_group': [1]})
+        local[f'invalid date {status}'] += 1
+
+    saved = 0
+    rng = random.Random(index)
+    for i in range(requests):
+        roll = rng.random()
+        if roll < 0.2:
+            day = 20240101 + saved % 28 + (saved // 28) * 100
+            saved += 1
+            result = client.request('POST', '/api/training', {
+                'timestamp': str(day), 'exercises': ['深蹲', '卧推'],
+                'n_group': [3, 4]})
+            kind = 'save'
+        elif roll < 0.6:
+            result = client.request(
+                'GET', '/api/training?page_size=50', conditional=True)
+            kind = 'history'
+        else:
+            result = client.request(
+                'GET', '/api/calendar?start=20240101&end=20241231',
+                conditional=True)
+            kind = 'calendar'
+        status, _, wire, plain, latency = result
+        latencies.append(latency)
+        local[f'{kind} {status}'] += 1
+        local['wire bytes'] += wire
+        local['json bytes'] += plain
+
+    status, data, *_ = client.request('GET', '/api/exercise-totals')
+    totals = json.loads(data)
+    if totals.get('深蹲', 0) != 3 * saved or totals.get('卧推', 0) != 4 * saved:
+        local['inconsistent users'] += 1
+    status, *_ = client.request('POST', '/api/logout')
+    status, *_ = client.request('GET', '/api/calendar')
+    local[f'after logout {status}'] += 1
+    client.conn.close()
+    with lock:
+        stats['counts'].update(local)
+        stats['latencies'].extend(latencies)
+
+
+def oversized_header_status(host, port):
+    """发送一个超过服务端行长上限的请求头，返回响应状态码（连接被直接断开时为 None）"""
+    with socket.create_connection((host, port), timeout=30) as sock:
+        sock.sendall(b'GET /api/health HTTP/1.1\r\nX-Padding: ' +
+                     b'a' * 100 * 1024 + b'\r\n\r\n')
+        status_line = sock.makefile('rb').readline().split()
+    return int(status_line[1]) if len(status_line) > 1 else None
+
+
+def start_server(db_path):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'data_interface.http_api', db_path,
+         '--port', '0'],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith('Serving on '):
+        process.kill()
+        raise RuntimeError(f'server failed to start: {line!r}')
+    return process, line.split()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--url', help='已经运行的服务地址，默认启动临时服务')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process = None
+        url = args.url
+        if url is None:
+            process, url = start_server(os.path.join(tmp, 'http.db'))
+        try:
+            parts = urlsplit(url)
+            stats = {'counts': Counter(), 'latencies': []}
+            lock = threading.Lock()
+            threads = [
+                threading.Thread(target=run_client, args=(
+                    parts.hostname, parts.port, index, args.requests,
+                    stats, lock))
+                for index in range(args.clients)
+            ]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            status = oversized_header_status(parts.hostname, parts.port)
+            stats['counts'][f'oversized header {status}'] += 1
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    counts, latencies = stats['counts'], sorted(stats['latencies'])
+    total = len(latencies)
+    if not total:
+        sys.exit('no requests completed')
+    print(f"{total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    print(f"latency p50 {latencies[total // 2] * 1e3:.2f} ms, "
+          f"p99 {latencies[int(total * 0.99)] * 1e3:.2f} ms")
+    not_modified = sum(n for k, n in counts.items() if k.endswith(' 304'))
+    reads = sum(n for k, n in counts.items()
+                if k.startswith(('history', 'calendar')))
+    print(f"304 for {not_modified}/{reads} reads; "
+          f"{counts['wire bytes'] / 1024:.0f} KiB on the wire for "
+          f"{counts['json bytes'] / 1024:.0f} KiB of JSON")
+    for key in sorted(counts):
+        if not key.endswith('bytes'):
+            print(f"  {key:<24}{counts[key]:>8}")
+    errors = sum(n for k, n in counts.items()
+                 if k.rpartition(' ')[2].startswith('5'))
+    if errors or counts['inconsistent users'] or \
+            counts['after logout 401'] != args.clients or \
+            counts['invalid date 400'] != 2 * args.clients or \
+            counts['oversized header 431'] != 1:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""多进程读写同一数据库文件的压力测试
+
+启动 N 个写进程（训练记录与身体数据）和 M 个读进程，统计吞吐量与错误数，
+分别在默认回滚日志模式和 WAL 并发模式下运行。
+
+用法: python benchmarks/stress_concurrency.py --writers 4 --readers 4 --duration 5
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_interface import LiteDataManager, TrainingInfo, BodyStats  # noqa
+
+
+def make_manager(db_path, wal):
+    # 重试次数为 0 时暴露原始的 database is locked 错误
+    return LiteDataManager(
+        db_path,
+        pool_size=1,
+        wal=wal,
+        busy_timeout=0.05 if not wal else 5.0,
+        write_retries=8 if wal else 0
+    )
+
+
+def writer(db_path, wal, duration, index, results):
+    manager = make_manager(db_path, wal)
+    manager.login(f'user{index}', 'password')
+    ops = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        day = str(20240101 + ops % 28)
+        try:
+            if ops % 2:
+                manager.save_body_stats(BodyStats(day, 175.0, 70.0 + ops % 5))
+            else:
+                manager.save_training_record(
+                    TrainingInfo(day, ['深蹲', '硬拉'], [3, 2]))
+        except Exception:
+            errors += 1
+        ops += 1
+    results.put(('writer', ops, errors, manager.busy_retries))
+    manager.close()
+
+
+def reader(db_path, wal, duration, index, results):
+    manager = make_manager(db_path, wal)
+    manager.login(f'user{index}', 'password')
+    ops = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            manager.get_training_records()
+            manager.get_body_stats_history()
+        except Exception:
+            errors += 1
+        ops += 1
+    results.put(('reader', ops, errors, 0))
+    manager.close()
+
+
+def run(wal, writers, readers, duration):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stress.db')
+        setup = LiteDataManager(db_path, wal=wal)
+        for i in range(max(writers, readers)):
+            setup.register(f'user{i}', 'password')
+        setup.close()
+
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(
+                target=writer, args=(db_path, wal, duration, i, results))
+            for i in range(writers)
+        ] + [
+            multiprocessing.Process(
+                target=reader, args=(db_path, wal, duration, i, results))
+            for i in range(readers)
+        ]
+        for p in procs:
+            p.start()
+        rows = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    summary = {}
+    for kind, ops, errors, retries in rows:
+        total = summary.setdefault(kind, [0, 0, 0])
+        total[0] += ops
+        total[1] += errors
+        total[2] += retries
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+    # 错误已计入统计，不再逐条输出日志
+    logging.disable(logging.ERROR)
+
+    print(f"{'mode':<10}{'role':<8}{'ops/s':>10}{'errors':>9}{'retries':>9}")
+    for wal in (False, True):
+        summary = run(wal, args.writers, args.readers, args.duration)
+        for kind, (ops, errors, retries) in sorted(summary.items()):
+            print(f"{'wal' if wal else 'rollback':<10}{kind:<8}"
+                  f"{ops / args.duration:>10.1f}{errors:>9}{retries:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""一个进程内多个用户共享同一个 LiteDataManager 的压力测试
+
+每个线程登录一个不同的用户（bind=False），用自己的会话交替保存和读取训练记录，
+结束后检查每个用户的总组数只包含自己的写入；另外检查修改查询结果不会影响缓存、
+clear_cache() 之后能读到另一个实例写入的数据。不一致时以非零状态退出。
+
+用法: python benchmarks/stress_multi_session.py --users 16 --saves 200 --pool-size 8
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_interface import LiteDataManager, TrainingInfo  # noqa
+
+
+def client(manager, index, saves, errors):
+    session = manager.login(f'user{index}', 'password', bind=False)
+    try:
+        for i in range(saves):
+            day = str(20240101 + i % 28)
+            manager.save_training_record(
+                TrainingInfo(day, ['深蹲'], [index + 1]), session=session)
+            manager.get_daily_totals(day, day, session=session)
+    except Exception as e:
+        errors.append(f'user{index}: {e!r}')
+    finally:
+        manager.logout(session)
+
+
+def check_cache(manager, db_path):
+    """返回发现的问题列表"""
+    problems = []
+    session = manager.login('user0', 'password', bind=False)
+    records = manager.get_training_records(session=session)
+    records[0].exercises.append('篡改')
+    records[0].n_group.append(99)
+    if manager.get_training_records(session=session)[0].exercises != ['深蹲']:
+        problems.append('cached record was modified through a returned copy')
+
+    other = LiteDataManager(db_path, wal=True, cache_bytes=0)
+    other_session = other.login('user0', 'password', bind=False)
+    before = manager.get_daily_totals('20250101', '20250101', session=session)
+    other.save_training_record(
+        TrainingInfo('20250101', ['硬拉'], [5]), session=other_session)
+    other.logout(other_session)
+    other.close()
+    manager.clear_cache()
+    after = manager.get_daily_totals('20250101', '20250101', session=session)
+    if before != {} or after != {'20250101': 5}:
+        problems.append(
+            f'write from another instance not visible: {before} -> {after}')
+    manager.logout(session)
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=16)
+    parser.add_argument('--saves', type=int, default=200)
+    parser.add_argument('--pool-size', type=int, default=8)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'sessions.db')
+        manager = LiteDataManager(
+            db_path,
+            pool_size=args.pool_size, wal=True, write_retries=20,
+            cache_bytes=4 * 1024 * 1024)
+        for index in range(args.users):
+            manager.register(f'user{index}', 'password')
+
+        errors = []
+        threads = [
+            threading.Thread(
+                target=client, args=(manager, index, args.saves, errors))
+            for index in range(args.users)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        ok = not errors
+        for index in range(args.users):
+            session = manager.login(f'user{index}', 'password', bind=False)
+            total = sum(manager.get_exercise_totals(session=session).values())
+            expected = args.saves * (index + 1)
+            if total != expected:
+                ok = False
+                print(f'user{index}: expected {expected}, got {total}')
+        problems = check_cache(manager, db_path)
+        manager.close()
+
+    ops = args.users * args.saves * 2
+    print(f"{args.users} users, {ops} ops in {elapsed:.2f}s "
+          f"({ops / elapsed:.0f} ops/s), cache {manager.cache_stats()}")
+    for error in errors + problems:
+        print(error)
+    if not ok or problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""并发保存同一 (user_id, timestamp) 的训练记录，检查最终组数没有丢失
+
+多个进程、每个进程多个线程同时对同一天调用 save_training_record，
+结束后比较数据库中的总组数与期望值，不一致时以非零状态退出。
+
+用法: python benchmarks/stress_parallel_saves.py --processes 4 --threads 4 --saves 200
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_interface import LiteDataManager, TrainingInfo  # noqa
+
+DAY = '20250601'
+EXERCISES = ['深蹲', '硬拉', '卧推']
+N_GROUP = [1, 2, 3]
+
+
+def worker(db_path, threads, saves):
+    manager = LiteDataManager(db_path, pool_size=threads, wal=True,
+                              write_retries=20)
+    manager.login('stress', 'password')
+
+    def save_many():
+        for _ in range(saves):
+            manager.save_training_record(TrainingInfo(DAY, EXERCISES, N_GROUP))
+
+    pool = [threading.Thread(target=save_many) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--saves', type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'saves.db')
+        manager = LiteDataManager(db_path, wal=True)
+        manager.register('stress', 'password')
+        manager.login('stress', 'password')
+
+        start = time.perf_counter()
+        procs = [
+            multiprocessing.Process(
+                target=worker, args=(db_path, args.threads, args.saves))
+            for _ in range(args.processes)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        totals = manager.get_exercise_totals(DAY, DAY)
+        manager.close()
+
+    saves = args.processes * args.threads * args.saves
+    print(f"{saves} saves in {elapsed:.2f}s ({saves / elapsed:.0f} saves/s)")
+    failed = False
+    for exercise, n_group in zip(EXERCISES, N_GROUP):
+        expected = saves * n_group
+        actual = totals.get(exercise, 0)
+        status = 'ok' if actual == expected else 'LOST UPDATES'
+        failed |= actual != expected
+        print(f"  {exercise}: expected {expected}, got {actual} [{status}]")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,6 @@
-from .datamanager import LiteDataManager, TrainingInfo, BodyStats  # noqa
+from .datamanager import LiteDataManager, TrainingInfo, BodyStats, IngestReport, Session  # noqa
+from .datamanager import to_day_key, from_day_key  # noqa
+from .cache import HistoryCache  # noqa
+from .pool import ConnectionPool, PoolTimeoutError  # noqa
+from .write_queue import GroupCommitQueue  # noqa
+from .async_manager import AsyncLiteDataManager, QueueFullError  # noqa
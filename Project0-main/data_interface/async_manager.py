@@ -0,0 +1,197 @@
+import asyncio
+import functools
+import logging
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .datamanager import LiteDataManager, Session
+
+
+class QueueFullError(RuntimeError):
+    """等待队列已满，且在 queue_timeout 内没有空位"""
+
+
+class _Lane:
+    """一条执行通道：固定线程数的执行器加上限制排队数的信号量
+
+    workers 为 0 时没有自己的执行器，只限制排队数（操作由别处的线程池执行）
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int) -> None:
+        self.name: str = name
+        self.executor: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=name) if workers else None
+        self.slots = asyncio.Semaphore(max_pending)
+
+
+def _offloaded(lane: str, name: str):
+    """把 LiteDataManager 的同步方法包装为在指定通道上执行的协程方法"""
+    method = getattr(LiteDataManager, name)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        return await self._submit(
+            self._lanes[lane], method, self.manager, *args, **kwargs)
+    return wrapper
+
+
+def _offloaded_save(name: str):
+    """单条保存：管理器启用组提交时直接进入写队列，不占用写线程"""
+    method = getattr(LiteDataManager, name)
+    submit = getattr(LiteDataManager, f'{name}_async')
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        lane = self._lanes['write']
+        if self.manager._write_queue is None:
+            return await self._submit(
+                lane, method, self.manager, *args, **kwargs)
+        return await self._enqueue(
+            lane, lambda: submit(self.manager, *args, **kwargs))
+    return wrapper
+
+
+class AsyncLiteDataManager:
+    """LiteDataManager 的 asyncio 外观，供异步服务在事件循环中使用
+
+    - 写操作全部提交给唯一的写线程，按提交顺序串行执行，不会在库内互相争锁；
+      管理器启用组提交时，单条保存改为直接进入其写队列，由写队列批量提交
+    - 读操作在读线程池中并行执行，线程数默认比连接池少一个，给写线程留一个连接
+    - login / register 使用管理器自带的认证线程池，PBKDF2 不会占住写线程；
+      它们同样计入一条有上限的认证通道，登录洪峰时与读写一样等待或抛出 QueueFullError
+    - 每条通道的排队数有上限；队列满时调用方等待空位（背压），
+      设置 queue_timeout 后等待超时抛出 QueueFullError，为 0 时立即抛出
+    - 取消尚在排队的调用时，对应操作不会执行；已经开始执行的操作会完成，结果被丢弃
+
+    所有协程必须在同一个事件循环中调用
+    """
+
+    def __init__(
+        self,
+        manager: LiteDataManager,
+        read_workers: Optional[int] = None,
+        max_pending_reads: int = 64,
+        max_pending_writes: int = 256,
+        max_pending_auth: int = 32,
+        queue_timeout: Optional[float] = None,
+        owns_manager: bool = False
+    ) -> None:
+        """
+        read_workers: 读线程数，默认为连接池大小减一
+        max_pending_reads / max_pending_writes / max_pending_auth:
+            每条通道排队加执行中的调用上限
+        queue_timeout: 队列满时等待空位的秒数，None 为一直等待
+        owns_manager: close 时是否一并关闭 manager
+        """
+        self.manager: LiteDataManager = manager
+        self.queue_timeout: Optional[float] = queue_timeout
+        self.owns_manager: bool = owns_manager
+        self.logger: logging.Logger = logging.getLogger(
+            self.__class__.__name__)
+        if read_workers is None:
+            read_workers = max(1, manager._pool.max_size - 1)
+        self._lanes = {
+            'read': _Lane('db-read', read_workers, max_pending_reads),
+            'write': _Lane('db-write', 1, max_pending_writes),
+            'auth': _Lane('db-auth', 0, max_pending_auth),
+        }
+        self._closed: bool = False
+
+    @classmethod
+    def open(cls, db_path: str, **kwargs: Any) -> "AsyncLiteDataManager":
+        """创建并持有一个 LiteDataManager，其余参数传给 LiteDataManager"""
+        return cls(LiteDataManager(db_path, **kwargs), owns_manager=True)
+
+    async def __aenter__(self) -> "AsyncLiteDataManager":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def _acquire(self, lane: _Lane) -> None:
+        if not lane.slots.locked():
+            await lane.slots.acquire()
+            return
+        if self.queue_timeout == 0:
+            raise QueueFullError(f"{lane.name} 队列已满")
+        try:
+            await asyncio.wait_for(lane.slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise QueueFullError(f"{lane.name} 队列已满") from None
+
+    async def _submit(
+        self, lane: _Lane, fn: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        return await self._enqueue(
+            lane, lambda: lane.executor.submit(fn, *args, **kwargs))
+
+    async def _enqueue(
+        self, lane: _Lane, start: Callable[[], "Future[Any]"]
+    ) -> Any:
+        """占用通道的一个名额，start 返回的 Future 结束时归还"""
+        if self._closed:
+            raise RuntimeError("AsyncLiteDataManager 已关闭")
+        await self._acquire(lane)
+        loop = asyncio.get_running_loop()
+        try:
+            future = start()
+        except BaseException:
+            lane.slots.release()
+            raise
+        # 名额在操作真正结束（或排队中被取消）时才归还，执行中的调用也计入上限
+        future.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(lane.slots.release))
+        # 等待方被取消时 wrap_future 会取消 future，尚未开始的操作因此不会执行
+        return await asyncio.wrap_future(future)
+
+    async def login(
+        self, username: str, password: str, bind: bool = False
+    ) -> Session:
+        """异步登录；服务端通常同时服务多个用户，默认不绑定为默认会话"""
+        return await self._enqueue(
+            self._lanes['auth'],
+            lambda: self.manager.login_async(username, password, bind))
+
+    async def register(self, username: str, password: str) -> bool:
+        return await self._enqueue(
+            self._lanes['auth'],
+            lambda: self.manager.register_async(username, password))
+
+    resume_session = _offloaded('read', 'resume_session')
+    logout = _offloaded('write', 'logout')
+    issue_remember_token = _offloaded('write', 'issue_remember_token')
+
+    save_training_record = _offloaded_save('save_training_record')
+    save_training_records_many = _offloaded(
+        'write', 'save_training_records_many')
+    save_body_stats = _offloaded_save('save_body_stats')
+    save_body_stats_many = _offloaded('write', 'save_body_stats_many')
+
+    get_training_records = _offloaded('read', 'get_training_records')
+    get_training_records_between = _offloaded(
+        'read', 'get_training_records_between')
+    get_training_records_page = _offloaded(
+        'read', 'get_training_records_page')
+    get_exercise_totals = _offloaded('read', 'get_exercise_totals')
+    get_daily_totals = _offloaded('read', 'get_daily_totals')
+    get_body_stats_history = _offloaded('read', 'get_body_stats_history')
+    get_body_stats_between = _offloaded('read', 'get_body_stats_between')
+    get_body_stats_page = _offloaded('read', 'get_body_stats_page')
+    get_latest_body_stats = _offloaded('read', 'get_latest_body_stats')
+
+    async def close(self) -> None:
+        """不再接受新调用，等已提交的写操作全部完成后关闭"""
+        if self._closed:
+            return
+        self._closed = True
+
+        def shutdown() -> None:
+            for lane in self._lanes.values():
+                if lane.executor is not None:
+                    lane.executor.shutdown(wait=True)
+            if self.owns_manager:
+                self.manager.close()
+
+        await asyncio.get_running_loop().run_in_executor(None, shutdown)
+        self.logger.info("Closed AsyncLiteDataManager")
@@ -0,0 +1,149 @@
+import threading
+
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass, replace
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+def estimate_size(value: Any) -> int:
+    """粗略估计查询结果占用的字节数，用于内存预算"""
+    if value is None or isinstance(value, (int, float, bool)):
+        return 32
+    if isinstance(value, str):
+        return 50 + 2 * len(value)
+    if isinstance(value, (list, tuple)):
+        return 64 + sum(8 + estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return 240 + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if hasattr(value, '__dict__'):
+        return 160 + sum(estimate_size(v) for v in vars(value).values())
+    return 64
+
+
+def _copy(value: Any) -> Any:
+    """返回结果的副本，连同其中的记录对象和列表一起复制
+
+    调用方修改结果（如排序、向 TrainingInfo.exercises 追加动作）不会影响缓存
+    """
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return tuple(_copy(item) for item in value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return replace(value, **{
+            f.name: _copy(getattr(value, f.name))
+            for f in fields(value) if f.init
+        })
+    return value
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    user_id: int
+    kind: str
+    day_range: Optional[Tuple[Optional[int], Optional[int]]]
+
+
+class HistoryCache:
+    """按用户与查询范围缓存历史查询结果
+
+    - 按最近最少使用淘汰，总大小不超过 max_bytes
+    - 每个条目记录所属用户、数据类型（training / body）和覆盖的日期范围，
+      写入某一天时只失效覆盖该日期的条目；day_range 为 None 表示结果依赖全部历史
+    - 失效时递增 (用户, 类型) 的版本号，读取期间发生写入的结果不会被缓存
+    """
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024) -> None:
+        self.max_bytes: int = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        self._bytes: int = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._generations: Dict[Tuple[int, str], int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """返回 (是否命中, 结果副本)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, _copy(entry.value)
+
+    def generation(self, user_id: int, kind: str) -> int:
+        """读取数据库之前先取版本号，写入期间产生的旧结果将被丢弃"""
+        with self._lock:
+            return self._generations.get((user_id, kind), 0)
+
+    def put(
+        self,
+        key: Hashable,
+        value: Any,
+        user_id: int,
+        kind: str,
+        day_range: Optional[Tuple[Optional[int], Optional[int]]],
+        generation: int
+    ) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if self._generations.get((user_id, kind), 0) != generation:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = _Entry(
+                _copy(value), size, user_id, kind, day_range)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def invalidate(
+        self, user_id: int, kind: str, day: Optional[int] = None
+    ) -> int:
+        """失效某用户某类数据中覆盖 day 的条目，day 为 None 时全部失效"""
+        removed = 0
+        with self._lock:
+            key_pair = (user_id, kind)
+            self._generations[key_pair] = \
+                self._generations.get(key_pair, 0) + 1
+            for key, entry in list(self._entries.items()):
+                if entry.user_id != user_id or entry.kind != kind:
+                    continue
+                if day is not None and entry.day_range is not None:
+                    low, high = entry.day_range
+                    if (low is not None and day < low) or \
+                            (high is not None and day > high):
+                        continue
+                del self._entries[key]
+                self._bytes -= entry.size
+                removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            for key_pair in self._generations:
+                self._generations[key_pair] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """命中/未命中次数、条目数与估计占用字节数"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
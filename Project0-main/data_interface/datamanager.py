@@ -3,24 +3,82 @@ import sqlite3
 import json
 import logging
 import os
+import datetime
+import functools
+import hashlib
+import hmac
+import inspect
+import itertools
+import random
+import secrets
+import threading
+import time
 
 
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Optional, Dict, Any, Iterator, Tuple, List
+from typing import (
+    Optional, Dict, Any, Callable, Iterator, Iterable, Tuple, List, Sequence
+)
 from passlib.hash import pbkdf2_sha256
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
+
+from .cache import HistoryCache
+from .pool import ConnectionPool
+from .write_queue import GroupCommitQueue
 
 
 from dataclasses import dataclass, asdict
 from typing import List, Dict, Any
 import json
 
+
+def to_day_key(timestamp: Any) -> int:
+    """把 yyyyMMdd / yyyy-MM-dd 字符串或整数转换为整数日期键 yyyymmdd
+
+    必须是日历上存在的日期，如 20250230、20261399 会抛出 ValueError
+    """
+    if isinstance(timestamp, int):
+        day = timestamp
+    else:
+        text = str(timestamp).strip().replace('-', '')
+        if len(text) != 8 or not text.isdigit():
+            raise ValueError(f"无效的日期: {timestamp!r}")
+        day = int(text)
+    if not 10000101 <= day <= 99991231:
+        raise ValueError(f"无效的日期: {timestamp!r}")
+    try:
+        datetime.date(day // 10000, day // 100 % 100, day % 100)
+    except ValueError:
+        raise ValueError(f"无效的日期: {timestamp!r}") from None
+    return day
+
+
+def import_source_key(username: str, password_hash: str) -> str:
+    """外部账号的标识：由来源库中的用户名和（加盐的）密码哈希得到
+
+    与来源库文件所在的路径无关，移动或复制来源库后仍能续传
+    """
+    digest = hashlib.sha256(f'{username}\0{password_hash}'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def from_day_key(day: int) -> str:
+    """把整数日期键转换回 yyyyMMdd 字符串"""
+    return f'{int(day):08d}'
+
+
 @dataclass
 class TrainingInfo:
     timestamp: str
     exercises: List[str]  # 每个动作是一个字典
     n_group: List[int]                      # 总组数，整数
 
+    @property
+    def day_key(self) -> int:
+        """数据库中使用的整数日期键"""
+        return to_day_key(self.timestamp)
+
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
 
@@ -48,6 +106,11 @@ class BodyStats:
     body_fat: float = None
     bmr: float = None
 
+    @property
+    def day_key(self) -> int:
+        """数据库中使用的整数日期键"""
+        return to_day_key(self.timestamp)
+
     def to_dict(self) -> Dict[str, Any]:
         """序列化为字典格式"""
         return asdict(self)
@@ -90,84 +153,989 @@ class BodyStats:
         return cls.from_dict(json.loads(json_str))
 
 
+@dataclass
+class IngestReport:
+    """批量写入结果：新插入的行数与合并进已有行的行数"""
+    inserted: int = 0
+    merged: int = 0
+
+    def __iadd__(self, other: "IngestReport") -> "IngestReport":
+        self.inserted += other.inserted
+        self.merged += other.merged
+        return self
+
+
+@dataclass(frozen=True)
+class Session:
+    """一次登录会话，由 LiteDataManager.login 返回
+
+    多个用户共享同一个管理器时，把会话传给各数据方法的 session 参数；
+    登出后会话失效，再使用会抛出 PermissionError
+    """
+    user_id: int
+    username: str
+    token: str = field(default_factory=lambda: secrets.token_hex(16), repr=False)
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """把可迭代对象切分为固定大小的列表"""
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# 训练组数表：每个 (用户, 日期, 动作) 一行，day 为整数日期键 yyyymmdd
+_TRAINING_SETS_DDL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        exercise TEXT NOT NULL,
+        n_group INTEGER NOT NULL,
+        FOREIGN KEY(user_id) REFERENCES users(id),
+        UNIQUE(user_id, day, exercise)
+    )
+'''
+
+# 身体数据表（支持多记录），day 为整数日期键 yyyymmdd
+_BODY_STATS_DDL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        height REAL NOT NULL,
+        weight REAL NOT NULL,
+        body_fat REAL,
+        bmr REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id),
+        UNIQUE(user_id, day)
+    )
+'''
+
+# 每日训练总组数物化表，由 training_sets 上的触发器维护
+_DAILY_VOLUME_DDL = '''
+    CREATE TABLE IF NOT EXISTS daily_volume (
+        user_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        total_sets INTEGER NOT NULL,
+        PRIMARY KEY(user_id, day)
+    ) WITHOUT ROWID
+'''
+
+# 外部数据导入进度：每个来源账号（见 import_source_key）导入到的目标用户，
+# 以及已提交到的最后一个日期键（空字符串表示账号已建立、尚未导入数据）
+_IMPORT_PROGRESS_DDL = '''
+    CREATE TABLE IF NOT EXISTS import_progress (
+        source_key TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        last_key TEXT NOT NULL,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    ) WITHOUT ROWID
+'''
+
+_DAILY_VOLUME_TRIGGERS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_training_sets_insert
+    AFTER INSERT ON training_sets
+    BEGIN
+        INSERT INTO daily_volume (user_id, day, total_sets)
+        VALUES (NEW.user_id, NEW.day, NEW.n_group)
+        ON CONFLICT(user_id, day) DO UPDATE SET
+            total_sets = total_sets + excluded.total_sets;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_training_sets_update
+    AFTER UPDATE OF user_id, day, n_group ON training_sets
+    BEGIN
+        UPDATE daily_volume SET total_sets = total_sets - OLD.n_group
+        WHERE user_id = OLD.user_id AND day = OLD.day;
+        INSERT INTO daily_volume (user_id, day, total_sets)
+        VALUES (NEW.user_id, NEW.day, NEW.n_group)
+        ON CONFLICT(user_id, day) DO UPDATE SET
+            total_sets = total_sets + excluded.total_sets;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_training_sets_delete
+    AFTER DELETE ON training_sets
+    BEGIN
+        UPDATE daily_volume SET total_sets = total_sets - OLD.n_group
+        WHERE user_id = OLD.user_id AND day = OLD.day;
+        DELETE FROM daily_volume
+        WHERE user_id = OLD.user_id AND day = OLD.day
+            AND NOT EXISTS (
+                SELECT 1 FROM training_sets
+                WHERE user_id = OLD.user_id AND day = OLD.day
+            );
+    END
+    ''',
+)
+
+
+# 迁移进度：分批回填的每个阶段已处理到的键
+_SCHEMA_MIGRATIONS_DDL = '''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER NOT NULL,
+        stage TEXT NOT NULL,
+        cursor INTEGER NOT NULL,
+        PRIMARY KEY(version, stage)
+    ) WITHOUT ROWID
+'''
+
+# “记住我”令牌：selector 用于索引查找，只保存 verifier 的 SHA-256
+_SESSIONS_DDL = '''
+    CREATE TABLE IF NOT EXISTS sessions (
+        selector TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        verifier_hash TEXT NOT NULL,
+        expires_at INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    ) WITHOUT ROWID
+'''
+
+# 日期键迁移时重建的表：(新表列, 从旧表行 {row} 计算各列的表达式)
+_DAY_KEY_REBUILDS = {
+    'training_sets': (
+        ('id', 'user_id', 'day', 'exercise', 'n_group'),
+        ('{row}.id', '{row}.user_id', 'CAST({row}.day AS INTEGER)',
+         '{row}.exercise', '{row}.n_group')
+    ),
+    'body_stats': (
+        ('id', 'user_id', 'day', 'height', 'weight', 'created_at'),
+        ('{row}.id', '{row}.user_id', 'CAST({row}.timestamp AS INTEGER)',
+         '{row}.height', '{row}.weight', '{row}.created_at')
+    ),
+}
+
+
+@dataclass(frozen=True)
+class Migration:
+    """一个结构版本的迁移步骤，各步骤为 LiteDataManager 的方法名
+
+    prepare 在一个事务中执行；backfills 中的每个阶段分批执行，每批一个事务，
+    进度记录在 schema_migrations 中，中断后从断点继续；finish 与 user_version
+    的更新在同一个事务中提交。没有回填阶段的迁移整体在一个事务中完成。
+    """
+    version: int
+    description: str
+    prepare: Optional[str] = None
+    backfills: Tuple[str, ...] = ()
+    finish: Optional[str] = None
+
+
+_MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(
+        1, 'split JSON exercise columns into training_sets',
+        backfills=('_backfill_training_sets',)
+    ),
+    Migration(
+        2, 'store training_sets / body_stats days as integer keys',
+        prepare='_prepare_day_keys',
+        backfills=('_copy_training_sets_day_keys', '_copy_body_stats_day_keys'),
+        finish='_swap_day_key_tables'
+    ),
+    Migration(
+        3, 'materialize daily_volume',
+        prepare='_prepare_daily_volume',
+        backfills=('_backfill_daily_volume',)
+    ),
+    Migration(
+        4, 'add body_fat / bmr to body_stats',
+        prepare='_add_body_composition_columns'
+    ),
+    Migration(
+        5, 'remember-me sessions table',
+        prepare='_create_sessions_table'
+    ),
+    Migration(
+        6, 'key import progress by source account instead of path',
+        prepare='_rekey_import_progress'
+    ),
+)
+
+# 当前数据库结构版本（PRAGMA user_version）
+_SCHEMA_VERSION = _MIGRATIONS[-1].version
+
+
+def _is_busy_error(e: sqlite3.OperationalError) -> bool:
+    """判断是否为数据库被占用导致的错误"""
+    name = getattr(e, 'sqlite_errorname', '')
+    if name:
+        return name.startswith(('SQLITE_BUSY', 'SQLITE_LOCKED'))
+    message = str(e).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def retry_on_busy(method):
+    """写操作遇到 database is locked 时按指数退避重试整个事务"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._pool.holds_connection():
+            # 已处于外层事务中，只能由外层整体重试
+            return method(self, *args, **kwargs)
+        delay = self.retry_base_delay
+        for attempt in range(self.write_retries + 1):
+            try:
+                return method(self, *args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not _is_busy_error(e) or attempt == self.write_retries:
+                    raise
+                self.busy_retries += 1
+                self.logger.warning(
+                    "Database busy in %s, retry %d after %.3fs",
+                    method.__name__, attempt + 1, delay
+                )
+                # 加入随机抖动，避免多个进程同时重试
+                time.sleep(delay * (1 + random.random()))
+                delay = min(delay * 2, self.retry_max_delay)
+    return wrapper
+
+
+@functools.lru_cache(maxsize=None)
+def _password_hasher(rounds: Optional[int]):
+    """按迭代次数配置的 PBKDF2 哈希器，rounds 为 None 时使用 passlib 默认值"""
+    return pbkdf2_sha256.using(rounds=rounds) if rounds else pbkdf2_sha256
+
+
+# 以下两个函数是纯计算，可以交给线程池或进程池执行
+def _hash_password(password: str, rounds: Optional[int]) -> str:
+    return _password_hasher(rounds).hash(password)
+
+
+def _verify_password(
+    password: str, stored_hash: str, rounds: Optional[int]
+) -> Tuple[bool, Optional[str]]:
+    """校验密码；哈希参数与当前配置不同时，同时返回按当前配置重新计算的哈希"""
+    hasher = _password_hasher(rounds)
+    if not hasher.verify(password, stored_hash):
+        return False, None
+    if hasher.needs_update(stored_hash):
+        return True, hasher.hash(password)
+    return True, None
+
+
+def cached_query(kind: str, ranged: bool = False):
+    """读操作结果缓存
+
+    kind 为数据类型（training / body），写入同类数据时相应条目失效；
+    ranged=True 表示方法带 start/end 参数，只有写入该范围内的日期才会失效
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self._cache is None:
+                return method(self, *args, **kwargs)
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            # 同一用户的不同会话共享缓存条目
+            user_id = self._session(bound.arguments['session']).user_id
+            arguments = tuple(
+                (name, value) for name, value in bound.arguments.items()
+                if name not in ('self', 'session')
+            )
+            day_range = None
+            if ranged:
+                start = bound.arguments['start']
+                end = bound.arguments['end']
+                day_range = (
+                    to_day_key(start) if start is not None else None,
+                    to_day_key(end) if end is not None else None
+                )
+
+            key = (user_id, method.__name__, arguments)
+            hit, value = self._cache.get(key)
+            if hit:
+                return value
+            generation = self._cache.generation(user_id, kind)
+            value = method(self, *args, **kwargs)
+            self._cache.put(key, value, user_id, kind, day_range, generation)
+            return value
+        return wrapper
+    return decorator
+
+
 class LiteDataManager:
-    def __init__(self, db_path: str = ':memory:') -> None:
+    def __init__(
+        self,
+        db_path: str = ':memory:',
+        pool_size: int = 5,
+        pool_timeout: float = 10.0,
+        wal: bool = False,
+        busy_timeout: float = 5.0,
+        write_retries: int = 5,
+        retry_base_delay: float = 0.01,
+        retry_max_delay: float = 1.0,
+        checkpoint_interval: int = 500,
+        cache_bytes: Optional[int] = None,
+        migration_batch_size: int = 10000,
+        password_rounds: Optional[int] = None,
+        auth_workers: Optional[int] = None,
+        hash_executor: Optional[Executor] = None,
+        group_commit_window: float = 0.0,
+        group_commit_max_items: int = 256
+    ) -> None:
+        """
+        wal: 启用并发模式（WAL 日志），供多个进程同时读写同一数据库文件
+        busy_timeout: 等待其他连接释放锁的秒数
+        write_retries: 写操作仍然遇到锁时的最大重试次数（指数退避）
+        checkpoint_interval: WAL 模式下每提交多少次写操作执行一次检查点，0 为关闭
+        cache_bytes: 历史查询缓存的内存预算，0 为关闭；默认 4MB，WAL 模式下默认关闭。
+            缓存只感知经本实例完成的写入，其他进程或实例写同一文件后需调用
+            clear_cache() 才能读到新数据
+        migration_batch_size: 升级旧库时每个事务回填的行数（按用户回填时为用户数）
+        password_rounds: PBKDF2 迭代次数，默认使用 passlib 的默认值；
+            登录时参数不同的旧哈希会自动按新参数重新计算
+        auth_workers: login_async / register_async 使用的线程数，默认为 CPU 核数
+        hash_executor: 执行 PBKDF2 的执行器（如 ProcessPoolExecutor），默认在调用线程中计算；
+            hashlib 计算时会释放 GIL，线程池已能利用多核
+        group_commit_window: 大于 0 时启用组提交：单条保存先进入写队列，
+            最多等待这么多秒或攒满 group_commit_max_items 条后在一个事务中提交，
+            以少量延迟换取每批只同步一次磁盘；0 为关闭
+        """
         self.db_path: str = db_path
-        self.current_user: Optional[Dict[str, Any]] = None
         self.logger: logging.Logger = logging.getLogger(
             self.__class__.__name__)
+        self.wal: bool = wal
+        self.write_retries: int = write_retries
+        self.retry_base_delay: float = retry_base_delay
+        self.retry_max_delay: float = retry_max_delay
+        self.checkpoint_interval: int = checkpoint_interval
+        self.busy_retries: int = 0
+        # 活动会话（token -> Session）；未传 session 的调用使用 login 绑定的默认会话
+        self._sessions: Dict[str, Session] = {}
+        self._sessions_lock = threading.Lock()
+        self._default_session: Optional[Session] = None
+        # 会话 token -> 该会话签发或恢复时使用的“记住我”令牌 selector
+        self._remember_selectors: Dict[str, List[str]] = {}
+        self.migration_batch_size: int = migration_batch_size
+        self.password_rounds: Optional[int] = password_rounds
+        self.auth_workers: int = auth_workers or os.cpu_count() or 1
+        self._hash_executor: Optional[Executor] = hash_executor
+        self._auth_executor: Optional[ThreadPoolExecutor] = None
+        self._auth_lock = threading.Lock()
+        self._writes_since_checkpoint: int = 0
+        if cache_bytes is None:
+            cache_bytes = 0 if wal else 4 * 1024 * 1024
+        self._cache: Optional[HistoryCache] = \
+            HistoryCache(cache_bytes) if cache_bytes > 0 else None
+        self._pool: ConnectionPool = ConnectionPool(
+            db_path,
+            max_size=pool_size,
+            timeout=pool_timeout,
+            wal=wal,
+            busy_timeout=busy_timeout
+        )
 
         # 初始化数据库
         self._init_db()
+        self._write_queue: Optional[GroupCommitQueue] = None
+        if group_commit_window > 0:
+            self._write_queue = GroupCommitQueue(
+                self._commit_writes,
+                window=group_commit_window,
+                max_items=group_commit_max_items
+            )
         self.logger.info(
             "Initialized LiteDataManager with database: %s", db_path
         )
 
     @contextmanager
-    def _get_cursor(self) -> Iterator[sqlite3.Cursor]:
-        """自动管理数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute('PRAGMA foreign_keys = ON')
-        try:
+    def _get_cursor(self, write: bool = False) -> Iterator[sqlite3.Cursor]:
+        """从连接池借出连接，最外层负责提交或回滚
+
+        write=True 时立即获取写锁（BEGIN IMMEDIATE），避免读锁升级时的死锁
+        """
+        with self._pool.connection() as conn:
+            outermost = self._pool.is_outermost()
             cursor = conn.cursor()
-            yield cursor
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            self.logger.error("Database operation failed: %s", str(e))
-            raise
-        finally:
-            conn.close()
+            try:
+                if write and outermost:
+                    cursor.execute('BEGIN IMMEDIATE')
+                yield cursor
+                if outermost:
+                    conn.commit()
+                    if write:
+                        self._after_write_commit(conn)
+            except Exception as e:
+                if outermost:
+                    conn.rollback()
+                self.logger.error("Database operation failed: %s", str(e))
+                raise
+            finally:
+                cursor.close()
+
+    def _after_write_commit(self, conn: sqlite3.Connection) -> None:
+        """WAL 模式下定期执行被动检查点，防止 WAL 文件无限增长"""
+        if not self._pool.wal or self.checkpoint_interval <= 0:
+            return
+        self._writes_since_checkpoint += 1
+        if self._writes_since_checkpoint >= self.checkpoint_interval:
+            self._writes_since_checkpoint = 0
+            conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchone()
+
+    def _invalidate(
+        self, kind: str, user_id: int, day: Optional[int] = None
+    ) -> None:
+        """写入后失效缓存中受影响的查询结果"""
+        if self._cache is not None:
+            self._cache.invalidate(user_id, kind, day)
+
+    def clear_cache(self) -> None:
+        """丢弃全部缓存的查询结果，之后的查询重新读库
+
+        缓存只在经本实例写入时失效；数据可能被其他进程或实例（HTTP 服务、
+        导入脚本、另一个客户端）修改时，刷新前应先调用此方法
+        """
+        if self._cache is not None:
+            self._cache.clear()
+
+    def cache_stats(self) -> Dict[str, int]:
+        """缓存命中/未命中等统计，未启用缓存时为空"""
+        return self._cache.stats() if self._cache is not None else {}
+
+    def checkpoint(self, mode: str = 'PASSIVE') -> Tuple[int, int, int]:
+        """手动执行 WAL 检查点，返回 (busy, WAL 页数, 已写回页数)"""
+        mode = mode.upper()
+        if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"未知的检查点模式: {mode}")
+        with self._pool.connection() as conn:
+            result = conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+        self.logger.debug("WAL checkpoint %s: %s", mode, result)
+        return tuple(result)
+
+    def flush_writes(self, timeout: Optional[float] = None) -> bool:
+        """等待写队列中已提交的写入全部落盘，未启用组提交时直接返回 True"""
+        if self._write_queue is None:
+            return True
+        return self._write_queue.flush(timeout)
+
+    def close(self) -> None:
+        """落盘写队列并关闭连接池，WAL 模式下先把日志写回主库"""
+        if self._write_queue is not None:
+            self._write_queue.close()
+        if self._pool.wal:
+            try:
+                self.checkpoint('TRUNCATE')
+            except sqlite3.Error as e:
+                self.logger.warning("Final checkpoint failed: %s", str(e))
+        with self._auth_lock:
+            if self._auth_executor is not None:
+                self._auth_executor.shutdown()
+                self._auth_executor = None
+        self._pool.close()
+        self.logger.info("Closed LiteDataManager: %s", self.db_path)
 
     def _init_db(self) -> None:
-        """初始化数据库表结构"""
-        with self._get_cursor() as cur:
-            # 用户表
+        """初始化数据库表结构，并执行尚未完成的迁移"""
+        self._in_transaction(self._create_tables)
+        self._migrate()
+        self._in_transaction(self._create_derived_objects)
+        self.logger.debug("Database tables initialized")
+
+    @retry_on_busy
+    def _in_transaction(self, step: Callable[..., Any], *args: Any) -> Any:
+        """在一个写事务中执行 step(cur, *args)，遇到锁时整体重试"""
+        with self._get_cursor(write=True) as cur:
+            return step(cur, *args)
+
+    def _create_tables(self, cur: sqlite3.Cursor) -> None:
+        # 用户表
+        cur.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY,
+                username TEXT UNIQUE,
+                password_hash TEXT
+            )
+            '''
+        )
+
+        # 训练数据表（支持多记录）
+        cur.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS training_data (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                timestamp TEXT NOT NULL,
+                exercises TEXT NOT NULL,
+                n_group TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(user_id) REFERENCES users(id),
+                UNIQUE(user_id, timestamp)
+            )
+            '''
+        )
+
+        cur.execute(_BODY_STATS_DDL.format(table='body_stats'))
+        cur.execute(_TRAINING_SETS_DDL.format(table='training_sets'))
+        cur.execute(_SCHEMA_MIGRATIONS_DDL)
+
+    def _create_derived_objects(self, cur: sqlite3.Cursor) -> None:
+        """触发器与索引；重建表时它们会随旧表一起删除，因此在迁移之后创建"""
+        cur.execute(_DAILY_VOLUME_DDL)
+        for trigger in _DAILY_VOLUME_TRIGGERS:
+            cur.execute(trigger)
+
+        cur.execute(
+            '''
+            CREATE INDEX IF NOT EXISTS idx_training_sets_exercise
+            ON training_sets(user_id, exercise, day, n_group)
+            '''
+        )
+
+        # 覆盖索引：按用户和日期范围扫描时无需回表
+        cur.execute(
+            '''
+            CREATE INDEX IF NOT EXISTS idx_training_sets_day
+            ON training_sets(user_id, day, id, exercise, n_group)
+            '''
+        )
+        cur.execute(
+            '''
+            CREATE INDEX IF NOT EXISTS idx_body_stats_day
+            ON body_stats(user_id, day, height, weight)
+            '''
+        )
+
+    @staticmethod
+    def _user_version(cur: sqlite3.Cursor) -> int:
+        cur.execute('PRAGMA user_version')
+        return cur.fetchone()[0]
+
+    def _migrate(self) -> None:
+        """按版本顺序执行尚未完成的迁移
+
+        每个事务开始时都重新检查 user_version 与进度，多个进程同时打开旧库时
+        只有一个会真正执行某一批，其余的跳过
+        """
+        for migration in _MIGRATIONS:
+            if not self._in_transaction(self._start_migration, migration):
+                continue
+            for stage in migration.backfills:
+                while self._in_transaction(
+                        self._backfill_batch, migration, stage):
+                    pass
+            self._in_transaction(self._finish_migration, migration)
+
+    def _start_migration(
+        self, cur: sqlite3.Cursor, migration: Migration
+    ) -> bool:
+        """执行 prepare 并登记回填阶段，返回是否还需要回填"""
+        if self._user_version(cur) >= migration.version:
+            return False
+        cur.execute(
+            'SELECT 1 FROM schema_migrations WHERE version = ? LIMIT 1',
+            (migration.version,)
+        )
+        if cur.fetchone() is not None:
+            # 上次中断的迁移，从记录的进度继续
+            return True
+
+        self.logger.info(
+            "Migrating schema to version %d: %s",
+            migration.version, migration.description
+        )
+        if migration.prepare:
+            getattr(self, migration.prepare)(cur)
+        if not migration.backfills:
+            self._finish_migration(cur, migration)
+            return False
+        cur.executemany(
+            '''
+            INSERT INTO schema_migrations (version, stage, cursor)
+            VALUES (?, ?, 0)
+            ''',
+            [(migration.version, stage) for stage in migration.backfills]
+        )
+        return True
+
+    def _backfill_batch(
+        self, cur: sqlite3.Cursor, migration: Migration, stage: str
+    ) -> bool:
+        """回填一批并保存进度，返回该阶段是否还有剩余"""
+        cur.execute(
+            '''
+            SELECT cursor FROM schema_migrations
+            WHERE version = ? AND stage = ?
+            ''',
+            (migration.version, stage)
+        )
+        row = cur.fetchone()
+        if row is None:
+            return False
+        last_key = getattr(self, stage)(
+            cur, row[0], self.migration_batch_size)
+        if last_key is None:
+            return False
+        cur.execute(
+            '''
+            UPDATE schema_migrations SET cursor = ?
+            WHERE version = ? AND stage = ?
+            ''',
+            (last_key, migration.version, stage)
+        )
+        return True
+
+    def _finish_migration(
+        self, cur: sqlite3.Cursor, migration: Migration
+    ) -> None:
+        if self._user_version(cur) >= migration.version:
+            return
+        if migration.finish:
+            getattr(self, migration.finish)(cur)
+        cur.execute(
+            'DELETE FROM schema_migrations WHERE version = ?',
+            (migration.version,)
+        )
+        cur.execute(f'PRAGMA user_version = {migration.version}')
+        self.logger.info("Schema migrated to version %d", migration.version)
+
+    @staticmethod
+    def _batch_upper_bound(
+        cur: sqlite3.Cursor,
+        table: str,
+        after: int,
+        batch_size: int,
+        column: str = 'id'
+    ) -> Optional[int]:
+        """column 大于 after 的前 batch_size 行中的最大值，没有剩余行时为 None"""
+        cur.execute(
+            f'''
+            SELECT MAX({column}) FROM (
+                SELECT {column} FROM {table}
+                WHERE {column} > ?
+                ORDER BY {column}
+                LIMIT ?
+            )
+            ''',
+            (after, batch_size)
+        )
+        return cur.fetchone()[0]
+
+    @staticmethod
+    def _column_types(cur: sqlite3.Cursor, table: str) -> Dict[str, str]:
+        cur.execute(f'PRAGMA table_info({table})')
+        return {row[1]: row[2].upper() for row in cur.fetchall()}
+
+    @staticmethod
+    def _table_exists(cur: sqlite3.Cursor, table: str) -> bool:
+        cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (table,)
+        )
+        return cur.fetchone() is not None
+
+    def _backfill_training_sets(
+        self, cur: sqlite3.Cursor, after: int, batch_size: int
+    ) -> Optional[int]:
+        """把 training_data 中 JSON 编码的动作列表拆分到 training_sets"""
+        upper = self._batch_upper_bound(cur, 'training_data', after, batch_size)
+        if upper is None:
+            return None
+        cur.execute(
+            '''
+            INSERT INTO training_sets (user_id, day, exercise, n_group)
+            SELECT
+                td.user_id,
+                CAST(CASE WHEN json_valid(td.timestamp)
+                    THEN json_extract(td.timestamp, '$')
+                    ELSE td.timestamp END AS INTEGER),
+                ex.value,
+                CAST(ng.value AS INTEGER)
+            FROM training_data AS td,
+                json_each(td.exercises) AS ex
+                JOIN json_each(td.n_group) AS ng ON ng.key = ex.key
+            WHERE td.id > ? AND td.id <= ?
+            ORDER BY td.id, ex.key
+            ON CONFLICT(user_id, day, exercise) DO UPDATE SET
+                n_group = n_group + excluded.n_group
+            ''',
+            (after, upper)
+        )
+        self.logger.info(
+            "Migrated %d exercise rows into training_sets", cur.rowcount)
+        return upper
+
+    def _prepare_day_keys(self, cur: sqlite3.Cursor) -> None:
+        """为仍使用文本日期的表建立影子表，迁移期间的写入由触发器同步过去"""
+        needs_rebuild = {
+            'training_sets':
+                self._column_types(cur, 'training_sets').get('day') != 'INTEGER',
+            'body_stats':
+                'timestamp' in self._column_types(cur, 'body_stats'),
+        }
+        for table, ddl in (
+            ('training_sets', _TRAINING_SETS_DDL),
+            ('body_stats', _BODY_STATS_DDL)
+        ):
+            if not needs_rebuild[table]:
+                continue
+            shadow = f'{table}_new'
+            columns, exprs = _DAY_KEY_REBUILDS[table]
+            column_list = ', '.join(columns)
+            new_values = ', '.join(e.format(row='NEW') for e in exprs)
+            cur.execute(ddl.format(table=shadow))
             cur.execute(
-                '''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY,
-                    username TEXT UNIQUE,
-                    password_hash TEXT
-                )
+                f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_mirror_insert
+                AFTER INSERT ON {table}
+                BEGIN
+                    INSERT OR REPLACE INTO {shadow} ({column_list})
+                    VALUES ({new_values});
+                END
                 '''
             )
-
-            # 训练数据表（支持多记录）
             cur.execute(
+                f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_mirror_update
+                AFTER UPDATE ON {table}
+                BEGIN
+                    DELETE FROM {shadow} WHERE id = OLD.id;
+                    INSERT OR REPLACE INTO {shadow} ({column_list})
+                    VALUES ({new_values});
+                END
                 '''
-                CREATE TABLE IF NOT EXISTS training_data (
-                    id INTEGER PRIMARY KEY,
-                    user_id INTEGER NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    exercises TEXT NOT NULL,
-                    n_group TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(user_id) REFERENCES users(id),
-                    UNIQUE(user_id, timestamp)
-                )
+            )
+            cur.execute(
+                f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_mirror_delete
+                AFTER DELETE ON {table}
+                BEGIN
+                    DELETE FROM {shadow} WHERE id = OLD.id;
+                END
                 '''
             )
 
-            # 身体数据表（支持多记录）
+    def _copy_day_key_rows(
+        self, cur: sqlite3.Cursor, table: str, after: int, batch_size: int
+    ) -> Optional[int]:
+        """分批把旧表复制到影子表；已由触发器同步的行更新，保留不动"""
+        shadow = f'{table}_new'
+        if not self._table_exists(cur, shadow):
+            return None
+        upper = self._batch_upper_bound(cur, table, after, batch_size)
+        if upper is None:
+            return None
+        columns, exprs = _DAY_KEY_REBUILDS[table]
+        cur.execute(
+            f'''
+            INSERT OR IGNORE INTO {shadow} ({', '.join(columns)})
+            SELECT {', '.join(e.format(row=table) for e in exprs)}
+            FROM {table}
+            WHERE id > ? AND id <= ?
+            ''',
+            (after, upper)
+        )
+        return upper
+
+    def _copy_training_sets_day_keys(
+        self, cur: sqlite3.Cursor, after: int, batch_size: int
+    ) -> Optional[int]:
+        return self._copy_day_key_rows(cur, 'training_sets', after, batch_size)
+
+    def _copy_body_stats_day_keys(
+        self, cur: sqlite3.Cursor, after: int, batch_size: int
+    ) -> Optional[int]:
+        return self._copy_day_key_rows(cur, 'body_stats', after, batch_size)
+
+    def _swap_day_key_tables(self, cur: sqlite3.Cursor) -> None:
+        """用影子表替换旧表，旧表上的同步触发器随之删除"""
+        for table in _DAY_KEY_REBUILDS:
+            shadow = f'{table}_new'
+            if not self._table_exists(cur, shadow):
+                continue
+            cur.execute(f'DROP TABLE {table}')
+            cur.execute(f'ALTER TABLE {shadow} RENAME TO {table}')
+            self.logger.info("Converted %s to integer day keys", table)
+
+    def _prepare_daily_volume(self, cur: sqlite3.Cursor) -> None:
+        """先建表和触发器，回填期间的写入由触发器增量维护"""
+        cur.execute(_DAILY_VOLUME_DDL)
+        for trigger in _DAILY_VOLUME_TRIGGERS:
+            cur.execute(trigger)
+
+    def _backfill_daily_volume(
+        self, cur: sqlite3.Cursor, after: int, batch_size: int
+    ) -> Optional[int]:
+        """按用户分批重新计算 daily_volume，覆盖这些用户在回填前的增量结果"""
+        upper = self._batch_upper_bound(cur, 'users', after, batch_size)
+        if upper is None:
+            return None
+        cur.execute(
+            'DELETE FROM daily_volume WHERE user_id > ? AND user_id <= ?',
+            (after, upper)
+        )
+        cur.execute(
+            '''
+            INSERT INTO daily_volume (user_id, day, total_sets)
+            SELECT user_id, day, SUM(n_group)
+            FROM training_sets
+            WHERE user_id > ? AND user_id <= ?
+            GROUP BY user_id, day
+            ''',
+            (after, upper)
+        )
+        return upper
+
+    def _create_sessions_table(self, cur: sqlite3.Cursor) -> None:
+        cur.execute(_SESSIONS_DDL)
+        cur.execute(
+            '''
+            CREATE INDEX IF NOT EXISTS idx_sessions_user
+            ON sessions(user_id, expires_at)
+            '''
+        )
+
+    def _rekey_import_progress(self, cur: sqlite3.Cursor) -> None:
+        """旧的导入进度按 (来源库路径, 来源用户 id) 记录，改为按来源账号记录
+
+        旧记录只有在来源库仍在原路径时才能换算出账号标识；换算不了的记录被丢弃，
+        之后再导入该账号时会因用户名已存在而报告冲突，不会静默合并
+        """
+        old_rows: List[Tuple[str, int, str]] = []
+        if self._table_exists(cur, 'import_progress') and \
+                'source' in self._column_types(cur, 'import_progress'):
+            cur.execute(
+                'SELECT source, source_user_id, last_key FROM import_progress')
+            old_rows = cur.fetchall()
+            cur.execute('DROP TABLE import_progress')
+        cur.execute(_IMPORT_PROGRESS_DDL)
+
+        for source, source_user_id, last_key in old_rows:
+            account = target = None
+            try:
+                conn = sqlite3.connect(f'file:{source}?mode=ro', uri=True)
+                try:
+                    account = conn.execute(
+                        'SELECT username, password_hash FROM users WHERE id = ?',
+                        (source_user_id,)
+                    ).fetchone()
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                pass
+            if account is not None:
+                # 旧版本按用户名合并到目标库的同名用户
+                cur.execute(
+                    'SELECT id FROM users WHERE username = ?', (account[0],))
+                target = cur.fetchone()
+            if account is None or target is None:
+                self.logger.warning(
+                    "Dropping import progress of user %s in %s: "
+                    "source account not found", source_user_id, source)
+                continue
             cur.execute(
                 '''
-                CREATE TABLE IF NOT EXISTS body_stats (
-                    id INTEGER PRIMARY KEY,
-                    user_id INTEGER NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    height REAL NOT NULL,
-                    weight REAL NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(user_id) REFERENCES users(id),
-                    UNIQUE(user_id, timestamp)
-                )'''
+                INSERT OR REPLACE INTO import_progress
+                    (source_key, user_id, last_key)
+                VALUES (?, ?, ?)
+                ''',
+                (import_source_key(*account), target[0], last_key)
             )
 
-        self.logger.debug("Database tables initialized")
+    def _add_body_composition_columns(self, cur: sqlite3.Cursor) -> None:
+        """ALTER TABLE ADD COLUMN 只修改表定义，不需要回填"""
+        columns = self._column_types(cur, 'body_stats')
+        for column in ('body_fat', 'bmr'):
+            if column not in columns:
+                cur.execute(
+                    f'ALTER TABLE body_stats ADD COLUMN {column} REAL')
+
+    @staticmethod
+    def _row_to_body_stats(
+        row: Tuple[int, float, float, Optional[float], Optional[float]]
+    ) -> BodyStats:
+        """把 (day, height, weight, body_fat, bmr) 行转换为 BodyStats"""
+        day, height, weight, body_fat, bmr = row
+        return BodyStats(
+            timestamp=from_day_key(day),
+            height=height,
+            weight=weight,
+            body_fat=body_fat,
+            bmr=bmr
+        )
+
+    @staticmethod
+    def _rows_to_records(
+        rows: Iterable[Tuple[int, str, int]]
+    ) -> List[TrainingInfo]:
+        """把按日期排序的 (day, exercise, n_group) 行合并为 TrainingInfo"""
+        records = []
+        for day, group in itertools.groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            records.append(TrainingInfo(
+                timestamp=from_day_key(day),
+                exercises=[row[1] for row in group],
+                n_group=[row[2] for row in group]
+            ))
+        return records
+
+    @staticmethod
+    def _day_range_clause(
+        start: Optional[str], end: Optional[str], column: str = 'day'
+    ) -> Tuple[str, Tuple[int, ...]]:
+        """生成日期范围过滤条件，start/end 为 yyyyMMdd，包含两端"""
+        clause = ''
+        params: Tuple[int, ...] = ()
+        if start is not None:
+            clause += f' AND {column} >= ?'
+            params += (to_day_key(start),)
+        if end is not None:
+            clause += f' AND {column} <= ?'
+            params += (to_day_key(end),)
+        return clause, params
+
+    @property
+    def current_user(self) -> Optional[Dict[str, Any]]:
+        """默认会话的用户信息，未登录时为 None"""
+        session = self._default_session
+        if session is None:
+            return None
+        return {'id': session.user_id, 'username': session.username}
+
+    def _session(self, session: Optional[Session]) -> Session:
+        """校验会话仍然有效；未传入时使用默认会话"""
+        if session is None:
+            session = self._default_session
+            if session is None:
+                raise PermissionError("请先登录")
+        with self._sessions_lock:
+            if self._sessions.get(session.token) != session:
+                raise PermissionError("会话已失效，请重新登录")
+        return session
+
+    def _open_session(
+        self,
+        user_id: int,
+        username: str,
+        bind: bool,
+        selector: Optional[str] = None
+    ) -> Session:
+        session = Session(user_id, username)
+        with self._sessions_lock:
+            self._sessions[session.token] = session
+            if selector is not None:
+                self._remember_selectors[session.token] = [selector]
+            if bind:
+                self._default_session = session
+        return session
 
-    def login(self, username: str, password: str) -> bool:
-        """登录实现"""
+    def login(
+        self, username: str, password: str, bind: bool = True
+    ) -> Session:
+        """登录实现，返回新会话
+
+        bind=True 时同时设为默认会话，供不传 session 的单用户调用（如 GUI）使用；
+        多用户共享同一个管理器时应传 bind=False，并在每次调用时显式传入会话
+        """
         self.logger.info("Login attempt for user: %s", username)
         try:
             with self._get_cursor() as cur:
@@ -183,10 +1151,19 @@ class LiteDataManager:
                 raise ValueError("用户不存在")
 
             user_id, stored_hash = result
-            if pbkdf2_sha256.verify(password, stored_hash):
-                self.current_user = {'id': user_id, 'username': username}
+            verified, new_hash = self._run_hash(
+                _verify_password, password, stored_hash, self.password_rounds)
+            if verified:
+                if new_hash is not None:
+                    try:
+                        self._update_password_hash(
+                            user_id, stored_hash, new_hash)
+                    except sqlite3.Error as e:
+                        # 旧哈希仍然有效，下次登录再重试
+                        self.logger.warning(
+                            "Password rehash failed: %s", str(e))
                 self.logger.info("User logged in: %s", username)
-                return True
+                return self._open_session(user_id, username, bind)
             self.logger.warning("Invalid password for user: %s", username)
             raise ValueError("密码错误")
         except Exception as e:
@@ -196,230 +1173,888 @@ class LiteDataManager:
     def register(self, username: str, password: str) -> bool:
         """注册功能"""
         self.logger.info("Registration attempt for user: %s", username)
+        # 哈希计算较慢，放在事务外，避免长时间持有写锁；
+        # 也只算一次，数据库忙时重试的只是下面的插入
+        password_hash = self._run_hash(
+            _hash_password, password, self.password_rounds)
         try:
-            with self._get_cursor() as cur:
-                cur.execute(
-                    'INSERT INTO users (username, password_hash) VALUES (?, ?)',
-                    (username, pbkdf2_sha256.hash(password))
-                )
-            self.logger.info("User registered: %s", username)
-            return True
+            self._insert_user(username, password_hash)
         except sqlite3.IntegrityError as e:
             self.logger.warning(
                 "Registration failed - username exists: %s", username)
             raise ValueError("用户名已存在") from e
+        self.logger.info("User registered: %s", username)
+        return True
+
+    @retry_on_busy
+    def _insert_user(self, username: str, password_hash: str) -> None:
+        with self._get_cursor(write=True) as cur:
+            cur.execute(
+                'INSERT INTO users (username, password_hash) VALUES (?, ?)',
+                (username, password_hash)
+            )
+
+    def _run_hash(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """执行 PBKDF2 计算，配置了 hash_executor 时交给它并等待结果"""
+        if self._hash_executor is None:
+            return fn(*args)
+        return self._hash_executor.submit(fn, *args).result()
+
+    @retry_on_busy
+    def _update_password_hash(
+        self, user_id: int, old_hash: str, new_hash: str
+    ) -> None:
+        """登录成功后替换参数过时的哈希；期间密码已被修改时不覆盖"""
+        with self._get_cursor(write=True) as cur:
+            cur.execute(
+                '''
+                UPDATE users SET password_hash = ?
+                WHERE id = ? AND password_hash = ?
+                ''',
+                (new_hash, user_id, old_hash)
+            )
+        self.logger.info("Rehashed password for user id %d", user_id)
+
+    def _auth_pool(self) -> ThreadPoolExecutor:
+        with self._auth_lock:
+            if self._auth_executor is None:
+                self._auth_executor = ThreadPoolExecutor(
+                    max_workers=self.auth_workers,
+                    thread_name_prefix='auth'
+                )
+            return self._auth_executor
+
+    def login_async(
+        self, username: str, password: str, bind: bool = True
+    ) -> "Future[Session]":
+        """在后台线程中执行 login，不阻塞调用线程（如 GUI 线程）"""
+        return self._auth_pool().submit(self.login, username, password, bind)
+
+    def register_async(self, username: str, password: str) -> "Future[bool]":
+        """在后台线程中执行 register"""
+        return self._auth_pool().submit(self.register, username, password)
+
+    def save_training_record(
+        self, record: TrainingInfo, session: Optional[Session] = None
+    ) -> int:
+        """保存训练记录：同一天的同一动作累加组数，返回最后写入行的 id
+
+        启用组提交时等待所在批次提交后返回
+        """
+        return self.save_training_record_async(record, session).result()
+
+    def save_training_record_async(
+        self, record: TrainingInfo, session: Optional[Session] = None
+    ) -> "Future[int]":
+        """提交训练记录，返回结果为行 id 的 Future
+
+        启用组提交时立即返回，记录随所在批次一起提交；否则在调用线程中同步写入
+        """
+        user_id = self._session(session).user_id
+        return self._submit_write(('training', user_id, record))
+
+    def _insert_training_record(
+        self, cur: sqlite3.Cursor, user_id: int, record: TrainingInfo
+    ) -> int:
+        # 单条语句完成合并：组数在 SQL 中累加，并发保存不会丢失
+        cur.execute(
+            '''
+            INSERT INTO training_sets
+                (user_id, day, exercise, n_group)
+            SELECT ?, ?, ex.value, CAST(ng.value AS INTEGER)
+            FROM json_each(?) AS ex
+                JOIN json_each(?) AS ng ON ng.key = ex.key
+            WHERE true
+            ORDER BY ex.key
+            ON CONFLICT(user_id, day, exercise) DO UPDATE SET
+                n_group = n_group + excluded.n_group
+            RETURNING id
+            ''',
+            (
+                user_id,
+                record.day_key,
+                json.dumps(record.exercises),
+                json.dumps([int(n) for n in record.n_group])
+            )
+        )
+        ids = [row[0] for row in cur.fetchall()]
+        return ids[-1] if ids else 0
+
+    def _submit_write(self, item: Tuple[str, int, Any]) -> "Future[int]":
+        if self._write_queue is not None:
+            return self._write_queue.submit(item)
+        future: "Future[int]" = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(self._commit_writes([item])[0])
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    @retry_on_busy
+    def _commit_writes(
+        self, items: Sequence[Tuple[str, int, Any]]
+    ) -> List[int]:
+        """在一个事务中执行一批单条保存，items 为 (类型, 用户 id, 记录)，按顺序返回行 id"""
+        writers = {
+            'training': self._insert_training_record,
+            'body': self._upsert_body_stats,
+        }
+        try:
+            with self._get_cursor(write=True) as cur:
+                ids = [
+                    writers[kind](cur, user_id, record)
+                    for kind, user_id, record in items
+                ]
+        except Exception as e:
+            self.logger.error(
+                "Failed to save %d record(s): %s", len(items), str(e))
+            raise
 
-    def save_training_record(self, record: TrainingInfo) -> int:
-        """保存训练记录：若已存在，则合并并更新"""
-        if not self.current_user:
-            raise PermissionError("请先登录")
+        for kind, user_id, record in items:
+            self._invalidate(kind, user_id, record.day_key)
+        self.logger.info("Saved %d record(s) in one transaction", len(items))
+        return ids
 
+    def _merge_training_rows(
+        self,
+        cur: sqlite3.Cursor,
+        rows: Iterable[Tuple[int, str, str, int]]
+    ) -> IngestReport:
+        """在当前事务中合并 (user_id, day, exercise, n_group) 行
+
+        先在内存中合并同一批次内的重复键，再用 executemany 累加已有行、插入新行
+        """
+        merged_rows: Dict[Tuple[int, str, str], int] = {}
+        for user_id, day, exercise, n_group in rows:
+            key = (user_id, day, exercise)
+            merged_rows[key] = merged_rows.get(key, 0) + int(n_group)
+
+        cur.executemany(
+            '''
+            UPDATE training_sets SET n_group = n_group + ?
+            WHERE user_id = ? AND day = ? AND exercise = ?
+            ''',
+            ((n, *key) for key, n in merged_rows.items())
+        )
+        merged = max(cur.rowcount, 0)
+        cur.executemany(
+            '''
+            INSERT INTO training_sets (user_id, day, exercise, n_group)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id, day, exercise) DO NOTHING
+            ''',
+            ((*key, n) for key, n in merged_rows.items())
+        )
+        return IngestReport(inserted=max(cur.rowcount, 0), merged=merged)
+
+    @retry_on_busy
+    def _save_training_chunk(
+        self, user_id: int, records: List[TrainingInfo]
+    ) -> IngestReport:
+        with self._get_cursor(write=True) as cur:
+            return self._merge_training_rows(
+                cur,
+                (
+                    (user_id, record.day_key, exercise, n_group)
+                    for record in records
+                    for exercise, n_group in zip(
+                        record.exercises, record.n_group)
+                )
+            )
+
+    def save_training_records_many(
+        self,
+        records: Iterable[TrainingInfo],
+        chunk_size: int = 5000,
+        session: Optional[Session] = None
+    ) -> IngestReport:
+        """批量保存训练记录，合并规则与 save_training_record 相同
+
+        每 chunk_size 条记录一个事务，返回插入与合并的动作行数
+        """
+        user_id = self._session(session).user_id
+
+        report = IngestReport()
+        try:
+            for chunk in _chunked(records, chunk_size):
+                report += self._save_training_chunk(
+                    user_id, chunk)
+        except Exception as e:
+            self.logger.error(
+                "Bulk training save failed after %d inserted, %d merged: %s",
+                report.inserted, report.merged, str(e)
+            )
+            raise
+        finally:
+            self._invalidate('training', user_id)
+        self.logger.info(
+            "Bulk saved training rows: %d inserted, %d merged",
+            report.inserted, report.merged
+        )
+        return report
+
+    @retry_on_busy
+    def import_user(
+        self,
+        username: str,
+        password_hash: str,
+        source_key: str,
+        target_username: Optional[str] = None
+    ) -> int:
+        """为外部账号建立（或找回）对应的目标用户，返回其 id
+
+        source_key 为 import_source_key 得到的来源账号标识。该账号已导入过时返回
+        当时的目标用户。否则以 target_username（默认同名）新建用户并沿用原密码哈希；
+        目标库中已有该用户名时：密码哈希相同（加盐哈希相同即同一账号，如旧版本导入时建立）
+        或显式指定了 target_username 时使用该用户，否则视为冲突，抛出 ValueError，
+        避免把数据合并进无关的账号
+        """
+        with self._get_cursor(write=True) as cur:
+            cur.execute(
+                'SELECT user_id FROM import_progress WHERE source_key = ?',
+                (source_key,)
+            )
+            row = cur.fetchone()
+            if row:
+                return row[0]
+
+            name = target_username if target_username is not None else username
+            cur.execute(
+                '''
+                INSERT INTO users (username, password_hash) VALUES (?, ?)
+                ON CONFLICT(username) DO NOTHING
+                RETURNING id
+                ''',
+                (name, password_hash)
+            )
+            row = cur.fetchone()
+            if row is None:
+                cur.execute(
+                    'SELECT id, password_hash FROM users WHERE username = ?',
+                    (name,)
+                )
+                row = cur.fetchone()
+                if target_username is None and row[1] != password_hash:
+                    raise ValueError(f"用户名 {name} 已被目标库中的其他账号使用")
+            cur.execute(
+                '''
+                INSERT INTO import_progress (source_key, user_id, last_key)
+                VALUES (?, ?, '')
+                ''',
+                (source_key, row[0])
+            )
+            return row[0]
+
+    def get_import_progress(self, source_key: str) -> Optional[str]:
+        """来源账号已导入到的最后一个日期键，尚未导入数据时为 None"""
+        with self._get_cursor() as cur:
+            cur.execute(
+                'SELECT last_key FROM import_progress WHERE source_key = ?',
+                (source_key,)
+            )
+            row = cur.fetchone()
+        return row[0] if row and row[0] else None
+
+    @retry_on_busy
+    def import_training_chunk(
+        self,
+        user_id: int,
+        rows: List[Tuple[int, str, int]],
+        source_key: str,
+        last_key: str
+    ) -> IngestReport:
+        """导入一批 (day, exercise, n_group) 行，并在同一事务中记录导入进度
+
+        中断后按 get_import_progress 续传不会重复累加组数
+        """
+        with self._get_cursor(write=True) as cur:
+            report = self._merge_training_rows(
+                cur, ((user_id, *row) for row in rows))
+            cur.execute(
+                '''
+                UPDATE import_progress SET last_key = ?
+                WHERE source_key = ? AND user_id = ?
+                ''',
+                (last_key, source_key, user_id)
+            )
+        self._invalidate('training', user_id)
+        return report
+
+    def _query_training_days(
+        self,
+        user_id: int,
+        day_filter: str,
+        params: Tuple[Any, ...],
+        descending: bool,
+        limit: Optional[int] = None
+    ) -> List[TrainingInfo]:
+        """先在索引上选出训练日，再取出这些日期的全部动作行"""
+        order = 'DESC' if descending else 'ASC'
+        limit_clause = ' LIMIT ?' if limit is not None else ''
+        limit_params = (limit,) if limit is not None else ()
+        with self._get_cursor() as cur:
+            cur.execute(
+                f'''
+                SELECT day, exercise, n_group
+                FROM training_sets
+                WHERE user_id = ? AND day IN (
+                    SELECT DISTINCT day
+                    FROM training_sets
+                    WHERE user_id = ?{day_filter}
+                    ORDER BY day {order}{limit_clause}
+                )
+                ORDER BY day {order}, id
+                ''',
+                (user_id, user_id)
+                + params + limit_params
+            )
+            return self._rows_to_records(cur.fetchall())
+
+    @cached_query('training')
+    def get_training_records(
+        self, limit: int = 10, session: Optional[Session] = None
+    ) -> List[TrainingInfo]:
+        """获取最近 limit 个训练日的记录"""
+        user_id = self._session(session).user_id
+
+        try:
+            return self._query_training_days(
+                user_id, '', (), True, limit)
+        except Exception as e:
+            self.logger.error("Failed to get training records: %s", str(e))
+            raise
+
+    @cached_query('training', ranged=True)
+    def get_training_records_between(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        session: Optional[Session] = None
+    ) -> List[TrainingInfo]:
+        """获取日期范围内的训练记录（yyyyMMdd，包含两端），按日期升序"""
+        user_id = self._session(session).user_id
+
+        clause, params = self._day_range_clause(start, end)
         try:
             with self._get_cursor() as cur:
-                user_id = self.current_user['id']
-                timestamp = record.timestamp
+                cur.execute(
+                    f'''
+                    SELECT day, exercise, n_group
+                    FROM training_sets
+                    WHERE user_id = ?{clause}
+                    ORDER BY day, id
+                    ''',
+                    (user_id,) + params
+                )
+                return self._rows_to_records(cur.fetchall())
+        except Exception as e:
+            self.logger.error("Failed to get training records: %s", str(e))
+            raise
+
+    @cached_query('training')
+    def get_training_records_page(
+        self,
+        after: Optional[str] = None,
+        page_size: int = 30,
+        descending: bool = True,
+        session: Optional[Session] = None
+    ) -> Tuple[List[TrainingInfo], Optional[str]]:
+        """按训练日分页（keyset 分页）
+
+        after 为上一页返回的游标，返回 (本页记录, 下一页游标)，没有更多数据时游标为 None
+        """
+        user_id = self._session(session).user_id
+
+        day_filter, params = '', ()
+        if after is not None:
+            day_filter = ' AND day < ?' if descending else ' AND day > ?'
+            params = (to_day_key(after),)
+        try:
+            records = self._query_training_days(
+                user_id, day_filter, params, descending, page_size)
+        except Exception as e:
+            self.logger.error("Failed to get training records: %s", str(e))
+            raise
+        next_key = records[-1].timestamp \
+            if len(records) == page_size else None
+        return records, next_key
+
+    def iter_training_records(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        batch_size: int = 1000,
+        session: Optional[Session] = None
+    ) -> Iterator[TrainingInfo]:
+        """按日期升序流式读取训练记录，内存占用与历史长度无关
+
+        每批最多取 batch_size 行，批次之间按 (day, id) 键续读，不长期占用连接
+        """
+        user_id = self._session(session).user_id
+        return self._stream_training_rows(
+            user_id, start, end, batch_size)
 
-                # 查找是否已有记录
+    def _stream_training_rows(
+        self,
+        user_id: int,
+        start: Optional[str],
+        end: Optional[str],
+        batch_size: int
+    ) -> Iterator[TrainingInfo]:
+        clause, params = self._day_range_clause(start, end)
+        last_key = (0, 0)
+        day, exercises, n_group = None, [], []
+        while True:
+            with self._get_cursor() as cur:
                 cur.execute(
-                    '''
-                    SELECT exercises, n_group
-                    FROM training_data
-                    WHERE user_id = ? AND timestamp = ?
+                    f'''
+                    SELECT day, id, exercise, n_group
+                    FROM training_sets
+                    WHERE user_id = ? AND (day, id) > (?, ?){clause}
+                    ORDER BY day, id
+                    LIMIT ?
                     ''',
-                    (
-                        user_id,
-                        json.dumps(timestamp)
-                    )
+                    (user_id,) + last_key + params + (batch_size,)
                 )
-                existing = cur.fetchone()
-
-                if existing:
-                    old_exercises = json.loads(existing[0])
-                    old_n_group = json.loads(existing[1])
-
-                    temp = dict()
-                    for exercise, n_group in zip(old_exercises, old_n_group):
-                        temp[exercise] = int(n_group)  # 确保是整数
-                    for exercise, n_group in zip(record.exercises, record.n_group):
-                        if exercise in temp:
-                            temp[exercise] += int(n_group)  # 累加整数
-                        else:
-                            temp[exercise] = int(n_group)   # 新动作直接赋值
-
-                    updated_exercises = list(temp.keys())
-                    updated_n_group = list(temp.values())
-
-                    cur.execute(
-                        '''
-                        UPDATE training_data
-                        SET exercises = ?, n_group = ?
-                        WHERE user_id = ? AND timestamp = ?
-                        ''',
-                        (
-                            json.dumps(updated_exercises),
-                            json.dumps(updated_n_group),
-                            user_id,
-                            json.dumps(timestamp)
-                        )
-                    )
+                rows = cur.fetchall()
+            for row_day, _, exercise, n in rows:
+                if row_day != day:
+                    if day is not None:
+                        yield TrainingInfo(
+                            from_day_key(day), exercises, n_group)
+                    day, exercises, n_group = row_day, [], []
+                exercises.append(exercise)
+                n_group.append(n)
+            if len(rows) < batch_size:
+                break
+            last_key = (rows[-1][0], rows[-1][1])
+        if day is not None:
+            yield TrainingInfo(from_day_key(day), exercises, n_group)
 
-                    self.logger.info("Updated existing training record")
-                    return 0  # 可返回 0 或其他标识更新成功
-
-                else:
-                    # 新记录插入
-                    cur.execute(
-                        '''
-                        INSERT INTO training_data
-                            (user_id, timestamp, exercises, n_group)
-                        VALUES (?, ?, ?, ?)
-                        ''',
-                        (
-                            user_id,
-                            json.dumps(timestamp),
-                            json.dumps(record.exercises),
-                            json.dumps(record.n_group)
-                        )
-                    )
-                    record_id = cur.lastrowid
-                    self.logger.info(
-                        "Inserted new training record ID: %d", record_id)
-                    return record_id
+    @cached_query('training', ranged=True)
+    def get_exercise_totals(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        session: Optional[Session] = None
+    ) -> Dict[str, int]:
+        """按动作汇总总组数，可限定日期范围"""
+        user_id = self._session(session).user_id
 
+        clause, params = self._day_range_clause(start, end)
+        with self._get_cursor() as cur:
+            cur.execute(
+                f'''
+                SELECT exercise, SUM(n_group)
+                FROM training_sets
+                WHERE user_id = ?{clause}
+                GROUP BY exercise
+                ''',
+                (user_id,) + params
+            )
+            return dict(cur.fetchall())
+
+    @cached_query('training', ranged=True)
+    def get_daily_totals(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        session: Optional[Session] = None
+    ) -> Dict[str, int]:
+        """按日期汇总总组数，可限定日期范围；读取物化表 daily_volume"""
+        user_id = self._session(session).user_id
+
+        clause, params = self._day_range_clause(start, end)
+        with self._get_cursor() as cur:
+            cur.execute(
+                f'''
+                SELECT day, total_sets
+                FROM daily_volume
+                WHERE user_id = ?{clause}
+                ORDER BY day
+                ''',
+                (user_id,) + params
+            )
+            return {
+                from_day_key(day): total for day, total in cur.fetchall()
+            }
+
+    # 新增身体数据操作方法
+    def save_body_stats(
+        self, stats: BodyStats, session: Optional[Session] = None
+    ) -> int:
+        """保存身体数据，同一天的数据以最后一次为准，返回行 id"""
+        return self.save_body_stats_async(stats, session).result()
+
+    def save_body_stats_async(
+        self, stats: BodyStats, session: Optional[Session] = None
+    ) -> "Future[int]":
+        """提交身体数据，返回结果为行 id 的 Future，规则同 save_training_record_async"""
+        user_id = self._session(session).user_id
+        return self._submit_write(('body', user_id, stats))
+
+    def _upsert_body_stats(
+        self, cur: sqlite3.Cursor, user_id: int, stats: BodyStats
+    ) -> int:
+        # 更新已有行时 lastrowid 不会变化，用 RETURNING 取得实际行 id
+        cur.execute(
+            '''
+            INSERT INTO body_stats
+                (user_id, day, height, weight, body_fat, bmr)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, day) DO UPDATE SET
+                height = excluded.height,
+                weight = excluded.weight,
+                body_fat = excluded.body_fat,
+                bmr = excluded.bmr
+            RETURNING id
+            ''',
+            (
+                user_id,
+                stats.day_key,
+                stats.height,
+                stats.weight,
+                stats.body_fat,
+                stats.bmr
+            )
+        )
+        return cur.fetchone()[0]
+
+    @retry_on_busy
+    def _save_body_stats_chunk(
+        self, user_id: int, stats_list: List[BodyStats]
+    ) -> IngestReport:
+        # 同一批次内同一天以最后一条为准
+        latest = {stats.day_key: stats for stats in stats_list}
+        with self._get_cursor(write=True) as cur:
+            cur.executemany(
+                '''
+                UPDATE body_stats
+                SET height = ?, weight = ?, body_fat = ?, bmr = ?
+                WHERE user_id = ? AND day = ?
+                ''',
+                (
+                    (stats.height, stats.weight, stats.body_fat, stats.bmr,
+                     user_id, day)
+                    for day, stats in latest.items()
+                )
+            )
+            merged = max(cur.rowcount, 0)
+            cur.executemany(
+                '''
+                INSERT INTO body_stats
+                    (user_id, day, height, weight, body_fat, bmr)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_id, day) DO NOTHING
+                ''',
+                (
+                    (user_id, day, stats.height, stats.weight,
+                     stats.body_fat, stats.bmr)
+                    for day, stats in latest.items()
+                )
+            )
+            return IngestReport(inserted=max(cur.rowcount, 0), merged=merged)
+
+    def save_body_stats_many(
+        self,
+        stats_list: Iterable[BodyStats],
+        chunk_size: int = 5000,
+        session: Optional[Session] = None
+    ) -> IngestReport:
+        """批量保存身体数据，同一天的数据覆盖旧值
+
+        每 chunk_size 条记录一个事务，返回插入与覆盖的行数
+        """
+        user_id = self._session(session).user_id
+
+        report = IngestReport()
+        try:
+            for chunk in _chunked(stats_list, chunk_size):
+                report += self._save_body_stats_chunk(
+                    user_id, chunk)
         except Exception as e:
-            self.logger.error("Failed to save training record: %s", str(e))
+            self.logger.error(
+                "Bulk body stats save failed after %d inserted, %d merged: %s",
+                report.inserted, report.merged, str(e)
+            )
             raise
+        finally:
+            self._invalidate('body', user_id)
+        self.logger.info(
+            "Bulk saved body stats: %d inserted, %d merged",
+            report.inserted, report.merged
+        )
+        return report
 
-    def get_training_records(self, limit: int = 10) -> List[TrainingInfo]:
-        """获取最近训练记录"""
-        if not self.current_user:
-            raise PermissionError("请先登录")
+    @cached_query('body')
+    def get_body_stats_history(
+        self, limit: int = 10, session: Optional[Session] = None
+    ) -> List[BodyStats]:
+        """获取身体数据历史"""
+        user_id = self._session(session).user_id
 
         try:
             with self._get_cursor() as cur:
                 cur.execute(
                     '''
-                    SELECT timestamp, exercises, n_group
-                    FROM training_data
+                    SELECT day, height, weight, body_fat, bmr
+                    FROM body_stats
                     WHERE user_id = ?
-                    ORDER BY created_at DESC
+                    ORDER BY day DESC
                     LIMIT ?
                     ''',
                     (
-                        self.current_user['id'],
+                        user_id,
                         limit
                     )
                 )
 
                 return [
-                    TrainingInfo(
-                        timestamp=json.loads(row[0]),
-                        exercises=json.loads(row[1]),
-                        n_group=json.loads(row[2])
-                    ) for row in cur.fetchall()
+                    self._row_to_body_stats(row) for row in cur.fetchall()
                 ]
         except Exception as e:
-            self.logger.error("Failed to get training records: %s", str(e))
+            self.logger.error("Failed to get body stats: %s", str(e))
             raise
 
-    # 新增身体数据操作方法
-    def save_body_stats(self, stats: BodyStats) -> int:
-        """保存身体数据"""
-        if not self.current_user:
-            raise PermissionError("请先登录")
+    @cached_query('body', ranged=True)
+    def get_body_stats_between(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        session: Optional[Session] = None
+    ) -> List[BodyStats]:
+        """获取日期范围内的身体数据（yyyyMMdd，包含两端），按日期升序"""
+        user_id = self._session(session).user_id
 
+        clause, params = self._day_range_clause(start, end)
         try:
             with self._get_cursor() as cur:
                 cur.execute(
-                    '''
-                    INSERT INTO body_stats
-                        (user_id, timestamp, height, weight)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT(user_id, timestamp) DO UPDATE SET
-                        height = excluded.height,
-                        weight = excluded.weight
+                    f'''
+                    SELECT day, height, weight, body_fat, bmr
+                    FROM body_stats
+                    WHERE user_id = ?{clause}
+                    ORDER BY day
                     ''',
-                    (
-                        self.current_user['id'],
-                        stats.timestamp,
-                        stats.height,
-                        stats.weight
-                    )
+                    (user_id,) + params
                 )
-                record_id = cur.lastrowid
-                self.logger.info("Saved body stats ID: %d", record_id)
-                return record_id
+                return [
+                    self._row_to_body_stats(row) for row in cur.fetchall()
+                ]
         except Exception as e:
-            self.logger.error("Failed to save body stats: %s", str(e))
+            self.logger.error("Failed to get body stats: %s", str(e))
             raise
 
-    def get_body_stats_history(self, limit: int = 10) -> List[BodyStats]:
-        """获取身体数据历史"""
-        if not self.current_user:
-            raise PermissionError("请先登录")
+    @cached_query('body')
+    def get_body_stats_page(
+        self,
+        after: Optional[str] = None,
+        page_size: int = 30,
+        descending: bool = True,
+        session: Optional[Session] = None
+    ) -> Tuple[List[BodyStats], Optional[str]]:
+        """按日期分页（keyset 分页），返回 (本页数据, 下一页游标)"""
+        user_id = self._session(session).user_id
 
+        order = 'DESC' if descending else 'ASC'
+        key_filter, params = '', ()
+        if after is not None:
+            key_filter = ' AND day < ?' if descending else ' AND day > ?'
+            params = (to_day_key(after),)
         try:
             with self._get_cursor() as cur:
                 cur.execute(
-                    '''
-                    SELECT timestamp, height, weight
+                    f'''
+                    SELECT day, height, weight, body_fat, bmr
                     FROM body_stats
-                    WHERE user_id = ?
-                    ORDER BY timestamp DESC
+                    WHERE user_id = ?{key_filter}
+                    ORDER BY day {order}
                     LIMIT ?
                     ''',
-                    (
-                        self.current_user['id'],
-                        limit
-                    )
+                    (user_id,) + params + (page_size,)
                 )
-
-                return [
-                    BodyStats(
-                        timestamp=row[0],
-                        height=row[1],
-                        weight=row[2]
-                    ) for row in cur.fetchall()
+                stats_list = [
+                    self._row_to_body_stats(row) for row in cur.fetchall()
                 ]
         except Exception as e:
             self.logger.error("Failed to get body stats: %s", str(e))
             raise
-    
-    
-    def logout(self) -> None:
-        """登出"""
-        if self.current_user:
-            self.logger.info(
-                "User logging out: %s", self.current_user['username']
-            )
-            self.current_user = None
-        else:
+        next_key = stats_list[-1].timestamp \
+            if len(stats_list) == page_size else None
+        return stats_list, next_key
+
+    def iter_body_stats(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        batch_size: int = 1000,
+        session: Optional[Session] = None
+    ) -> Iterator[BodyStats]:
+        """按日期升序流式读取身体数据，每批最多取 batch_size 行"""
+        user_id = self._session(session).user_id
+        return self._stream_body_rows(
+            user_id, start, end, batch_size)
+
+    def _stream_body_rows(
+        self,
+        user_id: int,
+        start: Optional[str],
+        end: Optional[str],
+        batch_size: int
+    ) -> Iterator[BodyStats]:
+        clause, params = self._day_range_clause(start, end)
+        last_day = 0
+        while True:
+            with self._get_cursor() as cur:
+                cur.execute(
+                    f'''
+                    SELECT day, height, weight, body_fat, bmr
+                    FROM body_stats
+                    WHERE user_id = ? AND day > ?{clause}
+                    ORDER BY day
+                    LIMIT ?
+                    ''',
+                    (user_id, last_day) + params + (batch_size,)
+                )
+                rows = cur.fetchall()
+            for row in rows:
+                yield self._row_to_body_stats(row)
+            if len(rows) < batch_size:
+                break
+            last_day = rows[-1][0]
+
+    def logout(
+        self, session: Optional[Session] = None, revoke: bool = True
+    ) -> None:
+        """登出指定会话，未传入时登出默认会话
+
+        revoke=True 时同时吊销该会话签发或恢复时使用的“记住我”令牌；
+        启用组提交时先等待已提交的写入落盘
+        """
+        self.flush_writes()
+        selectors: List[str] = []
+        with self._sessions_lock:
+            if session is None:
+                session = self._default_session
+            if session is not None and \
+                    self._sessions.pop(session.token, None) is not None:
+                selectors = self._remember_selectors.pop(session.token, [])
+                if session == self._default_session:
+                    self._default_session = None
+            else:
+                session = None
+        if session is None:
             self.logger.warning("Logout attempted with no active session")
+            return
+        if selectors and revoke:
+            try:
+                self._delete_remember_tokens(selectors)
+            except sqlite3.Error as e:
+                self.logger.warning(
+                    "Failed to revoke remember-me token: %s", str(e))
+        self.logger.info("User logging out: %s", session.username)
+
+    @staticmethod
+    def _hash_verifier(verifier: str) -> str:
+        # verifier 是高熵随机串，单次 SHA-256 即可，无需慢哈希
+        return hashlib.sha256(verifier.encode()).hexdigest()
+
+    @retry_on_busy
+    def issue_remember_token(
+        self,
+        session: Optional[Session] = None,
+        ttl: float = 30 * 24 * 3600
+    ) -> str:
+        """为会话签发“记住我”令牌，返回不透明字符串，数据库中只保存其哈希
+
+        令牌在 ttl 秒后过期，或在该会话 logout 时吊销
+        """
+        session = self._session(session)
+        selector = secrets.token_hex(12)
+        verifier = secrets.token_urlsafe(32)
+        now = int(time.time())
+        with self._get_cursor(write=True) as cur:
+            # 顺便清理该用户已过期的令牌
+            cur.execute(
+                'DELETE FROM sessions WHERE user_id = ? AND expires_at <= ?',
+                (session.user_id, now)
+            )
+            cur.execute(
+                '''
+                INSERT INTO sessions
+                    (selector, user_id, verifier_hash, expires_at)
+                VALUES (?, ?, ?, ?)
+                ''',
+                (selector, session.user_id, self._hash_verifier(verifier),
+                 now + int(ttl))
+            )
+        with self._sessions_lock:
+            self._remember_selectors.setdefault(
+                session.token, []).append(selector)
+        self.logger.info("Issued remember-me token for: %s", session.username)
+        return f'{selector}.{verifier}'
 
-    def get_latest_body_stats(self) -> Optional[BodyStats]:
-        if not self.current_user:
-            raise PermissionError("请先登录")
+    def resume_session(self, token: str, bind: bool = True) -> Session:
+        """用“记住我”令牌恢复登录，不做 PBKDF2 计算
 
+        一次主键查找加一次常量时间比较；令牌无效或已过期时抛出 PermissionError
+        """
+        selector, _, verifier = token.strip().partition('.')
         with self._get_cursor() as cur:
             cur.execute(
                 '''
-                SELECT timestamp, height, weight, body_fat, bmr
+                SELECT s.user_id, u.username, s.verifier_hash, s.expires_at
+                FROM sessions AS s JOIN users AS u ON u.id = s.user_id
+                WHERE s.selector = ?
+                ''',
+                (selector,)
+            )
+            row: Optional[Tuple[int, str, str, int]] = cur.fetchone()
+        if row is None or not hmac.compare_digest(
+                row[2], self._hash_verifier(verifier)):
+            self.logger.warning("Invalid remember-me token")
+            raise PermissionError("登录已失效，请重新登录")
+        user_id, username, _, expires_at = row
+        if expires_at <= time.time():
+            self.logger.info("Remember-me token expired for: %s", username)
+            try:
+                self._delete_remember_tokens([selector])
+            except sqlite3.Error as e:
+                self.logger.warning(
+                    "Failed to delete expired token: %s", str(e))
+            raise PermissionError("登录已过期，请重新登录")
+        self.logger.info("Session resumed for user: %s", username)
+        return self._open_session(user_id, username, bind, selector)
+
+    @retry_on_busy
+    def _delete_remember_tokens(self, selectors: List[str]) -> None:
+        with self._get_cursor(write=True) as cur:
+            cur.executemany(
+                'DELETE FROM sessions WHERE selector = ?',
+                [(selector,) for selector in selectors]
+            )
+
+    @cached_query('body')
+    def get_latest_body_stats(
+        self, session: Optional[Session] = None
+    ) -> Optional[BodyStats]:
+        user_id = self._session(session).user_id
+
+        with self._get_cursor() as cur:
+            cur.execute(
+                '''
+                SELECT day, height, weight, body_fat, bmr
                 FROM body_stats
                 WHERE user_id = ?
-                ORDER BY timestamp DESC
+                ORDER BY day DESC
                 LIMIT 1
                 ''',
-                (self.current_user['id'],)
+                (user_id,)
             )
             row = cur.fetchone()
             if row:
-                return BodyStats(
-                    timestamp=row[0],
-                    height=row[1],
-                    weight=row[2],
-                    body_fat=row[3],
-                    basal_metabolic_rate=row[4]
-                )
+                return self._row_to_body_stats(row)
         return None
 
 if __name__ == '__main__':
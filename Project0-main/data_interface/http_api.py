@@ -0,0 +1,529 @@
+"""本地 HTTP/JSON 接口，让多个轻客户端共享同一个数据库，无需嵌入 PyQt 的 TrainingApp
+
+基于 asyncio 的 HTTP/1.1 服务（支持 keep-alive），数据库调用经 AsyncLiteDataManager
+分发：写操作由单独的写线程串行执行，读操作在连接池上并行执行。
+
+- 认证：POST /api/login 返回“记住我”令牌，之后以 ``Authorization: Bearer <令牌>`` 访问；
+  令牌对应的会话缓存在内存中，每 auth_recheck 秒回库确认一次是否过期或被吊销；
+  超过确认期未再使用的缓存（包括已过期的令牌）定期清理
+- 历史接口使用 keyset 分页：响应中的 next 作为下一次请求的 after 参数
+- 历史与日历汇总带 ETag，请求头 If-None-Match 命中时返回 304 且不带正文
+- 客户端接受 gzip 且正文超过 1 KiB 时压缩响应
+
+接口：
+    GET  /api/health
+    POST /api/register          {"username", "password"}
+    POST /api/login             {"username", "password"}
+    POST /api/logout
+    GET  /api/training          ?after=&page_size=&order=desc|asc
+    POST /api/training          {"timestamp", "exercises", "n_group"}
+    GET  /api/calendar          ?start=&end=    每日总组数
+    GET  /api/exercise-totals   ?start=&end=    每个动作的总组数
+    GET  /api/body-stats        ?after=&page_size=&order=desc|asc
+    GET  /api/body-stats/latest
+    POST /api/body-stats        {"timestamp", "height", "weight", "body_fat", "bmr"}
+
+用法: python -m data_interface.http_api data/test2.db --port 8765
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import time
+
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from .async_manager import AsyncLiteDataManager, QueueFullError
+from .datamanager import BodyStats, Session, TrainingInfo
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HEADERS = 100
+MAX_PAGE_SIZE = 200
+GZIP_MIN_BYTES = 1024
+
+
+class HTTPError(Exception):
+    """以指定状态码结束当前请求"""
+
+    def __init__(self, status: HTTPStatus, message: str = '') -> None:
+        super().__init__(message or status.phrase)
+        self.status: HTTPStatus = status
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    body: bytes = b''
+
+    def json(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.body or b'{}')
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "请求体不是合法的 JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "请求体应为 JSON 对象")
+        return data
+
+    def page_args(self) -> Dict[str, Any]:
+        """解析分页参数 after / page_size / order"""
+        try:
+            page_size = int(self.query.get('page_size', 30))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "page_size 应为整数")
+        order = self.query.get('order', 'desc')
+        if order not in ('desc', 'asc'):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "order 应为 desc 或 asc")
+        return {
+            'after': self.query.get('after') or None,
+            'page_size': max(1, min(page_size, MAX_PAGE_SIZE)),
+            'descending': order == 'desc',
+        }
+
+
+@dataclass
+class Response:
+    status: HTTPStatus
+    payload: Any = None
+    # 为 True 时计算 ETag 并支持条件请求
+    cacheable: bool = False
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+Handler = Callable[[Request, Optional[Session]], Awaitable[Response]]
+
+
+def _require(data: Dict[str, Any], *names: str) -> Tuple[Any, ...]:
+    missing = [name for name in names if name not in data]
+    if missing:
+        raise HTTPError(
+            HTTPStatus.BAD_REQUEST, f"缺少字段: {', '.join(missing)}")
+    return tuple(data[name] for name in names)
+
+
+def _etag(body: bytes) -> str:
+    return 'W/"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or etag in candidates or \
+        etag[2:] in candidates
+
+
+class ApiServer:
+    """HTTP 服务本体，持有一个 AsyncLiteDataManager"""
+
+    def __init__(
+        self,
+        db: AsyncLiteDataManager,
+        token_ttl: float = 30 * 24 * 3600,
+        auth_recheck: float = 60.0,
+        keepalive_timeout: float = 15.0
+    ) -> None:
+        """
+        token_ttl: 登录令牌的有效期（秒）
+        auth_recheck: 缓存的会话每隔多少秒回库确认令牌仍然有效
+        keepalive_timeout: 空闲连接保持的秒数
+        """
+        self.db: AsyncLiteDataManager = db
+        self.token_ttl: float = token_ttl
+        self.auth_recheck: float = auth_recheck
+        self.keepalive_timeout: float = keepalive_timeout
+        self.logger: logging.Logger = logging.getLogger(
+            self.__class__.__name__)
+        # 令牌 -> (会话, 上次回库确认的时间)
+        self._tokens: Dict[str, Tuple[Session, float]] = {}
+        self._resuming: Dict[str, "asyncio.Future[Session]"] = {}
+        self._next_prune: float = 0.0
+        # 清理令牌时释放会话的后台任务，保留引用以免被回收，close 时等待其完成
+        self._release_tasks: Set["asyncio.Future[None]"] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        # (方法, 路径) -> (处理函数, 是否需要登录)
+        self._routes: Dict[Tuple[str, str], Tuple[Handler, bool]] = {
+            ('GET', '/api/health'): (self.health, False),
+            ('POST', '/api/register'): (self.register, False),
+            ('POST', '/api/login'): (self.login, False),
+            ('POST', '/api/logout'): (self.logout, True),
+            ('GET', '/api/training'): (self.training_page, True),
+            ('POST', '/api/training'): (self.save_training, True),
+            ('GET', '/api/calendar'): (self.calendar, True),
+            ('GET', '/api/exercise-totals'): (self.exercise_totals, True),
+            ('GET', '/api/body-stats'): (self.body_stats_page, True),
+            ('GET', '/api/body-stats/latest'): (self.latest_body_stats, True),
+            ('POST', '/api/body-stats'): (self.save_body_stats, True),
+        }
+
+    # ---- 生命周期 ----
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> int:
+        """开始监听，返回实际端口（port=0 时由系统分配）"""
+        self._server = await asyncio.start_server(
+            self._handle_connection, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        self.logger.info("Serving on http://%s:%d", host, port)
+        return port
+
+    async def close(self) -> None:
+        """停止监听并关闭数据库；令牌保存在库中，重启后仍然有效"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._release_tasks:
+            await asyncio.gather(*self._release_tasks, return_exceptions=True)
+        await self.db.close()
+
+    # ---- 认证 ----
+
+    async def _authenticate(self, request: Request) -> Session:
+        scheme, _, token = request.headers.get(
+            'authorization', '').partition(' ')
+        token = token.strip()
+        if scheme.lower() != 'bearer' or not token:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "缺少登录令牌")
+        now = time.monotonic()
+        self._prune_tokens(now)
+        entry = self._tokens.get(token)
+        if entry is not None and now - entry[1] < self.auth_recheck:
+            return entry[0]
+        # 同一令牌的并发请求共用一次回库确认，避免为同一令牌建立多个会话
+        pending = self._resuming.get(token)
+        if pending is None:
+            pending = asyncio.ensure_future(self._resume(token, entry))
+            self._resuming[token] = pending
+            pending.add_done_callback(
+                lambda _: self._resuming.pop(token, None))
+        return await asyncio.shield(pending)
+
+    def _prune_tokens(self, now: float) -> None:
+        """每 auth_recheck 秒清理一次过了确认期的令牌缓存并释放其会话
+
+        这些令牌再次使用时本来就要回库确认，清理后按新令牌处理即可；
+        过期或不再使用的令牌因此不会一直留在内存中
+        """
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.auth_recheck
+        stale = [
+            token for token, (_, checked) in self._tokens.items()
+            if now - checked >= self.auth_recheck and token not in self._resuming
+        ]
+        for token in stale:
+            session, _ = self._tokens.pop(token)
+            task = asyncio.ensure_future(self.db.logout(session, revoke=False))
+            self._release_tasks.add(task)
+            task.add_done_callback(self._release_done)
+        if stale:
+            self.logger.debug("Pruned %d cached tokens", len(stale))
+
+    def _release_done(self, task: "asyncio.Future[None]") -> None:
+        self._release_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.warning(
+                "Failed to release pruned session: %s", task.exception())
+
+    async def _resume(
+        self, token: str, entry: Optional[Tuple[Session, float]]
+    ) -> Session:
+        if entry is not None:
+            self._tokens.pop(token, None)
+            await self.db.logout(entry[0], revoke=False)
+        session = await self.db.resume_session(token, bind=False)
+        self._tokens[token] = (session, time.monotonic())
+        return session
+
+    # ---- 接口 ----
+
+    async def health(self, request: Request, session: None) -> Response:
+        return Response(HTTPStatus.OK, {'status': 'ok'})
+
+    async def register(self, request: Request, session: None) -> Response:
+        username, password = _require(request.json(), 'username', 'password')
+        try:
+            await self.db.register(str(username), str(password))
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.CONFLICT, str(e))
+        return Response(HTTPStatus.CREATED, {'username': username})
+
+    async def login(self, request: Request, session: None) -> Response:
+        username, password = _require(request.json(), 'username', 'password')
+        try:
+            session = await self.db.login(str(username), str(password))
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, str(e))
+        token = await self.db.issue_remember_token(session, self.token_ttl)
+        self._tokens[token] = (session, time.monotonic())
+        return Response(HTTPStatus.OK, {
+            'token': token,
+            'username': session.username,
+            'expires_in': int(self.token_ttl),
+        })
+
+    async def logout(self, request: Request, session: Session) -> Response:
+        token = request.headers['authorization'].partition(' ')[2].strip()
+        self._tokens.pop(token, None)
+        await self.db.logout(session)
+        return Response(HTTPStatus.NO_CONTENT)
+
+    async def training_page(
+        self, request: Request, session: Session
+    ) -> Response:
+        records, next_key = await self.db.get_training_records_page(
+            session=session, **request.page_args())
+        return Response(HTTPStatus.OK, {
+            'items': [record.to_dict() for record in records],
+            'next': next_key,
+        }, cacheable=True)
+
+    async def save_training(
+        self, request: Request, session: Session
+    ) -> Response:
+        timestamp, exercises, n_group = _require(
+            request.json(), 'timestamp', 'exercises', 'n_group')
+        if not isinstance(exercises, list) or not isinstance(n_group, list) \
+                or len(exercises) != len(n_group):
+            raise HTTPError(
+                HTTPStatus.BAD_REQUEST, "exercises 与 n_group 应为等长列表")
+        record = TrainingInfo(str(timestamp), exercises, n_group)
+        record_id = await self.db.save_training_record(
+            record, session=session)
+        return Response(HTTPStatus.CREATED, {'id': record_id})
+
+    async def calendar(self, request: Request, session: Session) -> Response:
+        totals = await self.db.get_daily_totals(
+            request.query.get('start'), request.query.get('end'),
+            session=session)
+        return Response(HTTPStatus.OK, totals, cacheable=True)
+
+    async def exercise_totals(
+        self, request: Request, session: Session
+    ) -> Response:
+        totals = await self.db.get_exercise_totals(
+            request.query.get('start'), request.query.get('end'),
+            session=session)
+        return Response(HTTPStatus.OK, totals, cacheable=True)
+
+    async def body_stats_page(
+        self, request: Request, session: Session
+    ) -> Response:
+        stats_list, next_key = await self.db.get_body_stats_page(
+            session=session, **request.page_args())
+        return Response(HTTPStatus.OK, {
+            'items': [stats.to_dict() for stats in stats_list],
+            'next': next_key,
+        }, cacheable=True)
+
+    async def latest_body_stats(
+        self, request: Request, session: Session
+    ) -> Response:
+        stats = await self.db.get_latest_body_stats(session=session)
+        if stats is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "暂无身体数据")
+        return Response(HTTPStatus.OK, stats.to_dict(), cacheable=True)
+
+    async def save_body_stats(
+        self, request: Request, session: Session
+    ) -> Response:
+        data = request.json()
+        timestamp, height, weight = _require(
+            data, 'timestamp', 'height', 'weight')
+        stats = BodyStats(
+            timestamp=str(timestamp),
+            height=float(height),
+            weight=float(weight),
+            body_fat=data.get('body_fat'),
+            bmr=data.get('bmr')
+        )
+        record_id = await self.db.save_body_stats(stats, session=session)
+        return Response(HTTPStatus.CREATED, {'id': record_id})
+
+    # ---- 分发与编码 ----
+
+    async def dispatch(self, request: Request) -> Response:
+        route = self._routes.get((request.method, request.path))
+        try:
+            if route is None:
+                if any(path == request.path for _, path in self._routes):
+                    raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+                raise HTTPError(HTTPStatus.NOT_FOUND)
+            handler, needs_auth = route
+            session = await self._authenticate(request) \
+                if needs_auth else None
+            return await handler(request, session)
+        except HTTPError as e:
+            return Response(e.status, {'error': str(e)})
+        except PermissionError as e:
+            return Response(HTTPStatus.UNAUTHORIZED, {'error': str(e)})
+        except QueueFullError as e:
+            return Response(
+                HTTPStatus.SERVICE_UNAVAILABLE, {'error': str(e)},
+                headers={'Retry-After': '1'})
+        except (ValueError, TypeError) as e:
+            return Response(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+        except Exception:
+            self.logger.exception(
+                "Unhandled error on %s %s", request.method, request.path)
+            return Response(
+                HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "服务器内部错误"})
+
+    def _encode(
+        self, request: Optional[Request], response: Response, keep_alive: bool
+    ) -> bytes:
+        status = response.status
+        headers = dict(response.headers)
+        body = b''
+        if response.payload is not None:
+            body = json.dumps(
+                response.payload, ensure_ascii=False, separators=(',', ':')
+            ).encode()
+            headers['Content-Type'] = 'application/json; charset=utf-8'
+        if response.cacheable and request is not None:
+            etag = _etag(body)
+            headers['ETag'] = etag
+            headers['Cache-Control'] = 'private, no-cache'
+            headers['Vary'] = 'Accept-Encoding, Authorization'
+            if _etag_matches(request.headers.get('if-none-match', ''), etag):
+                status, body = HTTPStatus.NOT_MODIFIED, b''
+                headers.pop('Content-Type', None)
+        if len(body) >= GZIP_MIN_BYTES and request is not None and \
+                'gzip' in request.headers.get('accept-encoding', ''):
+            body = gzip.compress(body, compresslevel=5)
+            headers['Content-Encoding'] = 'gzip'
+        if status not in (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED):
+            headers['Content-Length'] = str(len(body))
+        headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+        head = f'HTTP/1.1 {status.value} {status.phrase}\r\n' + ''.join(
+            f'{name}: {value}\r\n' for name, value in headers.items())
+        return head.encode('latin-1') + b'\r\n' + body
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[Request, bool]]:
+        """读取一个请求，连接已关闭时返回 None；返回 (请求, 是否保持连接)"""
+        line = await asyncio.wait_for(
+            self._read_line(reader, HTTPStatus.REQUEST_URI_TOO_LONG),
+            self.keepalive_timeout)
+        if not line.strip():
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "请求行格式错误")
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self._read_line(
+                reader, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'transfer-encoding' in headers:
+            raise HTTPError(HTTPStatus.LENGTH_REQUIRED)
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length 无效")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length > 0 else b''
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' \
+            else connection == 'keep-alive'
+        url = urlsplit(target)
+        return Request(
+            method.upper(), url.path.rstrip('/') or '/',
+            dict(parse_qsl(url.query)), headers, body
+        ), keep_alive
+
+    @staticmethod
+    async def _read_line(
+        reader: asyncio.StreamReader, too_long: HTTPStatus
+    ) -> bytes:
+        """读取一行；超过 StreamReader 的行长上限时以 too_long 状态拒绝请求"""
+        try:
+            return await reader.readline()
+        except (ValueError, asyncio.LimitOverrunError):
+            raise HTTPError(too_long) from None
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    parsed = await self._read_request(reader)
+                except HTTPError as e:
+                    # 请求无法完整读取，回复错误后关闭连接
+                    writer.write(self._encode(
+                        None, Response(e.status, {'error': str(e)}), False))
+                    await writer.drain()
+                    break
+                if parsed is None:
+                    break
+                request, keep_alive = parsed
+                response = await self.dispatch(request)
+                writer.write(self._encode(request, response, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(
+    db_path: str,
+    host: str = '127.0.0.1',
+    port: int = 8765,
+    token_ttl: float = 30 * 24 * 3600,
+    **manager_options: Any
+) -> None:
+    """启动服务并一直运行，直到被取消"""
+    server = ApiServer(
+        AsyncLiteDataManager.open(db_path, **manager_options),
+        token_ttl=token_ttl)
+    port = await server.start(host, port)
+    print(f"Serving on http://{host}:{port}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='本地训练数据 HTTP 接口')
+    parser.add_argument('db_path', help='数据库文件')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--pool-size', type=int, default=8)
+    parser.add_argument('--token-days', type=float, default=30)
+    parser.add_argument('--group-commit-ms', type=float, default=0,
+                        help='组提交等待窗口（毫秒），0 为关闭')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    try:
+        asyncio.run(serve(
+            args.db_path, args.host, args.port,
+            token_ttl=args.token_days * 24 * 3600,
+            pool_size=args.pool_size, wal=True,
+            group_commit_window=args.group_commit_ms / 1000))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
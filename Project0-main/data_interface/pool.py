@@ -0,0 +1,208 @@
+import sqlite3
+import logging
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Optional, List, Iterator
+
+
+class PoolTimeoutError(RuntimeError):
+    """连接池在等待时间内没有可用连接"""
+
+
+class ConnectionPool:
+    """SQLite 连接池
+
+    - 连接长期存活，``PRAGMA`` 只在建立连接时执行一次
+    - 线程优先取回自己上次使用的连接，单线程（如 GUI 主线程）始终复用同一连接
+    - 最多同时存在 ``max_size`` 个连接，超出时阻塞等待，超时抛出 PoolTimeoutError
+    - 每个连接自带 ``cached_statements`` 大小的预编译语句缓存，长期连接使其真正生效
+    - 空闲超过 ``health_check_interval`` 秒的连接在取出前先做健康检查，失效则重建
+    - 同一线程内嵌套获取连接是可重入的，只有最外层负责提交或回滚
+    - ``wal=True`` 时以 WAL 模式打开，读写互不阻塞，适合多进程同时访问
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = 5,
+        timeout: float = 10.0,
+        cached_statements: int = 256,
+        health_check_interval: float = 30.0,
+        wal: bool = False,
+        busy_timeout: Optional[float] = None
+    ) -> None:
+        self.db_path: str = db_path
+        # 内存数据库每个连接都是独立的库，只能共享同一个连接
+        self.max_size: int = 1 if db_path == ':memory:' else max(1, max_size)
+        self.timeout: float = timeout
+        self.cached_statements: int = cached_statements
+        self.health_check_interval: float = health_check_interval
+        self.wal: bool = wal and db_path != ':memory:'
+        self.busy_timeout: float = \
+            timeout if busy_timeout is None else busy_timeout
+        self.logger: logging.Logger = logging.getLogger(
+            self.__class__.__name__)
+
+        self._cond = threading.Condition()
+        self._idle: List[sqlite3.Connection] = []
+        self._last_used = {}  # 连接 -> 最近一次归还时间
+        self._size: int = 0
+        self._closed: bool = False
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """建立新连接并执行一次性初始化"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn.execute(
+            'PRAGMA busy_timeout = %d' % int(self.busy_timeout * 1000))
+        if self.wal:
+            conn.execute('PRAGMA journal_mode = WAL')
+            # WAL 模式下 NORMAL 已能保证一致性，且只在检查点时 fsync
+            conn.execute('PRAGMA synchronous = NORMAL')
+        self.logger.debug("Opened new connection to %s", self.db_path)
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        """连接健康检查"""
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error as e:
+            self.logger.warning("Discarding broken connection: %s", str(e))
+            return False
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        self._last_used.pop(conn, None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _take_idle(self) -> Optional[sqlite3.Connection]:
+        """取出空闲连接，优先当前线程上次使用的连接（调用方持有锁）"""
+        if not self._idle:
+            return None
+        preferred = getattr(self._local, 'home', None)
+        if preferred is not None and preferred in self._idle:
+            self._idle.remove(preferred)
+            return preferred
+        return self._idle.pop()
+
+    def acquire(self) -> sqlite3.Connection:
+        """取出一个连接，必须与 release 成对调用"""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("连接池已关闭")
+                conn = self._take_idle()
+                if conn is not None:
+                    idle_since = self._last_used.get(conn, 0.0)
+                    stale = time.monotonic() - idle_since
+                    if stale < self.health_check_interval or \
+                            self._is_healthy(conn):
+                        break
+                    self._discard(conn)
+                    self._size -= 1
+                    continue
+                if self._size < self.max_size:
+                    self._size += 1
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        self._size -= 1
+                        raise
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"等待数据库连接超时（{self.timeout}s）")
+                self._cond.wait(remaining)
+
+        self._local.home = conn
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """归还连接"""
+        with self._cond:
+            if self._closed:
+                self._discard(conn)
+                self._size -= 1
+                return
+            if conn.in_transaction:
+                # 不应发生，防止把未结束的事务带给下一个使用者
+                conn.rollback()
+            self._last_used[conn] = time.monotonic()
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """可重入地获取当前线程的连接"""
+        held = getattr(self._local, 'held', None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self.acquire()
+        self._local.held = conn
+        self._local.depth = 0
+        try:
+            yield conn
+        finally:
+            self._local.held = None
+            self.release(conn)
+
+    def holds_connection(self) -> bool:
+        """当前线程是否已借出连接"""
+        return getattr(self._local, 'held', None) is not None
+
+    def is_outermost(self) -> bool:
+        """当前线程是否处于最外层的连接使用中"""
+        return getattr(self._local, 'depth', 0) == 0
+
+    def check_health(self) -> int:
+        """检查所有空闲连接，返回移除的失效连接数"""
+        removed = 0
+        with self._cond:
+            for conn in list(self._idle):
+                if not self._is_healthy(conn):
+                    self._idle.remove(conn)
+                    self._discard(conn)
+                    self._size -= 1
+                    removed += 1
+            if removed:
+                self._cond.notify_all()
+        return removed
+
+    def stats(self) -> dict:
+        """连接池状态"""
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'max_size': self.max_size
+            }
+
+    def close(self) -> None:
+        """关闭所有空闲连接，借出的连接在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                self._discard(conn)
+                self._size -= 1
+            self._idle.clear()
+            self._cond.notify_all()
+        self.logger.debug("Connection pool closed: %s", self.db_path)
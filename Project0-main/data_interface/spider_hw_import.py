@@ -0,0 +1,262 @@
+"""把 spider_hw 的用户数据库导入 training_sets
+
+spider_hw 把每个用户的训练历史存为 user_data 中的一个 JSON 对象
+``{日期: {"exercises": [...], "parts": [...], "time": [...]}}``，
+按日存储模式下则是 user_days 中每天一行。导入时：
+
+- 由 SQLite 的 json_each 逐个日期展开 JSON，Python 每次只解码一天，内存与历史长度无关
+- 每 chunk_size 行一个事务写入，进度（来源账号已导入到的日期）与数据在同一事务中提交，
+  中断后重新运行会从断点继续；进度按来源账号（用户名加密码哈希）记录，
+  来源库移动或复制后不会重复导入
+- 目标库中已有同名的其他用户时不导入该账号，记入报告中的冲突列表；
+  需要用 user_map（命令行 --map 来源用户名=目标用户名）显式指定导入到哪个用户
+- 多个来源库可以用多进程并行导入同一个目标库（目标库以 WAL 模式打开）
+
+目标结构没有身体部位和训练时长字段，每个动作记为 1 组，同一天重复的动作累加组数。
+
+用法: python -m data_interface.spider_hw_import data/test2.db ../spider_hw/data/test1.db
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .datamanager import LiteDataManager, import_source_key, to_day_key
+
+
+@dataclass
+class ImportReport:
+    """导入统计，seconds 为实际耗时（并行导入时为各库耗时之和）"""
+    users: int = 0
+    days: int = 0
+    rows: int = 0
+    skipped_days: int = 0
+    source_bytes: int = 0
+    seconds: float = 0.0
+    # 因目标库已有同名用户而未导入的来源用户名
+    conflicts: List[str] = field(default_factory=list)
+
+    def __iadd__(self, other: "ImportReport") -> "ImportReport":
+        self.users += other.users
+        self.days += other.days
+        self.rows += other.rows
+        self.skipped_days += other.skipped_days
+        self.source_bytes += other.source_bytes
+        self.seconds += other.seconds
+        self.conflicts.extend(other.conflicts)
+        return self
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def _open_source(path: str) -> sqlite3.Connection:
+    """以只读方式打开来源库"""
+    return sqlite3.connect(f'file:{os.path.abspath(path)}?mode=ro', uri=True)
+
+
+def _has_table(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table,)
+    ).fetchone()
+    return row is not None
+
+
+def _iter_source_days(
+    conn: sqlite3.Connection,
+    user_id: int,
+    after: Optional[str],
+    daily: bool
+) -> Iterator[Tuple[str, Any]]:
+    """按日期升序逐天产出 (日期, 当天 JSON 文本)，跳过 after 及之前的日期"""
+    sql = '''
+        SELECT j.key, j.value
+        FROM user_data AS d, json_each(d.data) AS j
+        WHERE d.user_id = ? AND json_valid(d.data)
+            AND json_type(d.data) = 'object'
+    '''
+    params: List[Any] = [user_id]
+    if daily:
+        sql += ' UNION ALL SELECT date, data FROM user_days WHERE user_id = ?'
+        params.append(user_id)
+    sql = f'SELECT key, value FROM ({sql}) WHERE key > ? ORDER BY key'
+    params.append(after if after is not None else '')
+    yield from conn.execute(sql, params)
+
+
+def _decode_day(key: str, value: Any) -> Optional[Tuple[int, List[str]]]:
+    """解码一天的数据，返回 (日期键, 动作列表)；格式不正确时返回 None"""
+    try:
+        day = to_day_key(key)
+        info = json.loads(value) if isinstance(value, str) else value
+        exercises = info['exercises']
+    except (ValueError, TypeError, KeyError):
+        return None
+    if not isinstance(exercises, list):
+        return None
+    return day, [str(exercise) for exercise in exercises]
+
+
+def import_spider_hw_db(
+    source_path: str,
+    target: LiteDataManager,
+    chunk_size: int = 5000,
+    user_map: Optional[Dict[str, str]] = None
+) -> ImportReport:
+    """导入一个 spider_hw 数据库，可重复运行，已导入的日期会被跳过
+
+    user_map: 来源用户名 -> 目标用户名，用于处理用户名冲突
+    """
+    user_map = user_map or {}
+    logger = logging.getLogger(__name__)
+    source = os.path.abspath(source_path)
+    report = ImportReport(source_bytes=os.path.getsize(source))
+    start = time.perf_counter()
+
+    conn = _open_source(source)
+    try:
+        daily = _has_table(conn, 'user_days')
+        users = conn.execute(
+            'SELECT id, username, password_hash FROM users ORDER BY id')
+        for source_user_id, username, password_hash in users:
+            source_key = import_source_key(username, password_hash)
+            try:
+                user_id = target.import_user(
+                    username, password_hash, source_key,
+                    user_map.get(username))
+            except ValueError as e:
+                report.conflicts.append(username)
+                logger.warning("Not importing user %s from %s: %s",
+                               username, source, e)
+                continue
+            report.users += 1
+            after = target.get_import_progress(source_key)
+
+            rows: List[Tuple[int, str, int]] = []
+            last_key = committed = after
+            for key, value in _iter_source_days(
+                    conn, source_user_id, after, daily):
+                decoded = _decode_day(key, value)
+                last_key = key
+                if decoded is None:
+                    report.skipped_days += 1
+                    logger.warning(
+                        "Skipping malformed day %r of user %s", key, username)
+                    continue
+                day, exercises = decoded
+                report.days += 1
+                rows.extend((day, exercise, 1) for exercise in exercises)
+                # 只在日期边界切分事务，续传时不会出现半天的数据
+                if len(rows) >= chunk_size:
+                    target.import_training_chunk(
+                        user_id, rows, source_key, last_key)
+                    report.rows += len(rows)
+                    rows, committed = [], last_key
+            if last_key != committed:
+                target.import_training_chunk(
+                    user_id, rows, source_key, last_key)
+                report.rows += len(rows)
+    finally:
+        conn.close()
+
+    report.seconds = time.perf_counter() - start
+    logger.info(
+        "Imported %s: %d users, %d days, %d rows in %.2fs",
+        source, report.users, report.days, report.rows, report.seconds
+    )
+    return report
+
+
+def _import_worker(
+    source_path: str,
+    target_path: str,
+    chunk_size: int,
+    user_map: Optional[Dict[str, str]]
+) -> ImportReport:
+    target = LiteDataManager(
+        target_path, wal=True, write_retries=20, cache_bytes=0)
+    try:
+        return import_spider_hw_db(source_path, target, chunk_size, user_map)
+    finally:
+        target.close()
+
+
+def import_spider_hw_dbs(
+    source_paths: Sequence[str],
+    target_path: str,
+    workers: int = 1,
+    chunk_size: int = 5000,
+    user_map: Optional[Dict[str, str]] = None
+) -> List[Tuple[str, ImportReport]]:
+    """导入多个 spider_hw 数据库，workers > 1 时每个来源库一个进程并行导入"""
+    # 先在主进程中建好目标库结构，避免多个进程同时迁移
+    LiteDataManager(target_path, wal=workers > 1, cache_bytes=0).close()
+    if workers <= 1:
+        return [
+            (path, _import_worker(path, target_path, chunk_size, user_map))
+            for path in source_paths
+        ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _import_worker, path, target_path, chunk_size, user_map)
+            for path in source_paths
+        ]
+        return [
+            (path, future.result())
+            for path, future in zip(source_paths, futures)
+        ]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description='把 spider_hw 用户数据库导入 training_sets')
+    parser.add_argument('target', help='目标数据库（LiteDataManager 格式）')
+    parser.add_argument('sources', nargs='+', help='spider_hw 数据库')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument(
+        '--map', action='append', default=[], metavar='SOURCE=TARGET',
+        help='把来源用户导入到指定的目标用户（可重复）；目标库已有同名用户时必须指定')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    user_map = {}
+    for item in args.map:
+        source_name, sep, target_name = item.partition('=')
+        if not sep or not source_name or not target_name:
+            parser.error(f'--map 格式应为 来源用户名=目标用户名: {item!r}')
+        user_map[source_name] = target_name
+
+    wall_start = time.perf_counter()
+    results = import_spider_hw_dbs(
+        args.sources, args.target, args.workers, args.chunk_size, user_map)
+    wall = time.perf_counter() - wall_start
+
+    total = ImportReport()
+    print(f"{'source':<40}{'users':>7}{'days':>9}{'rows':>10}"
+          f"{'skipped':>9}{'rows/s':>10}")
+    for path, report in results:
+        total += report
+        print(f"{os.path.basename(path):<40}{report.users:>7}{report.days:>9}"
+              f"{report.rows:>10}{report.skipped_days:>9}"
+              f"{report.rows_per_second:>10.0f}")
+    print(f"total: {total.rows} rows from {total.source_bytes / 1024:.0f} KiB "
+          f"in {wall:.2f}s ({total.rows / wall if wall else 0:.0f} rows/s)")
+    if total.conflicts:
+        print("not imported, username already used in target (use --map): "
+              + ", ".join(sorted(set(total.conflicts))))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
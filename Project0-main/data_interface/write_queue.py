@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+
+class GroupCommitQueue:
+    """组提交写队列
+
+    - 调用方 submit 后立即得到 Future，由后台线程批量提交
+    - 第一个写入到达后最多再等待 ``window`` 秒收集后续写入，攒满 ``max_items`` 条时立即提交
+    - 一批写入由 commit(items) 在一个事务中完成，按顺序返回每条写入的结果
+    - 整批提交失败时逐条重试，只有出错的写入以异常结束
+    - 已取消的 Future 对应的写入不会执行
+    - flush 等待此前提交的写入全部落盘；close 落盘剩余写入后停止后台线程
+    """
+
+    def __init__(
+        self,
+        commit: Callable[[Sequence[Any]], List[Any]],
+        window: float = 0.002,
+        max_items: int = 256,
+        name: str = 'group-commit'
+    ) -> None:
+        self.window: float = window
+        self.max_items: int = max(1, max_items)
+        self.logger: logging.Logger = logging.getLogger(
+            self.__class__.__name__)
+        self.batches: int = 0
+        self.items: int = 0
+
+        self._commit = commit
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[Any, Future]] = []
+        self._submitted: int = 0
+        self._completed: int = 0
+        self._flushing: bool = False
+        self._closed: bool = False
+        self._thread = threading.Thread(
+            target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("写队列已关闭")
+            self._pending.append((item, future))
+            self._submitted += 1
+            if len(self._pending) == 1 or \
+                    len(self._pending) >= self.max_items:
+                self._cond.notify_all()
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """立即提交排队中的写入并等待完成，超时返回 False"""
+        with self._cond:
+            target = self._submitted
+            if self._completed >= target:
+                return True
+            self._flushing = True
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: self._completed >= target, timeout)
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.logger.debug(
+            "Closed after %d items in %d batches", self.items, self.batches)
+
+    def _next_batch(self) -> Optional[List[Tuple[Any, Future]]]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or self._closed)
+            if not self._pending:
+                return None
+            deadline = time.monotonic() + self.window
+            while len(self._pending) < self.max_items and \
+                    not (self._closed or self._flushing):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_items]
+            del self._pending[:self.max_items]
+            if not self._pending:
+                self._flushing = False
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._process(batch)
+            finally:
+                with self._cond:
+                    self._completed += len(batch)
+                    self._cond.notify_all()
+
+    def _process(self, batch: List[Tuple[Any, Future]]) -> None:
+        live = [
+            (item, future) for item, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        if not live:
+            return
+        try:
+            results = self._commit([item for item, _ in live])
+        except Exception as e:
+            if len(live) == 1:
+                live[0][1].set_exception(e)
+                return
+            self.logger.warning(
+                "Batch of %d writes failed, retrying one by one: %s",
+                len(live), str(e))
+            for item, future in live:
+                try:
+                    future.set_result(self._commit([item])[0])
+                except Exception as item_error:
+                    future.set_exception(item_error)
+            return
+        self.batches += 1
+        self.items += len(live)
+        for (_, future), result in zip(live, results):
+            future.set_result(result)
@@ -100,8 +100,8 @@ class BodyDataPage(BasePage):
         except Exception:
             self.bmi_label.setText("N/A")
 
-    def filter_data_by_range(self, stats_list):
-        """根据选择的时间范围严格过滤数据"""
+    def get_date_range(self):
+        """根据选择的时间范围返回 (起始日期, 结束日期)，格式 yyyyMMdd"""
         range_text = self.range_combo.currentText()
         today = datetime.now().date()  # 使用date对象而非datetime
         
@@ -110,37 +110,24 @@ class BodyDataPage(BasePage):
         elif range_text == "最近30天":
             start_date = today - timedelta(days=29)  # 包含今天共30天
         else:  # 全部数据
-            return stats_list
+            return None, None
         
-        filtered = []
-        for stat in stats_list:
-            try:
-                # 解析日期字符串为date对象进行比较
-                stat_date = datetime.strptime(stat.timestamp, "%Y%m%d").date()
-                # 严格限制在时间范围内的数据
-                if start_date <= stat_date <= today:
-                    filtered.append(stat)
-            except ValueError as e:
-                print(f"日期格式错误: {stat.timestamp}, 错误: {e}")
-                continue
-                
-        return filtered
+        return start_date.strftime("%Y%m%d"), today.strftime("%Y%m%d")
 
     def update_chart(self):
         """更新体重变化折线图"""
         self.ax.clear()
         
         try:
-            stats_list = self.database_manager.get_body_stats_history()
-            stats_list = self.filter_data_by_range(stats_list)
+            # 范围过滤在数据库中完成，结果已按日期升序
+            start, end = self.get_date_range()
+            stats_list = self.database_manager.get_body_stats_between(start, end)
             
             if not stats_list:
                 self.ax.set_title("暂无数据")
                 self.canvas.draw()
                 return
                 
-            stats_list.sort(key=lambda x: x.timestamp)
-            
             dates = [datetime.strptime(s.timestamp, "%Y%m%d") for s in stats_list]
             weights = [s.weight for s in stats_list]
             
@@ -216,5 +203,7 @@ class BodyDataPage(BasePage):
 
     def on_show(self):
         """每次页面显示时自动刷新数据"""
+        # 数据可能已被其他程序修改，先丢弃查询缓存再读库
+        self.database_manager.clear_cache()
         self.load_latest_data()
         self.update_chart()
\ No newline at end of file
@@ -0,0 +1,88 @@
+import calendar
+
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional
+
+
+class DayHistory:
+    """某一天合并后的训练记录，以及由此预先算好的显示文本和训练部位
+
+    同一天同一动作的组数累加为一项，与数据库保存时的合并方式一致，按动作首次出现的顺序排列
+    """
+
+    def __init__(self, date_str: str):
+        self.date_str = date_str
+        self.sets: Dict[str, int] = {}
+        self.text = ""
+        self.muscles: FrozenSet[str] = frozenset()
+
+    def add(self, exercises: Iterable[str], n_group: Iterable[int],
+            muscle_map: Mapping[str, List[str]]):
+        """合并动作组数并重新生成该日的文本和训练部位"""
+        for ex, n in zip(exercises, n_group):
+            self.sets[ex] = self.sets.get(ex, 0) + int(n)
+
+        d = self.date_str
+        output = f"日期: {d[:4]}-{d[4:6]}-{d[6:]}\n"
+        muscles = set()
+        for ex, n_group in self.sets.items():
+            output += f"  - 动作: {ex} | 组数: {n_group}\n"
+            muscles.update(muscle_map.get(ex, []))
+        self.text = output + "\n"
+        self.muscles = frozenset(muscles)
+
+
+class TrainingHistory:
+    """按日期（yyyyMMdd）索引的训练历史，选中某天时一次字典查找即可取出显示内容
+
+    - 以月为单位按需从数据库加载，不会一次读入全部历史
+    - 最多保留 max_months 个月，超出时丢弃最久未访问的月份，再次访问时重新加载
+    - 保存新记录后调用 add_record 增量合并到对应日期，不必重新加载
+    """
+
+    def __init__(self, manager, muscle_map: Mapping[str, List[str]],
+                 max_months: int = 6):
+        self.manager = manager
+        self.muscle_map = muscle_map
+        self.max_months = max_months
+        # 已加载的月份 yyyyMM -> 该月各天的记录，按最近访问顺序排列
+        self._months: "OrderedDict[str, Dict[str, DayHistory]]" = OrderedDict()
+
+    def clear(self):
+        self._months.clear()
+
+    def day(self, date_str: str) -> Optional[DayHistory]:
+        """某天的记录，没有训练时返回 None；所在月份未加载时先加载该月"""
+        month = date_str[:6]
+        days = self._months.get(month)
+        if days is None:
+            days = self.load_month(month)
+        else:
+            self._months.move_to_end(month)
+        return days.get(date_str)
+
+    def load_month(self, month: str) -> Dict[str, DayHistory]:
+        year, mon = int(month[:4]), int(month[4:])
+        last = calendar.monthrange(year, mon)[1]
+        records = self.manager.get_training_records_between(
+            f"{month}01", f"{month}{last:02d}")
+        days: Dict[str, DayHistory] = {}
+        for info in records:
+            self._merge(days, info)
+        self._months[month] = days
+        self._months.move_to_end(month)
+        while len(self._months) > self.max_months:
+            self._months.popitem(last=False)
+        return days
+
+    def add_record(self, info):
+        """合并一条刚保存的记录；所在月份尚未加载时忽略，之后加载会从数据库读到它"""
+        days = self._months.get(info.timestamp[:6])
+        if days is not None:
+            self._merge(days, info)
+
+    def _merge(self, days: Dict[str, DayHistory], info):
+        entry = days.get(info.timestamp)
+        if entry is None:
+            entry = days[info.timestamp] = DayHistory(info.timestamp)
+        entry.add(info.exercises, info.n_group, self.muscle_map)
@@ -1,15 +1,27 @@
+import logging
+import os
+import sqlite3
+
+from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import (
-    QLabel, QLineEdit, QPushButton,
+    QCheckBox, QLabel, QLineEdit, QPushButton,
     QVBoxLayout, QMessageBox
 )
 from .base import BasePage
 
+# “记住我”令牌的保存位置，启动时用它跳过密码验证
+REMEMBER_TOKEN_PATH = os.path.join("data", "remember_token")
+
 
 class LoginPage(BasePage):
+    # 密码哈希在后台线程计算，完成后经信号回到 GUI 线程：(操作, 用户名, 异常或 None)
+    auth_finished = pyqtSignal(str, str, object)
+
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
         self.init_ui()
+        self.auth_finished.connect(self.on_auth_finished)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -30,28 +42,41 @@ class LoginPage(BasePage):
             lambda: self.login()
         )
 
-        login_btn = QPushButton("登录")
-        login_btn.clicked.connect(self.login)
-        layout.addWidget(login_btn)
+        self.remember_check = QCheckBox("记住我")
+        layout.addWidget(self.remember_check)
 
-        register_btn = QPushButton("注册")
-        register_btn.clicked.connect(self.register)
-        layout.addWidget(register_btn)
+        self.login_btn = QPushButton("登录")
+        self.login_btn.clicked.connect(self.login)
+        layout.addWidget(self.login_btn)
+
+        self.register_btn = QPushButton("注册")
+        self.register_btn.clicked.connect(self.register)
+        layout.addWidget(self.register_btn)
 
         self.setLayout(layout)
 
+    def set_busy(self, busy):
+        for widget in (self.username_entry, self.password_entry,
+                       self.remember_check, self.login_btn,
+                       self.register_btn):
+            widget.setEnabled(not busy)
+
+    def submit(self, action, username, future):
+        self.set_busy(True)
+        future.add_done_callback(
+            lambda f: self.auth_finished.emit(action, username, f.exception())
+        )
+
     def login(self):
         username = self.username_entry.text().strip()
         password = self.password_entry.text().strip()
         if not username or not password:
             QMessageBox.critical(self, "错误", "用户名和密码不能为空")
             return
-        try:
-            if self.controller.database_manager.login(username, password):
-                QMessageBox.information(self, "成功", f"欢迎，{username}！")
-                self.controller.show_page("MainPage")
-        except Exception as e:
-            QMessageBox.critical(self, "登录失败", str(e))
+        self.submit(
+            "login", username,
+            self.controller.database_manager.login_async(username, password)
+        )
 
     def register(self):
         username = self.username_entry.text().strip()
@@ -59,8 +84,62 @@ class LoginPage(BasePage):
         if not username or not password:
             QMessageBox.critical(self, "错误", "用户名和密码不能为空")
             return
-        try:
-            self.controller.database_manager.register(username, password)
+        self.submit(
+            "register", username,
+            self.controller.database_manager.register_async(
+                username, password)
+        )
+
+    def on_auth_finished(self, action, username, error):
+        self.set_busy(False)
+        if action == "login":
+            if error is not None:
+                QMessageBox.critical(self, "登录失败", str(error))
+                return
+            if self.remember_check.isChecked():
+                self.remember()
+            QMessageBox.information(self, "成功", f"欢迎，{username}！")
+            self.controller.show_page("MainPage")
+        elif error is not None:
+            QMessageBox.critical(self, "注册失败", str(error))
+        else:
             QMessageBox.information(self, "成功", "注册成功！请登录")
-        except Exception as e:
-            QMessageBox.critical(self, "注册失败", str(e))
+
+    def remember(self):
+        try:
+            token = self.controller.database_manager.issue_remember_token()
+            # 令牌等同于登录凭据，文件只允许当前用户读写
+            fd = os.open(REMEMBER_TOKEN_PATH,
+                         os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.chmod(REMEMBER_TOKEN_PATH, 0o600)  # 文件已存在时 os.open 不会修改权限
+            with os.fdopen(fd, "w") as f:
+                f.write(token)
+        except (OSError, sqlite3.Error) as e:
+            logging.warning("Failed to save remember-me token: %s", e)
+
+    def try_resume(self):
+        """用保存的令牌恢复上次的登录，成功返回 True"""
+        try:
+            with open(REMEMBER_TOKEN_PATH) as f:
+                token = f.read()
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logging.warning("Failed to read remember-me token: %s", e)
+            return False
+        try:
+            self.controller.database_manager.resume_session(token)
+        except PermissionError:
+            self.forget()
+            return False
+        except sqlite3.Error as e:
+            # 数据库被锁或损坏时令牌本身可能仍然有效，保留它，这次先显示登录界面
+            logging.warning("Failed to resume remembered session: %s", e)
+            return False
+        return True
+
+    def forget(self):
+        try:
+            os.remove(REMEMBER_TOKEN_PATH)
+        except FileNotFoundError:
+            pass
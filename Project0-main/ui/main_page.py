@@ -182,6 +182,7 @@ class MainPage(QWidget):
             )
 
             self.controller.database_manager.save_training_record(info)
+            self.controller.on_training_saved(info)
             QMessageBox.information(self, "保存成功", "训练记录已保存到数据库")
             self.selected_actions.clear()
             self.selected_list.clear()
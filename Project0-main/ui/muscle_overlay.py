@@ -0,0 +1,223 @@
+import os
+
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QHBoxLayout, QLabel, QWidget
+
+VIEWS = ("front", "back")
+
+
+class MuscleCompositor:
+    """肌群高亮图合成器
+
+    - 底图和所有肌群遮罩只在第一次使用时解码一次，并预先缩放到显示高度
+    - 遮罩按文件名 ``<肌群>_<front|back>.png`` 归入正面或背面，空文件或无法解码的文件被忽略
+    - 每个视图的遮罩 alpha 堆叠为 (肌群数, 像素数) 的矩阵，合成是一次矩阵乘法加一次混合，
+      耗时与高亮多少个肌群无关；只计算被任一遮罩覆盖的像素，结果写入复用的缓冲区
+    - render 用遮罩自身颜色高亮肌群；render_heat 按训练量给每个肌群着色
+    - 合成结果按肌群集合（热力模式下连同量化后的强度）缓存（LRU）
+    """
+
+    # 热力模式的颜色：训练量从低到高由橙黄渐变为遮罩的红色 (RGB)
+    HEAT_LOW = (255, 190, 60)
+    HEAT_HIGH = (255, 0, 51)
+    # 强度量化级数，训练量相近的日子共用缓存
+    HEAT_LEVELS = 16
+
+    def __init__(self, image_dir="assets", mask_dir="assets/masks",
+                 height=500, cache_size=32):
+        self.image_dir = image_dir
+        self.mask_dir = mask_dir
+        self.height = height
+        self.cache_size = cache_size
+        self._size: Dict[str, Tuple[int, int]] = {}
+        # 预乘 alpha 的底图，每个像素打包为一个 uint32，内存布局与 ARGB32 相同
+        self._base_pixels: Dict[str, np.ndarray] = {}
+        # 以下数组只包含被遮罩覆盖的像素（_support 为其在整幅图中的下标）
+        self._support: Dict[str, np.ndarray] = {}
+        self._bases: Dict[str, np.ndarray] = {}    # (4, 覆盖像素数)
+        self._names: Dict[str, List[str]] = {}
+        self._alphas: Dict[str, np.ndarray] = {}   # (肌群数, 覆盖像素数)，0~1
+        self._colors: Dict[str, np.ndarray] = {}   # (肌群数, 3)，B G R
+        self._pixels: Dict[str, np.ndarray] = {}   # 复用的输出缓冲区，同为 uint32
+        self._scratch: Dict[str, np.ndarray] = {}  # 覆盖像素的 uint8 中间结果
+        self._cache: "OrderedDict[Hashable, Tuple[QPixmap, QPixmap]]" = \
+            OrderedDict()
+        self._loaded = False
+
+    def _load_image(self, path) -> Optional[np.ndarray]:
+        """解码 PNG 并缩放到显示高度，返回 (高, 宽, 4) 的 RGBA 数组"""
+        try:
+            im = Image.open(path).convert("RGBA")
+        except (OSError, ValueError):
+            return None
+        width = max(1, round(im.width * self.height / im.height))
+        im = im.resize((width, self.height), Image.LANCZOS, reducing_gap=3.0)
+        return np.asarray(im)
+
+    def _load(self):
+        masks: Dict[str, Dict[str, np.ndarray]] = {view: {} for view in VIEWS}
+        for view in VIEWS:
+            base = self._load_image(
+                os.path.join(self.image_dir, f"base_{view}.png"))
+            if base is None:
+                raise FileNotFoundError(f"无法加载底图 base_{view}.png")
+            height, width = base.shape[:2]
+            self._size[view] = (width, height)
+            rgba = base.reshape(-1, 4).astype(np.float32)
+            alpha = rgba[:, 3:] / 255
+            self._bases[view] = np.concatenate(
+                (rgba[:, 2::-1] * alpha, rgba[:, 3:]), axis=1).T.copy()
+            self._base_pixels[view] = np.ascontiguousarray(
+                (self._bases[view].T + 0.5).astype(np.uint8)
+            ).view(np.uint32).reshape(-1)
+            self._pixels[view] = np.empty(height * width, np.uint32)
+
+        for filename in sorted(os.listdir(self.mask_dir)):
+            stem, ext = os.path.splitext(filename)
+            muscle, _, view = stem.rpartition("_")
+            if ext.lower() != ".png" or not muscle or view not in VIEWS:
+                continue
+            mask = self._load_image(os.path.join(self.mask_dir, filename))
+            if mask is not None and \
+                    mask.shape[1::-1] == self._size[view] and mask[..., 3].any():
+                masks[view][muscle] = mask.reshape(-1, 4)
+
+        for view in VIEWS:
+            names = sorted(masks[view])
+            pixels = self._bases[view].shape[1]
+            self._names[view] = names
+            alphas = np.array(
+                [masks[view][name][:, 3] / 255 for name in names],
+                np.float32).reshape(len(names), pixels)
+            support = np.flatnonzero(alphas.any(axis=0))
+            self._support[view] = support
+            self._alphas[view] = np.ascontiguousarray(alphas[:, support])
+            self._bases[view] = np.ascontiguousarray(
+                self._bases[view][:, support])
+            self._scratch[view] = np.empty((len(support), 4), np.uint8)
+            # 遮罩为单色，取有效像素的平均颜色
+            self._colors[view] = np.array(
+                [
+                    masks[view][name][masks[view][name][:, 3] > 0, 2::-1]
+                    .mean(axis=0)
+                    for name in names
+                ],
+                np.float32).reshape(len(names), 3)
+        self._loaded = True
+
+    def muscles(self, view) -> FrozenSet[str]:
+        """该视图有遮罩的肌群"""
+        if not self._loaded:
+            self._load()
+        return frozenset(self._names[view])
+
+    def render(self, muscles: Iterable[str]) -> Tuple[QPixmap, QPixmap]:
+        """返回 (正面, 背面) 高亮图，遮罩使用自身颜色"""
+        key = frozenset(muscles)
+        return self._render(key, {muscle: (1.0, None) for muscle in key})
+
+    def render_heat(
+        self, volumes: Dict[str, float]
+    ) -> Tuple[QPixmap, QPixmap]:
+        """按训练量着色，返回 (正面, 背面)
+
+        训练量按最大值归一化：量越大颜色越红、越不透明，没有训练量的肌群不着色
+        """
+        peak = max(volumes.values(), default=0)
+        levels = {
+            muscle: max(1, round(volume / peak * self.HEAT_LEVELS))
+            for muscle, volume in volumes.items() if volume > 0
+        }
+        key = ("heat", frozenset(levels.items()))
+        return self._render(key, {
+            muscle: self._heat_layer(level / self.HEAT_LEVELS)
+            for muscle, level in levels.items()
+        })
+
+    def _heat_layer(self, t) -> Tuple[float, Tuple[float, float, float]]:
+        """强度 t (0~1] 对应的 (不透明度系数, RGB 颜色)"""
+        color = tuple(
+            low + (high - low) * t
+            for low, high in zip(self.HEAT_LOW, self.HEAT_HIGH)
+        )
+        return 0.35 + 0.65 * t, color
+
+    def _render(self, key, layers) -> Tuple[QPixmap, QPixmap]:
+        pixmaps = self._cache.get(key)
+        if pixmaps is not None:
+            self._cache.move_to_end(key)
+            return pixmaps
+
+        if not self._loaded:
+            self._load()
+        pixmaps = tuple(self._compose(view, layers) for view in VIEWS)
+        self._cache[key] = pixmaps
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return pixmaps
+
+    def _compose(self, view, layers) -> QPixmap:
+        """layers: 肌群 -> (不透明度系数, RGB 颜色或 None 表示遮罩自身颜色)
+
+        所有遮罩按系数加权求和（未选中的系数为 0），一次矩阵乘法同时得到覆盖度和颜色；
+        覆盖度超过 1 时截断，并按比例缩放颜色，再与底图做一次 source-over 混合
+        """
+        names = self._names[view]
+        coeff = np.zeros((4, len(names)), np.float32)
+        for i, name in enumerate(names):
+            layer = layers.get(name)
+            if layer is None:
+                continue
+            opacity, rgb = layer
+            bgr = self._colors[view][i] if rgb is None else rgb[::-1]
+            coeff[0, i] = opacity
+            coeff[1:, i] = np.multiply(bgr, opacity)
+        acc = coeff @ self._alphas[view]
+
+        coverage = np.minimum(acc[0], 1.0)
+        scale = coverage / np.maximum(acc[0], 1e-6)
+        out = self._bases[view] * (1.0 - coverage)
+        out[:3] += acc[1:] * scale
+        out[3] += coverage * 255
+        out += 0.5
+
+        scratch = self._scratch[view]
+        np.copyto(scratch, out.T, casting="unsafe")
+        pixels = self._pixels[view]
+        np.copyto(pixels, self._base_pixels[view])
+        pixels[self._support[view]] = scratch.view(np.uint32).reshape(-1)
+        width, height = self._size[view]
+        image = QImage(pixels.data, width, height, width * 4,
+                       QImage.Format_ARGB32_Premultiplied)
+        # fromImage 会复制像素，缓冲区可以在下次合成时复用
+        return QPixmap.fromImage(image)
+
+
+class MuscleOverlayWidget(QWidget):
+    def __init__(self, image_dir="assets", mask_dir="assets/masks"):
+        super().__init__()
+        self.compositor = MuscleCompositor(image_dir, mask_dir)
+
+        self.front_label = QLabel()
+        self.back_label = QLabel()
+
+        layout = QHBoxLayout()
+        layout.addWidget(self.front_label)
+        layout.addWidget(self.back_label)
+        self.setLayout(layout)
+
+    def highlight_muscles(self, muscle_list):
+        self.show_pixmaps(*self.compositor.render(muscle_list))
+
+    def show_heat_map(self, volumes):
+        """按训练量（肌群 -> 组数）着色显示"""
+        self.show_pixmaps(*self.compositor.render_heat(volumes))
+
+    def show_pixmaps(self, front, back):
+        self.front_label.setPixmap(front)
+        self.back_label.setPixmap(back)
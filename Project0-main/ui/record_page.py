@@ -73,13 +73,13 @@ class RecordPage(BasePage):
             return
 
         try:
-            self.manager.save_training_record(
-                TrainingInfo(
-                    date,
-                    exercises,
-                    times
-                )
+            info = TrainingInfo(
+                date,
+                exercises,
+                times
             )
+            self.manager.save_training_record(info)
+            self.controller.on_training_saved(info)
             QMessageBox.information(self, "成功", "训练记录保存成功！")
 
             # 清空输入框
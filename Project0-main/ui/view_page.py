@@ -1,17 +1,19 @@
 from PyQt5.QtWidgets import (
     QLabel, QTextEdit, QPushButton, QVBoxLayout, QHBoxLayout,
-    QMessageBox, QCalendarWidget, QWidget
+    QMessageBox, QCalendarWidget, QComboBox, QTabWidget, QScrollArea, QWidget
 )
-from PyQt5.QtCore import QDate
+from PyQt5.QtCore import QDate, QTimer
 from .base import BasePage
 import sys
 import os
+from collections import OrderedDict
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from data_interface import LiteDataManager  # noqa
 from PyQt5.QtGui import QPainter, QColor
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap, QImage
-from PIL import Image
+from .muscle_overlay import MuscleOverlayWidget
+from .year_heatmap import YearHeatMap, daily_array
+from .history_model import TrainingHistory
 
 def apply_sporty_button_style(button, 
                                bg_color="#FF6B00", 
@@ -39,56 +41,6 @@ def apply_sporty_button_style(button,
         }}
     """)
 
-class MuscleOverlayWidget(QWidget):
-    def __init__(self, image_dir="assets", mask_dir="assets/masks"):
-        super().__init__()
-        self.image_dir = image_dir
-        self.mask_dir = mask_dir
-
-        self.front_label = QLabel()
-        self.back_label = QLabel()
-
-        layout = QHBoxLayout()
-        layout.addWidget(self.front_label)
-        layout.addWidget(self.back_label)
-        self.setLayout(layout)
-
-    def highlight_muscles(self, muscle_list):
-        # 肌群正背面分类
-        front_muscles = {"chest", "abs", "biceps", "shoulders", "legs_front", "calves"}
-        back_muscles = {"back", "triceps", "glutes", "legs_back", "calves"}
-
-        # 加载 base 图
-        front_base = Image.open(os.path.join(self.image_dir, "base_front.png")).convert("RGBA")
-        back_base = Image.open(os.path.join(self.image_dir, "base_back.png")).convert("RGBA")
-
-        # 合成前视图 debug中...
-        front_img = front_base.copy()
-        for muscle in muscle_list:
-            if muscle in front_muscles:
-                mask_path = os.path.join(self.mask_dir, f"{muscle}_front.png")
-                if os.path.exists(mask_path):
-                    overlay = Image.open(mask_path).convert("RGBA")
-                    front_img = Image.alpha_composite(front_img, overlay)
-
-        # 合成背视图
-        back_img = back_base.copy()
-        for muscle in muscle_list:
-            if muscle in back_muscles:
-                mask_path = os.path.join(self.mask_dir, f"{muscle}_back.png")
-                if os.path.exists(mask_path):
-                    overlay = Image.open(mask_path).convert("RGBA")
-                    back_img = Image.alpha_composite(back_img, overlay)
-
-        self.front_label.setPixmap(self.pil2pixmap(front_img).scaledToHeight(500))
-        self.back_label.setPixmap(self.pil2pixmap(back_img).scaledToHeight(500))
-
-    def pil2pixmap(self, im):
-        im = im.convert("RGBA")
-        data = im.tobytes("raw", "RGBA")
-        qimage = QImage(data, im.width, im.height, QImage.Format_RGBA8888)
-        return QPixmap.fromImage(qimage)
-
 
 # 用于将训练动作映射到部位
 muscle_map = {
@@ -114,7 +66,30 @@ muscle_map = {
     "波比跳": ["full_body"]
 }
 
+# 肌群图显示方式：(名称, 统计训练量的天数)，None 表示只高亮当天练过的部位
+OVERLAY_MODES = [
+    ("当日部位", None),
+    ("当日训练量", 1),
+    ("近7天训练量", 7),
+    ("近30天训练量", 30),
+]
+
 
+def muscle_volumes(exercise_totals):
+    """把每个动作的总组数累加到它训练的肌群上"""
+    volumes = {}
+    for exercise, n_group in exercise_totals.items():
+        for muscle in muscle_map.get(exercise, []):
+            volumes[muscle] = volumes.get(muscle, 0) + n_group
+    return volumes
+
+
+# 年度热力图的时间跨度：(名称, 年数)
+YEAR_SPANS = [
+    ("今年", 1),
+    ("近3年", 3),
+    ("近10年", 10),
+]
 
 
 #进度条式日历美化
@@ -153,20 +128,27 @@ class TrainingCalendar(QCalendarWidget):
 class TrainingCalendar(QCalendarWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.date_to_total = {}
-        self.max_total = 1  # 初始值设为1避免除零错误
+        # (年, 月) -> 按日索引的单元格颜色，无训练的日期为 None
+        # 颜色在数据载入时算好，paintCell 不再格式化日期、不再计算比例
+        self.month_colors = {}
+
+    def set_month_totals(self, year, month, date_to_total):
+        """根据某月的每日总组数（yyyyMMdd -> 组数）预先计算该月的单元格颜色"""
+        colors = [None] * QDate(year, month, 1).daysInMonth()
+        max_total = max(max(date_to_total.values(), default=0), 1)  # 至少为1避免除零错误
+        for date_str, total in date_to_total.items():
+            if total > 0:
+                # 计算颜色透明度（根据训练量比例）
+                alpha = min(150, int(200 * (total / max_total)))  # 限制最大透明度
+                colors[int(date_str[6:]) - 1] = QColor(50, 150, 50, alpha)  # 深绿色系
+        self.month_colors[(year, month)] = colors
 
     def paintCell(self, painter, rect, date):
         super().paintCell(painter, rect, date)
-        
-        date_str = date.toString("yyyyMMdd")
-        total = self.date_to_total.get(date_str, 0)
-        
-        if total > 0:
-            # 计算颜色透明度（根据训练量比例）
-            alpha = min(150, int(200 * (total / self.max_total)))  # 限制最大透明度
-            color = QColor(50, 150, 50, alpha)  # 深绿色系
-            
+
+        colors = self.month_colors.get((date.year(), date.month()))
+        color = colors[date.day() - 1] if colors else None
+        if color is not None:
             # 填充整个单元格
             painter.save()
             painter.setPen(Qt.NoPen)
@@ -175,11 +157,19 @@ class TrainingCalendar(QCalendarWidget):
             painter.restore()
 
 class ViewPage(BasePage):
+    # 最多缓存的月份数（当前月及前后预取的月份）
+    MONTH_CACHE_SIZE = 6
+
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
         self.database_manager: LiteDataManager = controller.database_manager
-        self.all_data = []  # 保证该属性始终存在
+        # (年, 月) -> 该月每日总组数，按最近使用顺序排列
+        self.month_totals = OrderedDict()
+        # 按日期索引的记录文本和训练部位，与月历共用月份上限
+        self.history = TrainingHistory(
+            self.database_manager, muscle_map, self.MONTH_CACHE_SIZE)
+        self._loaded_user = None
 
         layout = QVBoxLayout()
 
@@ -189,7 +179,29 @@ class ViewPage(BasePage):
         # 修改日历控件为自定义版本
         self.calendar = TrainingCalendar()
         self.calendar.clicked.connect(self.on_date_selected)
-        layout.addWidget(self.calendar)
+        self.calendar.currentPageChanged.connect(self.on_month_changed)
+
+        # 年度热力图，与月历共用下方的记录和肌群图
+        self.year_map = YearHeatMap()
+        self.year_map.dateClicked.connect(self.on_year_map_clicked)
+        self.year_span = QComboBox()
+        self.year_span.addItems([name for name, _ in YEAR_SPANS])
+        self.year_span.currentIndexChanged.connect(self.on_year_span_changed)
+        year_scroll = QScrollArea()
+        year_scroll.setWidget(self.year_map)
+        year_tab = QWidget()
+        year_layout = QVBoxLayout(year_tab)
+        span_layout = QHBoxLayout()
+        span_layout.addWidget(QLabel("时间跨度"))
+        span_layout.addWidget(self.year_span)
+        span_layout.addStretch()
+        year_layout.addLayout(span_layout)
+        year_layout.addWidget(year_scroll)
+
+        self.history_tabs = QTabWidget()
+        self.history_tabs.addTab(self.calendar, "月历")
+        self.history_tabs.addTab(year_tab, "年度热力图")
+        layout.addWidget(self.history_tabs)
 
         # 显示当天训练记录的文本区域
         self.text_area = QTextEdit()
@@ -200,6 +212,16 @@ class ViewPage(BasePage):
         #self.figure_widget = HumanFigureWidget()
         #layout.addWidget(self.figure_widget)
 
+        # 肌群图显示方式
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(QLabel("肌群显示"))
+        self.overlay_mode = QComboBox()
+        self.overlay_mode.addItems([name for name, _ in OVERLAY_MODES])
+        self.overlay_mode.currentIndexChanged.connect(self.on_overlay_mode_changed)
+        mode_layout.addWidget(self.overlay_mode)
+        mode_layout.addStretch()
+        layout.addLayout(mode_layout)
+
         # 肌群图像显示组件（替代火柴人）
         self.muscle_overlay = MuscleOverlayWidget()
         layout.addWidget(self.muscle_overlay)
@@ -223,55 +245,155 @@ class ViewPage(BasePage):
 
         self.setLayout(layout)
 
-    # 在ViewPage的load_all_data中确保max_total最小为1
     def load_all_data(self):
         try:
-            self.all_data = self.database_manager.get_training_records()
-        
-            date_to_total = {}
-            for record in self.all_data:
-                day_total = sum(record.n_group)
-                date_str = record.timestamp
-            
-                date_to_total[date_str] = date_to_total.get(date_str, 0) + day_total
-
-            # 计算最大训练量（至少为1）
-            max_total = max(date_to_total.values(), default=0)
-            self.calendar.max_total = max(max_total, 1)  # 确保最小为1
-            self.calendar.date_to_total = date_to_total
-            self.calendar.updateCells()
-        
+            # 刷新时丢弃所有缓存（包括数据库管理器的查询缓存），记录可能已被其他程序修改
+            self.database_manager.clear_cache()
+            self.month_totals.clear()
+            self.calendar.month_colors.clear()
+            self.history.clear()
+            self._loaded_user = self.database_manager.current_user
+            self.show_month(self.calendar.yearShown(), self.calendar.monthShown())
+            self.load_year_totals()
             self.on_date_selected(self.calendar.selectedDate())
         except Exception as e:
             QMessageBox.critical(self, "错误", f"加载失败: {e}")
-            
 
-    def on_date_selected(self, qdate: QDate):
-        self.text_area.clear()
-        #self.figure_widget.highlight_parts([])  # 清空上次肌群高亮
-        self.muscle_overlay.highlight_muscles([])  # 改为清空图像显示
+    def load_month_totals(self, year, month):
+        """查询某月的每日总组数并算好单元格颜色；已缓存的月份直接返回"""
+        key = (year, month)
+        if key in self.month_totals:
+            self.month_totals.move_to_end(key)
+            return self.month_totals[key]
+
+        first = QDate(year, month, 1)
+        start = first.toString("yyyyMMdd")
+        end = first.addDays(first.daysInMonth() - 1).toString("yyyyMMdd")
+        date_to_total = self.database_manager.get_daily_totals(start, end)
+
+        self.month_totals[key] = date_to_total
+        self.calendar.set_month_totals(year, month, date_to_total)
+        while len(self.month_totals) > self.MONTH_CACHE_SIZE:
+            old, _ = self.month_totals.popitem(last=False)
+            self.calendar.month_colors.pop(old, None)
+        return date_to_total
+
+    def show_month(self, year, month):
+        """载入当前显示的月份，前后相邻的月份在事件循环空闲时预取"""
+        self.load_month_totals(year, month)
+        self.calendar.updateCells()
+        QTimer.singleShot(0, lambda: self.prefetch_adjacent_months(year, month))
+
+    def prefetch_adjacent_months(self, year, month):
+        if not self.database_manager.current_user:
+            return
+        # 用户已经翻到别的月份时不再预取
+        if (year, month) != (self.calendar.yearShown(), self.calendar.monthShown()):
+            return
+        try:
+            first = QDate(year, month, 1)
+            for other in (first.addMonths(-1), first.addMonths(1)):
+                self.load_month_totals(other.year(), other.month())
+            # 重新标记当前月为最近使用，避免被预取的月份挤出缓存
+            self.load_month_totals(year, month)
+        except Exception:
+            # 预取失败不影响当前月份的显示，翻页时会重新查询
+            return
+        # 日历网格首尾会显示相邻月份的日期
+        self.calendar.updateCells()
+
+    def load_year_totals(self):
+        """按所选跨度查询到今年年底为止的每日总组数，交给热力图（数据不变时不会重绘）"""
+        years = YEAR_SPANS[self.year_span.currentIndex()][1]
+        first_year = QDate.currentDate().year() - years + 1
+        date_to_total = self.database_manager.get_daily_totals(
+            QDate(first_year, 1, 1).toString("yyyyMMdd"),
+            QDate(first_year + years - 1, 12, 31).toString("yyyyMMdd")
+        )
+        self.year_map.set_totals(
+            first_year, years, daily_array(first_year, years, date_to_total))
+
+    def on_year_span_changed(self, index):
+        if not self.database_manager.current_user:
+            return
+        try:
+            self.load_year_totals()
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"加载失败: {e}")
 
-        date_str = qdate.toString("yyyyMMdd")
-        matched = [rec for rec in self.all_data if rec.timestamp == date_str]
+    def on_year_map_clicked(self, qdate: QDate):
+        # 日历翻到该月（会触发按月加载），再显示当天记录和肌群图
+        self.calendar.setSelectedDate(qdate)
+        try:
+            self.on_date_selected(qdate)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"加载失败: {e}")
 
-        if not matched:
-            self.text_area.setPlainText("该日暂无训练记录。")
+    def on_month_changed(self, year, month):
+        if not self.database_manager.current_user:
             return
+        try:
+            self.show_month(year, month)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"加载失败: {e}")
 
-        output = ""
-        trained_parts = set()
+    def on_date_selected(self, qdate: QDate):
+        self.year_map.set_selected_date(qdate)
 
-        for info in matched:
-            output += f"日期: {info.timestamp[:4]}-{info.timestamp[4:6]}-{info.timestamp[6:]}\n"
-            for ex, n_group in zip(info.exercises, info.n_group):
-                output += f"  - 动作: {ex} | 组数: {n_group}\n"
-                trained_parts.update(muscle_map.get(ex, []))
-            output += "\n"
+        day = self.history.day(qdate.toString("yyyyMMdd"))
+        if day is None:
+            self.text_area.setPlainText("该日暂无训练记录。")
+            self.update_overlay(qdate, frozenset())
+            return
 
-        self.text_area.setPlainText(output)
+        self.text_area.setPlainText(day.text)
         #self.figure_widget.highlight_parts(trained_parts)
-        self.muscle_overlay.highlight_muscles(trained_parts)
+        self.update_overlay(qdate, day.muscles)
+
+    def update_overlay(self, qdate, trained_parts):
+        """按当前显示方式更新肌群图：高亮当天部位，或按所选时间窗口的训练量着色"""
+        window = OVERLAY_MODES[self.overlay_mode.currentIndex()][1]
+        if window is None:
+            self.muscle_overlay.highlight_muscles(trained_parts)
+            return
+        totals = self.database_manager.get_exercise_totals(
+            qdate.addDays(1 - window).toString("yyyyMMdd"),
+            qdate.toString("yyyyMMdd")
+        )
+        self.muscle_overlay.show_heat_map(muscle_volumes(totals))
+
+    def on_overlay_mode_changed(self, index):
+        if not self.database_manager.current_user:
+            return
+        try:
+            self.on_date_selected(self.calendar.selectedDate())
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"加载失败: {e}")
 
 
+    def on_training_saved(self, info):
+        """新记录保存后增量更新已加载的数据，不重新查询"""
+        if self._loaded_user != self.database_manager.current_user:
+            return
+        self.history.add_record(info)
+
+        date = QDate.fromString(info.timestamp, "yyyyMMdd")
+        added = sum(info.n_group)
+        key = (date.year(), date.month())
+        if key in self.month_totals:
+            date_to_total = self.month_totals[key]
+            date_to_total[info.timestamp] = date_to_total.get(info.timestamp, 0) + added
+            self.calendar.set_month_totals(date.year(), date.month(), date_to_total)
+            self.calendar.updateCells()
+        self.year_map.add_to_day(date, added)
+
     def on_show(self):
-        self.load_all_data()
+        # 换了用户才整体重新加载；同一用户保存的记录已经通过 on_training_saved 合并
+        if self._loaded_user != self.database_manager.current_user:
+            self.load_all_data()
+            return
+        try:
+            self.show_month(self.calendar.yearShown(), self.calendar.monthShown())
+            self.on_date_selected(self.calendar.selectedDate())
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"加载失败: {e}")
@@ -0,0 +1,177 @@
+from typing import Dict, Optional
+
+import numpy as np
+from PyQt5.QtCore import QDate, QRect, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPainter, QPen
+from PyQt5.QtWidgets import QWidget
+
+
+def daily_array(first_year: int, years: int,
+                date_to_total: Dict[str, int]) -> np.ndarray:
+    """把 yyyyMMdd -> 总组数 转为从 first_year 年 1 月 1 日起按日索引的数组
+
+    日历上不存在的日期（如旧数据中的 20250230）被跳过，不影响其余日期
+    """
+    start = QDate(first_year, 1, 1)
+    totals = np.zeros(start.daysTo(QDate(first_year + years, 1, 1)), np.int64)
+    if date_to_total:
+        keys = np.fromiter(map(int, date_to_total), np.int64, len(date_to_total))
+        year, month, day = keys // 10000, keys // 100 % 100, keys % 100
+        valid = (month >= 1) & (month <= 12) & (day >= 1)
+        months = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+        month_start = months.astype("datetime64[D]")
+        days_in_month = ((months + 1).astype("datetime64[D]") - month_start).astype(np.int64)
+        valid &= day <= days_in_month
+        offsets = (month_start + (day - 1) -
+                   np.datetime64(f"{first_year:04d}-01-01")).astype(np.int64)
+        inside = valid & (offsets >= 0) & (offsets < len(totals))
+        totals[offsets[inside]] = np.fromiter(
+            date_to_total.values(), np.int64, len(date_to_total))[inside]
+    return totals
+
+
+class YearHeatMap(QWidget):
+    """多年训练热力图：每年一条，列为周、行为星期一到星期日，颜色深浅表示当日总组数
+
+    - 数据是从第一年 1 月 1 日起按日索引的数组，整幅图用 NumPy 一次栅格化为 QImage，
+      只在数据变化时重新生成；paintEvent 只贴图并描出选中的日期
+    - 点击时把坐标换算回日期，发出 dateClicked
+    """
+
+    dateClicked = pyqtSignal(QDate)
+
+    CELL = 10          # 单元格边长 (px)
+    GAP = 2            # 单元格间距 (px)
+    LABEL_WIDTH = 52   # 左侧年份标签宽度 (px)
+    WEEKS = 54         # 一年最多跨 54 个周列
+    BAND_ROWS = 8      # 每年 7 行加 1 行空白
+    BACKGROUND = 0xFFFFFFFF
+    # 无训练到训练量最大，共 5 级 (0xAARRGGBB)
+    PALETTE = (0xFFEBEDF0, 0xFFC6E48B, 0xFF7BC96F, 0xFF239A3B, 0xFF196127)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.first_year = QDate.currentDate().year()
+        self.years = 1
+        self._totals = np.zeros(0, np.int64)
+        self._image = QImage()
+        self._selected: Optional[QDate] = None
+        self.set_totals(self.first_year, self.years, self._totals)
+
+    @property
+    def pitch(self):
+        return self.CELL + self.GAP
+
+    def set_totals(self, first_year: int, years: int, totals: np.ndarray):
+        """设置数据并重新栅格化；数据与当前完全相同时什么也不做"""
+        totals = np.asarray(totals, np.int64)
+        if (first_year, years) == (self.first_year, self.years) and \
+                not self._image.isNull() and np.array_equal(totals, self._totals):
+            return
+        self.first_year = first_year
+        self.years = years
+        self._totals = totals.copy()
+        self._image = self._rasterize()
+        self.setFixedSize(self._image.size())
+        self.update()
+
+    def add_to_day(self, date: QDate, amount: int):
+        """某天的总组数增加 amount（新保存了记录），不在显示范围内时忽略"""
+        index = QDate(self.first_year, 1, 1).daysTo(date)
+        if amount and 0 <= index < len(self._totals):
+            totals = self._totals.copy()
+            totals[index] += amount
+            self.set_totals(self.first_year, self.years, totals)
+
+    def set_selected_date(self, date: Optional[QDate]):
+        self._selected = date
+        self.update()
+
+    def _jan1_weekday(self, year):
+        """该年 1 月 1 日是星期几，星期一为 0"""
+        return QDate(year, 1, 1).dayOfWeek() - 1
+
+    def _rasterize(self) -> QImage:
+        pitch = self.pitch
+        width = self.LABEL_WIDTH + self.WEEKS * pitch
+        height = self.years * self.BAND_ROWS * pitch
+
+        # 先在 (年数*8, 54) 的网格上算出每个单元格的颜色下标，0 为背景
+        grid = np.zeros((self.years * self.BAND_ROWS + 1, self.WEEKS + 1), np.intp)
+        peak = self._totals.max(initial=0)
+        offset = 0
+        for band in range(self.years):
+            year = self.first_year + band
+            n_days = QDate(year, 1, 1).daysInYear()
+            totals = np.zeros(n_days, np.int64)
+            chunk = self._totals[offset:offset + n_days]
+            totals[:len(chunk)] = chunk
+            offset += n_days
+
+            slots = np.arange(n_days) + self._jan1_weekday(year)
+            levels = np.zeros(n_days, np.intp)
+            if peak > 0:
+                levels = np.ceil(totals * 4 / peak).astype(np.intp).clip(0, 4)
+            grid[band * self.BAND_ROWS + slots % 7, slots // 7] = levels + 1
+
+        # 每个像素对应的网格行列，标签区和间隙指向最后一行/列（背景）
+        xs = np.arange(width) - self.LABEL_WIDTH
+        xmap = np.where((xs >= 0) & (xs % pitch < self.CELL), xs // pitch, -1)
+        ys = np.arange(height)
+        ymap = np.where(ys % pitch < self.CELL, ys // pitch, -1)
+
+        lut = np.array((self.BACKGROUND,) + self.PALETTE, np.uint32)
+        pixels = np.ascontiguousarray(lut[grid[ymap[:, None], xmap[None, :]]])
+        # copy() 让 QImage 持有自己的像素，之后可以直接在上面写年份
+        image = QImage(pixels.data, width, height, width * 4,
+                       QImage.Format_RGB32).copy()
+
+        painter = QPainter(image)
+        painter.setPen(QColor(90, 90, 90))
+        for band in range(self.years):
+            rect = QRect(0, band * self.BAND_ROWS * pitch,
+                         self.LABEL_WIDTH - 6, 7 * pitch)
+            painter.drawText(rect, Qt.AlignRight | Qt.AlignVCenter,
+                             str(self.first_year + band))
+        painter.end()
+        return image
+
+    def date_at(self, x, y) -> Optional[QDate]:
+        """控件坐标对应的日期，不在任何单元格上时返回 None"""
+        x -= self.LABEL_WIDTH
+        if x < 0 or y < 0 or x % self.pitch >= self.CELL or \
+                y % self.pitch >= self.CELL:
+            return None
+        band, row = divmod(y // self.pitch, self.BAND_ROWS)
+        col = x // self.pitch
+        if band >= self.years or row >= 7:
+            return None
+        first = QDate(self.first_year + band, 1, 1)
+        day = col * 7 + row - self._jan1_weekday(first.year())
+        if not 0 <= day < first.daysInYear():
+            return None
+        return first.addDays(day)
+
+    def cell_rect(self, date: QDate) -> Optional[QRect]:
+        band = date.year() - self.first_year
+        if not 0 <= band < self.years:
+            return None
+        slot = date.dayOfYear() - 1 + self._jan1_weekday(date.year())
+        return QRect(self.LABEL_WIDTH + slot // 7 * self.pitch,
+                     (band * self.BAND_ROWS + slot % 7) * self.pitch,
+                     self.CELL, self.CELL)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawImage(0, 0, self._image)
+        rect = self.cell_rect(self._selected) if self._selected else None
+        if rect is not None:
+            painter.setPen(QPen(QColor(255, 107, 0), 2))
+            painter.drawRect(rect.adjusted(-1, -1, 1, 1))
+        painter.end()
+
+    def mousePressEvent(self, event):
+        date = self.date_at(event.x(), event.y())
+        if date is not None:
+            self.dateClicked.emit(date)
+        super().mousePressEvent(event)
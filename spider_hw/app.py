@@ -7,7 +7,7 @@ from ui.main_page import MainPage
 class TrainingApp(QStackedWidget):
     def __init__(self):
         super().__init__()
-        self.manager = LiteDataManager("./data/test1.db")
+        self.manager = LiteDataManager("./data/test1.db", storage="daily")
 
         self.pages = {
             "LoginPage": LoginPage(self),
@@ -1,12 +1,15 @@
 
 import sqlite3
+import copy
 import json
 import logging
 import os
+import random
+import time
 
 
 from contextlib import contextmanager
-from typing import Optional, Dict, Any, Iterator, Tuple, List
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, Tuple, List
 from passlib.hash import pbkdf2_sha256
 from dataclasses import dataclass, asdict
 
@@ -40,9 +43,24 @@ class TrainingInfo:
         return cls.from_dict(json.loads(json_str))
 
 
+STORAGE_MODES = ('blob', 'daily')
+
+
+class VersionConflictError(RuntimeError):
+    """条件写入时数据已被其他客户端修改"""
+
+
 class LiteDataManager:
-    def __init__(self, db_path: str = ':memory:') -> None:
+    def __init__(self, db_path: str = ':memory:', storage: str = 'blob') -> None:
+        """
+        storage: 'blob' 为原有格式，整个训练历史存成 user_data 中的一个 JSON；
+            'daily' 为每个 (用户, 日期) 一行的 user_days 表，写入只触及被修改的日期。
+            首次以 'daily' 打开时，旧的 user_data 会被迁入 user_days
+        """
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"未知的存储模式: {storage!r}")
         self.db_path: str = db_path
+        self.storage: str = storage
         self.current_user: Optional[Dict[str, Any]] = None
         self.logger: logging.Logger = logging.getLogger(
             self.__class__.__name__)
@@ -60,6 +78,10 @@ class LiteDataManager:
             cursor = conn.cursor()
             yield cursor
             conn.commit()
+        except VersionConflictError:
+            # 版本冲突是预期内的结果，由调用方决定是否重试
+            conn.rollback()
+            raise
         except Exception as e:
             conn.rollback()
             self.logger.error("Database operation failed: %s", str(e))
@@ -80,10 +102,42 @@ class LiteDataManager:
                 CREATE TABLE IF NOT EXISTS user_data (
                     user_id INTEGER PRIMARY KEY,
                     data TEXT,
+                    version INTEGER NOT NULL DEFAULT 0,
                     FOREIGN KEY(user_id) REFERENCES users(id)
                 )''')
+            cur.execute('PRAGMA table_info(user_data)')
+            if 'version' not in [row[1] for row in cur.fetchall()]:
+                # 旧库补充版本号列，已有数据从版本 0 开始
+                cur.execute('ALTER TABLE user_data ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+            if self.storage == 'daily':
+                self._init_daily_storage(cur)
         self.logger.debug("Database tables initialized")
 
+    def _init_daily_storage(self, cur: sqlite3.Cursor) -> None:
+        """建立按日存储的表，并把旧的整块 JSON 拆分迁入"""
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS user_days (
+                user_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (user_id, date),
+                FOREIGN KEY(user_id) REFERENCES users(id)
+            ) WITHOUT ROWID''')
+        # 已存在的同日记录以 user_days 为准，避免重复迁移覆盖新数据
+        cur.execute('''
+            INSERT OR IGNORE INTO user_days (user_id, date, data)
+            SELECT d.user_id, j.key, j.value
+            FROM user_data AS d, json_each(d.data) AS j
+            WHERE json_valid(d.data) AND json_type(d.data) = 'object'
+            ''')
+        if cur.rowcount > 0:
+            self.logger.info("Migrated %d days into user_days", cur.rowcount)
+        # 保留 user_data 行本身，其中的版本号在 daily 模式下继续使用
+        cur.execute('''
+            UPDATE user_data SET data = NULL
+            WHERE json_valid(data) AND json_type(data) = 'object'
+            ''')
+
     def login(self, username: str, password: str) -> bool:
         """登录实现"""
         self.logger.info("Login attempt for user: %s", username)
@@ -126,44 +180,206 @@ class LiteDataManager:
             self.logger.warning("Registration failed - username exists: %s", username)
             raise ValueError("用户名已存在") from e
 
-    def get_data(self) -> Dict[str, Any]:
-        """读取用户数据"""
+    def _require_login(self, action: str) -> int:
         if not self.current_user:
-            self.logger.error("Data access attempted without login")
+            self.logger.error("Data %s attempted without login", action)
             raise PermissionError("请先登录")
+        return self.current_user['id']
+
+    def get_data(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """读取用户数据，start/end 为可选的 yyyyMMdd 闭区间"""
+        return self.get_data_versioned(start, end)[0]
+
+    def get_data_versioned(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], int]:
+        """读取用户数据及其版本号，版本号用于 update_data 的 expected_version"""
+        user_id = self._require_login('access')
         try:
             with self._get_cursor() as cur:
+                # 数据与版本号在同一个读事务中取出，保证二者一致
+                cur.execute('BEGIN')
                 cur.execute(
-                    'SELECT data FROM user_data WHERE user_id=?',
-                    (self.current_user['id'],)
+                    'SELECT data, version FROM user_data WHERE user_id=?',
+                    (user_id,)
                 )
-                result: Optional[Tuple[str]] = cur.fetchone()
-            data = json.loads(result[0]) if result else {}
+                result: Optional[Tuple[Optional[str], int]] = cur.fetchone()
+                version = result[1] if result else 0
+                if self.storage == 'daily':
+                    data = self._get_days(cur, user_id, start, end)
+                else:
+                    data = json.loads(result[0]) if result and result[0] else {}
+                    if start is not None or end is not None:
+                        data = {
+                            date: info for date, info in data.items()
+                            if (start is None or date >= start)
+                            and (end is None or date <= end)
+                        }
             self.logger.debug("Data retrieved for user: %s", self.current_user['username'])
-            return data
+            return data, version
         except Exception as e:
             self.logger.error("Data retrieval failed: %s", str(e))
             raise
 
-    def update_data(self, new_data: Dict[str, Any]) -> bool:
-        """更新用户数据"""
-        if not self.current_user:
-            self.logger.error("Data update attempted without login")
-            raise PermissionError("请先登录")
-        try:
-            with self._get_cursor() as cur:
-                cur.execute('''
-                    INSERT INTO user_data (user_id, data)
-                    VALUES (?, ?)
-                    ON CONFLICT(user_id) DO UPDATE SET data=excluded.data
-                    ''', (self.current_user['id'], json.dumps(new_data))
+    @staticmethod
+    def _get_days(
+        cur: sqlite3.Cursor,
+        user_id: int,
+        start: Optional[str],
+        end: Optional[str]
+    ) -> Dict[str, Any]:
+        sql = 'SELECT date, data FROM user_days WHERE user_id=?'
+        params: List[Any] = [user_id]
+        if start is not None:
+            sql += ' AND date >= ?'
+            params.append(start)
+        if end is not None:
+            sql += ' AND date <= ?'
+            params.append(end)
+        cur.execute(sql + ' ORDER BY date', params)
+        return {date: json.loads(info) for date, info in cur.fetchall()}
+
+    @staticmethod
+    def _bump_version(
+        cur: sqlite3.Cursor, user_id: int, expected_version: Optional[int]
+    ) -> None:
+        """版本号加一；给出 expected_version 时只有版本号未变才成功（比较并交换）"""
+        if expected_version is None:
+            cur.execute('''
+                INSERT INTO user_data (user_id, data, version) VALUES (?, NULL, 1)
+                ON CONFLICT(user_id) DO UPDATE SET version = version + 1
+                ''', (user_id,))
+            return
+        cur.execute(
+            'UPDATE user_data SET version = version + 1 WHERE user_id=? AND version=?',
+            (user_id, expected_version)
+        )
+        if cur.rowcount == 0 and expected_version == 0:
+            # 尚无数据行的用户，版本号视为 0
+            cur.execute('''
+                INSERT INTO user_data (user_id, data, version) VALUES (?, NULL, 1)
+                ON CONFLICT(user_id) DO NOTHING
+                ''', (user_id,))
+        if cur.rowcount == 0:
+            raise VersionConflictError(f"数据已被修改，期望版本 {expected_version}")
+
+    def _write(
+        self,
+        user_id: int,
+        upserts: Dict[str, Any],
+        deletes: Iterable[str],
+        expected_version: Optional[int]
+    ) -> int:
+        """在一个事务中检查版本号并写入，返回实际删除的天数"""
+        with self._get_cursor() as cur:
+            self._bump_version(cur, user_id, expected_version)
+            if self.storage == 'blob':
+                cur.execute(
+                    'UPDATE user_data SET data=? WHERE user_id=?',
+                    (json.dumps(upserts), user_id)
                 )
+                return 0
+            cur.executemany('''
+                INSERT INTO user_days (user_id, date, data)
+                VALUES (?, ?, ?)
+                ON CONFLICT(user_id, date) DO UPDATE SET data=excluded.data
+                ''', [(user_id, date, json.dumps(info))
+                      for date, info in upserts.items()]
+            )
+            cur.executemany(
+                'DELETE FROM user_days WHERE user_id=? AND date=?',
+                [(user_id, date) for date in deletes]
+            )
+            return max(cur.rowcount, 0)
+
+    def update_data(
+        self,
+        new_data: Dict[str, Any],
+        expected_version: Optional[int] = None
+    ) -> bool:
+        """更新用户数据
+
+        blob 模式下用 new_data 整体替换；daily 模式下只写入 new_data 中出现的日期，
+        其余日期保持不变。给出 expected_version 时，若数据在读取后已被其他客户端修改，
+        抛出 VersionConflictError 且不写入任何内容。
+        """
+        user_id = self._require_login('update')
+        try:
+            self._write(user_id, new_data, (), expected_version)
             self.logger.info("Data updated for user: %s", self.current_user['username'])
             return True
+        except VersionConflictError as e:
+            self.logger.warning("Data update rejected: %s", str(e))
+            raise
         except Exception as e:
             self.logger.error("Data update failed: %s", str(e))
             raise
 
+    def update_with_retry(
+        self,
+        mutate: Callable[[Dict[str, Any]], None],
+        retries: int = 10,
+        base_delay: float = 0.01,
+        max_delay: float = 1.0
+    ) -> Dict[str, Any]:
+        """读取 - 修改 - 条件写入，版本冲突时重新读取最新数据并重放 mutate
+
+        mutate 就地修改传入的字典（可增删日期），可能被调用多次，不应有其他副作用。
+        返回最终写入的数据。
+        """
+        user_id = self._require_login('update')
+        delay = base_delay
+        for attempt in range(retries + 1):
+            data, version = self.get_data_versioned()
+            snapshot = copy.deepcopy(data)
+            mutate(data)
+            if self.storage == 'blob':
+                upserts, deletes = data, ()
+            else:
+                upserts = {
+                    date: info for date, info in data.items()
+                    if snapshot.get(date) != info
+                }
+                deletes = [date for date in snapshot if date not in data]
+            try:
+                self._write(user_id, upserts, deletes, version)
+                self.logger.info("Data updated for user: %s", self.current_user['username'])
+                return data
+            except VersionConflictError:
+                if attempt == retries:
+                    self.logger.error("Data update gave up after %d conflicts", retries + 1)
+                    raise
+                self.logger.debug("Version conflict, retry %d after %.3fs", attempt + 1, delay)
+                # 加入随机抖动，避免多个客户端同时重试
+                time.sleep(delay * (1 + random.random()))
+                delay = min(delay * 2, max_delay)
+
+    def delete_data(self, dates: List[str]) -> int:
+        """删除指定日期的记录，返回实际删除的天数"""
+        user_id = self._require_login('update')
+        try:
+            if self.storage == 'daily':
+                deleted = self._write(user_id, {}, dates, None)
+            else:
+                removed: List[str] = []
+
+                def drop(data: Dict[str, Any]) -> None:
+                    removed[:] = [date for date in dates if data.pop(date, None) is not None]
+                self.update_with_retry(drop)
+                deleted = len(removed)
+            self.logger.info("Deleted %d days for user: %s",
+                             deleted, self.current_user['username'])
+            return deleted
+        except Exception as e:
+            self.logger.error("Data delete failed: %s", str(e))
+            raise
+
     def logout(self) -> None:
         """登出"""
         if self.current_user:
@@ -190,10 +406,14 @@ if __name__ == '__main__':
         print('already registered')
     manager.login('raymond', 'password')
     manager.update_data({'20250502': TrainingInfo(['push_up', 'running'], [['arm', 'chest'], ['Cardiovascular']], [30, 25]).to_dict()})
-    data = manager.get_data()
+    data, version = manager.get_data_versioned()
     print(data)
     data['20250503'] = TrainingInfo(['deadlift'], [['hip']], [40]).to_dict()
-    manager.update_data(data)
+    # 其他客户端在此期间写入过时抛出 VersionConflictError，而不是覆盖其修改
+    manager.update_data(data, expected_version=version)
+    # 或者交给 update_with_retry 在冲突时自动重新读取并重放修改
+    manager.update_with_retry(
+        lambda data: data.setdefault('20250504', TrainingInfo(['squat'], [['leg']], [20]).to_dict()))
     data = manager.get_data()
     print(data)
     manager.logout()
\ No newline at end of file
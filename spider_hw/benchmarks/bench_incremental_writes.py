@@ -0,0 +1,75 @@
+"""追加一天训练记录的耗时：整块 JSON (blob) vs 按日存储 (daily)
+
+blob 模式每次追加都要读出、解析、重写整个历史，耗时随历史长度线性增长；
+daily 模式只写入一行，耗时应与历史长度无关。
+
+用法: python benchmarks/bench_incremental_writes.py --sizes 100 1000 10000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from backend import LiteDataManager, TrainingInfo  # noqa
+
+INFO = TrainingInfo(
+    ['push_up', 'running'], [['arm', 'chest'], ['Cardiovascular']], [30, 25]
+).to_dict()
+FIRST = date(1900, 1, 1)
+
+
+def day(i):
+    return (FIRST + timedelta(days=i)).strftime('%Y%m%d')
+
+
+def open_manager(tmp, storage, days):
+    manager = LiteDataManager(
+        os.path.join(tmp, f'{storage}-{days}.db'), storage=storage)
+    manager.register('bench', 'password')
+    manager.login('bench', 'password')
+    manager.update_data({day(i): INFO for i in range(days)})
+    return manager
+
+
+def append_blob(manager, i):
+    data = manager.get_data()
+    data[day(i)] = INFO
+    manager.update_data(data)
+
+
+def append_daily(manager, i):
+    manager.update_data({day(i): INFO})
+
+
+def measure(manager, append, days, writes):
+    start = time.perf_counter()
+    for i in range(days, days + writes):
+        append(manager, i)
+    return (time.perf_counter() - start) / writes * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[100, 1000, 10000])
+    parser.add_argument('--writes', type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{'days':>8}{'blob ms/write':>16}{'daily ms/write':>17}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for days in args.sizes:
+            blob = measure(open_manager(tmp, 'blob', days),
+                           append_blob, days, args.writes)
+            daily = measure(open_manager(tmp, 'daily', days),
+                            append_daily, days, args.writes)
+            print(f"{days:>8}{blob:>16.2f}{daily:>17.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""多个客户端同时读取 - 修改 - 写回同一用户的数据，检查没有丢失更新
+
+每个进程各自追加 --updates 个不同的日期。默认使用 update_with_retry（版本号比较并交换），
+结束后的天数应等于 processes * updates；--unsafe 使用原来的 get_data + update_data，
+用于对比展示丢失的更新。不一致时以非零状态退出。
+
+用法: python benchmarks/stress_parallel_updates.py --processes 4 --updates 100 --storage blob
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from backend import LiteDataManager, TrainingInfo  # noqa
+
+INFO = TrainingInfo(['deadlift'], [['hip']], [40]).to_dict()
+
+
+def worker(db_path, storage, index, updates, unsafe):
+    logging.disable(logging.WARNING)
+    manager = LiteDataManager(db_path, storage=storage)
+    manager.login('stress', 'password')
+    first = date(2000, 1, 1) + timedelta(days=index * updates)
+    for i in range(updates):
+        day = (first + timedelta(days=i)).strftime('%Y%m%d')
+        if unsafe:
+            data = manager.get_data()
+            data[day] = INFO
+            manager.update_data(data)
+        else:
+            manager.update_with_retry(
+                lambda data: data.__setitem__(day, INFO), retries=100)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--updates', type=int, default=100)
+    parser.add_argument('--storage', choices=['blob', 'daily'], default='blob')
+    parser.add_argument('--unsafe', action='store_true')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'updates.db')
+        manager = LiteDataManager(db_path, storage=args.storage)
+        manager.register('stress', 'password')
+        manager.login('stress', 'password')
+
+        start = time.perf_counter()
+        procs = [
+            multiprocessing.Process(
+                target=worker,
+                args=(db_path, args.storage, i, args.updates, args.unsafe))
+            for i in range(args.processes)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        expected = args.processes * args.updates
+        actual = len(manager.get_data())
+        print(f"storage={args.storage} unsafe={args.unsafe} "
+              f"days={actual}/{expected} in {elapsed:.2f}s")
+        if actual != expected or any(p.exitcode for p in procs):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()